@@ -0,0 +1,52 @@
+from datetime import date, timedelta
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from app import queries
+from app.queries import Reader, get_reader
+
+
+router = APIRouter(prefix="/v1/analytics")
+
+MAX_VOLUME_DAYS = 366
+
+
+@router.get("/loans", status_code=200)
+async def portfolio_summary(read: Reader = Depends(get_reader)) -> dict:
+    """
+    Loan totals by status and the default rate.
+    """
+    return await read(queries.portfolio_summary)
+
+
+@router.get("/funded-volume", status_code=200)
+async def funded_volume(
+    start: date | None = Query(default=None, description="Defaults to 30 days ago"),
+    end: date | None = Query(default=None, description="Defaults to today"),
+    read: Reader = Depends(get_reader),
+) -> list[dict]:
+    """
+    Loans and amount funded per day, oldest first.
+    """
+    end = end or date.today()
+    start = start or end - timedelta(days=29)
+    if start > end or (end - start).days >= MAX_VOLUME_DAYS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"start must be before end, at most {MAX_VOLUME_DAYS} days apart",
+        )
+    return await read(queries.funded_volume, start, end)
+
+
+@router.get("/investors/{investor_id}/exposure", status_code=200)
+async def investor_exposure(
+    investor_id: str, read: Reader = Depends(get_reader)
+) -> dict:
+    """
+    Funds an investor has reserved, invested, been repaid and still has
+    outstanding.
+    """
+    exposure = await read(queries.investor_exposure_for, investor_id)
+    if exposure is None:
+        raise HTTPException(status_code=404, detail="Investor not found")
+    return exposure
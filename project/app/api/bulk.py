@@ -0,0 +1,143 @@
+import json
+from collections.abc import AsyncIterator
+
+from fastapi import HTTPException, Request
+from pydantic import BaseModel, ValidationError
+
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+class BulkRows:
+    """
+    The valid rows of a bulk payload, validated as they are read.
+    An NDJSON body (one row per line) is read as it arrives, so the service
+    writes its first chunks while the rest is still being uploaded and the
+    body is never held in memory; a JSON array has to be read whole.
+    Iterating records the payload position of every valid row and an error
+    result for every invalid one. Reading stops after max_rows rows or
+    max_bytes bytes, reported as an error on the first row not read.
+    """
+
+    def __init__(
+        self,
+        request: Request,
+        row_model: type[BaseModel],
+        result_model: type[BaseModel],
+        max_rows: int,
+        max_bytes: int,
+    ):
+        self.request = request
+        self.row_model = row_model
+        self.result_model = result_model
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.indexes: list[int] = []
+        self.errors: list[BaseModel] = []
+        self._received = 0
+
+    async def __aiter__(self) -> AsyncIterator[BaseModel]:
+        if self.request.headers.get("content-type", "").startswith(NDJSON_MEDIA_TYPE):
+            rows = self._lines()
+            validate = self.row_model.model_validate_json
+        else:
+            rows = self._json_array()
+            validate = self.row_model.model_validate
+
+        index = 0
+        async for row in rows:
+            if index == self.max_rows:
+                self._stop(index)
+                return
+            try:
+                valid = validate(row)
+            except ValidationError as e:
+                self.errors.append(self.result_model(index=index, error=str(e)))
+            else:
+                self.indexes.append(index)
+                yield valid
+            index += 1
+        if self._received > self.max_bytes:
+            self._stop(index)
+
+    async def _lines(self) -> AsyncIterator[bytes]:
+        pending = b""
+        async for data in self.request.stream():
+            self._received += len(data)
+            if self._received > self.max_bytes:
+                return
+            *lines, pending = (pending + data).split(b"\n")
+            for line in lines:
+                if line.strip():
+                    yield line
+        if pending.strip():
+            yield pending
+
+    async def _json_array(self) -> AsyncIterator:
+        chunks = []
+        async for data in self.request.stream():
+            self._received += len(data)
+            if self._received > self.max_bytes:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"JSON bodies are limited to {self.max_bytes} bytes, "
+                    f"send larger batches as {NDJSON_MEDIA_TYPE}",
+                )
+            chunks.append(data)
+        try:
+            rows = json.loads(b"".join(chunks))
+        except json.JSONDecodeError as e:
+            raise HTTPException(status_code=422, detail="Invalid JSON body") from e
+        if not isinstance(rows, list):
+            raise HTTPException(status_code=422, detail="Expected a JSON array")
+        for row in rows:
+            yield row
+
+    def _stop(self, index: int) -> None:
+        self.errors.append(
+            self.result_model(
+                index=index,
+                error=f"Payloads are limited to {self.max_rows} rows and "
+                f"{self.max_bytes} bytes, this row and the rest were not read",
+            )
+        )
+
+
+def read_bulk_rows(
+    request: Request,
+    row_model: type[BaseModel],
+    result_model: type[BaseModel],
+    max_rows: int,
+    max_bytes: int,
+) -> BulkRows:
+    """
+    Validate a bulk payload row by row as the service consumes it.
+    Accepts either a JSON array or an NDJSON body (one row per line). A
+    body announced as larger than max_bytes is rejected up front.
+    """
+    content_length = request.headers.get("content-length")
+    if content_length is not None and int(content_length) > max_bytes:
+        raise HTTPException(
+            status_code=413, detail=f"Payloads are limited to {max_bytes} bytes"
+        )
+    return BulkRows(request, row_model, result_model, max_rows, max_bytes)
+
+
+def bulk_response(
+    results: list[BaseModel],
+    rows: BulkRows,
+    succeeded_key: str = "created",
+) -> dict:
+    """
+    Merge service results (indexed by position among the valid rows) with
+    the payload's validation errors, in payload order.
+    """
+    for result in results:
+        result.index = rows.indexes[result.index]
+    merged = sorted([*results, *rows.errors], key=lambda result: result.index)
+    failed = sum(1 for result in merged if result.error is not None)
+    return {
+        succeeded_key: len(merged) - failed,
+        "failed": failed,
+        "results": [result.model_dump() for result in merged],
+    }
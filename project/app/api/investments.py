@@ -0,0 +1,148 @@
+import logging
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+
+from app import queries, services
+from app.api.bulk import bulk_response, read_bulk_rows
+from app.api.responses import (
+    NEXT_CURSOR_HEADER,
+    InvestmentResponse,
+    investment_list,
+    serialized,
+)
+from app.config import Settings, get_settings
+from app.models import (
+    InsufficientFundsError,
+    InvalidInvestmentAmountError,
+    InvalidInvestmentStatusError,
+    InvestmentStatus,
+    LoanAlreadyFundedError,
+)
+from app.queries import Reader, get_reader
+from app.services import (
+    InvestmentCreateDTO,
+    NotFoundError,
+    RepaymentDTO,
+    RepaymentResultDTO,
+)
+from app.unit_of_work import UnitOfWork, get_unit_of_work
+
+
+logger = logging.getLogger(__name__)
+
+
+router = APIRouter(prefix="/v1")
+
+
+@router.get("/investments", status_code=200, response_model=list[InvestmentResponse])
+async def get_investments(
+    cursor: str | None = Query(default=None, description="Last investment id seen"),
+    limit: int = Query(default=100, ge=1, le=1000),
+    investor_id: str | None = Query(default=None),
+    loan_id: str | None = Query(default=None),
+    status: InvestmentStatus | None = Query(default=None),
+    read: Reader = Depends(get_reader),
+) -> Response:
+    """
+    List investments in id order, one page at a time, e.g. an investor's
+    portfolio. When the page is full the cursor for the next one is returned
+    in the X-Next-Cursor header.
+    """
+    investments = await read(
+        queries.investments_page,
+        after_id=cursor,
+        limit=limit,
+        investor_id=investor_id,
+        loan_id=loan_id,
+        status=status,
+    )
+    headers = {}
+    if len(investments) == limit:
+        headers[NEXT_CURSOR_HEADER] = investments[-1]["id"]
+    return serialized(investment_list, investments, headers)
+
+
+@router.post("/investments", status_code=201)
+async def invest(
+    payload: InvestmentCreateDTO, uow: UnitOfWork = Depends(get_unit_of_work)
+) -> dict:
+    """
+    Reserve the investor's funds for a loan, pending approval.
+    """
+    try:
+        investment_id = await services.invest(payload, uow)
+    except NotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e)) from e
+    except InvalidInvestmentAmountError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    except (InsufficientFundsError, LoanAlreadyFundedError) as e:
+        raise HTTPException(status_code=409, detail=str(e)) from e
+
+    return {
+        "investment_id": investment_id,
+        "status": InvestmentStatus.PENDING_APPROVAL.value,
+        "message": "Investment created successfully",
+    }
+
+
+@router.post("/investments/{investment_id}/approve", status_code=200)
+async def approve(
+    investment_id: str, uow: UnitOfWork = Depends(get_unit_of_work)
+) -> dict:
+    try:
+        await services.approve_investment(investment_id, uow)
+    except NotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e)) from e
+    except (InvalidInvestmentStatusError, LoanAlreadyFundedError) as e:
+        raise HTTPException(status_code=409, detail=str(e)) from e
+
+    return {
+        "investment_id": investment_id,
+        "status": InvestmentStatus.ACTIVE.value,
+        "message": "Investment approved, loan funded",
+    }
+
+
+@router.post("/investments/{investment_id}/reject", status_code=200)
+async def reject(
+    investment_id: str, uow: UnitOfWork = Depends(get_unit_of_work)
+) -> dict:
+    try:
+        await services.reject_investment(investment_id, uow)
+    except NotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e)) from e
+    except InvalidInvestmentStatusError as e:
+        raise HTTPException(status_code=409, detail=str(e)) from e
+
+    return {
+        "investment_id": investment_id,
+        "status": InvestmentStatus.REJECTED.value,
+        "message": "Investment rejected, funds released",
+    }
+
+
+@router.post("/repayments/batch", status_code=200)
+async def ingest_repayments(
+    request: Request,
+    chunk_size: int | None = Query(default=None, ge=1, le=10_000),
+    uow: UnitOfWork = Depends(get_unit_of_work),
+    settings: Settings = Depends(get_settings),
+) -> dict:
+    """
+    Apply a batch of repayments, e.g. a daily bank file.
+    Accepts either a JSON array or an NDJSON body (one repayment per line)
+    and returns a result for every row, in input order.
+    """
+    rows = read_bulk_rows(
+        request,
+        RepaymentDTO,
+        RepaymentResultDTO,
+        max_rows=settings.bulk_max_rows,
+        max_bytes=settings.bulk_max_bytes,
+    )
+    applied = await services.ingest_repayments(
+        repayments=rows,
+        uow=uow,
+        chunk_size=chunk_size or settings.bulk_chunk_size,
+    )
+    return bulk_response(applied, rows, succeeded_key="applied")
@@ -1,12 +1,34 @@
+import json
 import logging
-
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.ext.asyncio import AsyncSession
-
-from app import models, repository, services
-from app.db import get_async_db_session
-from app.models import InsufficientCreditScoreError
-from app.services import InvestorCreateDTO
+from collections.abc import AsyncIterator
+from decimal import Decimal
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import Field, TypeAdapter, ValidationError
+
+from app import models, queries, services
+from app.api.bulk import NDJSON_MEDIA_TYPE, bulk_response, read_bulk_rows
+from app.api.responses import (
+    NEXT_CURSOR_HEADER,
+    BorrowerResponse,
+    LoanResponse,
+    borrower_list,
+    loan_list,
+    serialized,
+)
+from app.config import Settings, get_settings
+from app.credit_scoring import CreditScoreQueue, get_credit_score_queue
+from app.models import CreditScorePendingError, InsufficientCreditScoreError
+from app.queries import Reader, get_reader
+from app.services import (
+    BulkBorrowerResultDTO,
+    CreateBorrowerDTO,
+    InvestorCreateDTO,
+    NotFoundError,
+)
+from app.unit_of_work import UnitOfWork, get_unit_of_work
 
 
 logger = logging.getLogger(__name__)
@@ -18,48 +40,72 @@ router = APIRouter(prefix="/v1")
 @router.post("/borrowers", status_code=201)
 async def create_borrower(
     payload: services.CreateBorrowerDTO,
-    session: AsyncSession = Depends(get_async_db_session),
+    uow: UnitOfWork = Depends(get_unit_of_work),
+    score_queue: CreditScoreQueue | None = Depends(get_credit_score_queue),
 ) -> dict:
-    logger.info(f"Received borrower creation request: {payload}")
-    borrower_repo = repository.SqlAlchemyBorrowerRepository(session)
     try:
-        logger.info("About to call create_borrower service")
-        borrower_id, credit_score = await services.create_borrower(
-            prospect_borrower=payload, borrower_repo=borrower_repo, session=session
+        borrower = await services.create_borrower(
+            prospect_borrower=payload,
+            uow=uow,
+            score_queue=score_queue,
+        )
+        logger.info(
+            "Created borrower %s",
+            borrower.id,
+            extra={
+                "borrower_id": borrower.id,
+                "credit_score_status": borrower.credit_score_status.value,
+            },
         )
-        logger.info(f"""Successfully created borrower with ID
-        {borrower_id} and credit score {credit_score}""")
         return {
-            "borrower_id": borrower_id,
-            "credit_score": credit_score,
+            "borrower_id": str(borrower.id),
+            "credit_score": borrower.credit_score,
+            "credit_score_status": borrower.credit_score_status.value,
             "message": "Borrower created successfully",
         }
     except Exception as e:
-        logger.error(f"Error creating borrower: {str(e)}", exc_info=True)
+        logger.error("Error creating borrower: %s", e, exc_info=True)
         raise HTTPException(status_code=400, detail=str(e)) from e
 
 
+@router.post("/borrowers/bulk", status_code=200)
+async def create_borrowers_bulk(
+    request: Request,
+    chunk_size: int | None = Query(default=None, ge=1, le=10_000),
+    uow: UnitOfWork = Depends(get_unit_of_work),
+    settings: Settings = Depends(get_settings),
+) -> dict:
+    """
+    Onboard many borrowers in one request.
+    Accepts either a JSON array or an NDJSON body (one borrower per line)
+    and returns a result for every row, in input order.
+    """
+    rows = read_bulk_rows(
+        request,
+        CreateBorrowerDTO,
+        BulkBorrowerResultDTO,
+        max_rows=settings.bulk_max_rows,
+        max_bytes=settings.bulk_max_bytes,
+    )
+    created = await services.create_borrowers_bulk(
+        prospect_borrowers=rows,
+        uow=uow,
+        chunk_size=chunk_size or settings.bulk_chunk_size,
+    )
+    return bulk_response(created, rows)
+
+
 @router.post("/loans/apply", status_code=201)
 async def apply(
     payload: services.LoanApplicationDTO,
-    session: AsyncSession = Depends(get_async_db_session),
+    uow: UnitOfWork = Depends(get_unit_of_work),
 ) -> dict:
-    borrower_repo = repository.SqlAlchemyBorrowerRepository(session)
-    borrower = await borrower_repo.get(payload.borrower_id)
-
-    if not borrower:
-        raise HTTPException(status_code=404, detail="Borrower not found")
-
-    loan_repo = repository.SqlAlchemyLoanRepository(session)
-    loan_object = models.Loan(
-        borrower=borrower,
-        amount=payload.amount,
-        term_months=payload.term_months,
-        purpose=payload.purpose,
-    )
-
     try:
-        loan_id = await services.apply_for_loan(loan_object, loan_repo, session)
+        loan_id = await services.apply_for_loan(payload, uow)
+    except NotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e)) from e
+    except CreditScorePendingError as e:
+        raise HTTPException(status_code=409, detail=str(e)) from e
     except InsufficientCreditScoreError as e:
         raise HTTPException(status_code=400, detail=str(e)) from e
     except Exception as e:
@@ -68,25 +114,113 @@ async def apply(
     return {"loan_id": loan_id, "message": "Loan applied successfully"}
 
 
-@router.get("/borrowers", status_code=200)
+@router.get("/loans", status_code=200, response_model=list[LoanResponse])
+async def get_marketplace_loans(
+    cursor: str | None = Query(default=None, description="Last loan cursor seen"),
+    limit: int = Query(default=50, ge=1, le=500),
+    min_amount: Decimal | None = Query(
+        default=None, ge=0, max_digits=10, decimal_places=2
+    ),
+    max_amount: Decimal | None = Query(
+        default=None, ge=0, max_digits=10, decimal_places=2
+    ),
+    min_term_months: int | None = Query(default=None, ge=1),
+    max_term_months: int | None = Query(default=None, ge=1),
+    read: Reader = Depends(get_reader),
+) -> Response:
+    """
+    Active loans investors can fund, ordered by amount.
+    When the page is full the cursor for the next one is returned in the
+    X-Next-Cursor header.
+    """
+    loans = await read(
+        queries.marketplace_page,
+        after=_parse_loan_cursor(cursor),
+        limit=limit,
+        min_amount=min_amount,
+        max_amount=max_amount,
+        min_term_months=min_term_months,
+        max_term_months=max_term_months,
+    )
+    headers = {}
+    if len(loans) == limit:
+        last = loans[-1]
+        headers[NEXT_CURSOR_HEADER] = f"{last['amount']}:{last['id']}"
+    return serialized(loan_list, loans, headers)
+
+
+# Finite and within the Numeric(10, 2) amount column
+_loan_amount = TypeAdapter(Annotated[Decimal, Field(max_digits=10, decimal_places=2)])
+
+
+def _parse_loan_cursor(cursor: str | None) -> tuple[Decimal, str] | None:
+    if cursor is None:
+        return None
+    amount, _, loan_id = cursor.partition(":")
+    try:
+        return _loan_amount.validate_python(amount), loan_id
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail="Invalid cursor") from e
+
+
+@router.get("/borrowers", status_code=200, response_model=list[BorrowerResponse])
 async def get_borrowers(
-    session: AsyncSession = Depends(get_async_db_session),
-) -> list[dict]:
-    borrower_repo = repository.SqlAlchemyBorrowerRepository(session)
+    request: Request,
+    cursor: str | None = Query(default=None, description="Last borrower id seen"),
+    limit: int = Query(default=100, ge=1, le=1000),
+    min_credit_score: int | None = Query(default=None, ge=0, le=1000),
+    max_credit_score: int | None = Query(default=None, ge=0, le=1000),
+    email: str | None = Query(default=None),
+    uow: UnitOfWork = Depends(get_unit_of_work),
+    read: Reader = Depends(get_reader),
+) -> Response:
+    """
+    List borrowers in id order, one page at a time.
+    When the page is full the cursor for the next one is returned in the
+    X-Next-Cursor header. Clients accepting application/x-ndjson get every
+    matching borrower instead, streamed one per line.
+    """
+    filters = services.BorrowerFilterDTO(
+        min_credit_score=min_credit_score,
+        max_credit_score=max_credit_score,
+        email=email,
+    )
+    if NDJSON_MEDIA_TYPE in request.headers.get("accept", ""):
+        return StreamingResponse(
+            _ndjson_lines(services.stream_borrowers(uow, filters, after_id=cursor)),
+            media_type=NDJSON_MEDIA_TYPE,
+        )
+
+    borrowers = await read(
+        queries.borrowers_page, after_id=cursor, limit=limit, **filters.model_dump()
+    )
+    headers = {}
+    if len(borrowers) == limit:
+        headers[NEXT_CURSOR_HEADER] = borrowers[-1]["id"]
+    return serialized(borrower_list, borrowers, headers)
 
+
+async def _ndjson_lines(batches: AsyncIterator[list[dict]]) -> AsyncIterator[str]:
+    async for rows in batches:
+        yield "".join(json.dumps(row) + "\n" for row in rows)
+
+
+@router.get("/borrowers/{borrower_id}", status_code=200)
+async def get_borrower(
+    borrower_id: str,
+    uow: UnitOfWork = Depends(get_unit_of_work),
+) -> dict:
     try:
-        borrowers = await services.get_borrowers(borrower_repo, session)
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e)) from e
-    return [borrower.to_dict() for borrower in borrowers]
+        borrower = await services.get_borrower(borrower_id, uow)
+    except NotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e)) from e
+    return borrower.to_dict()
 
 
 @router.post("/investors", status_code=201)
 async def create_investor_async(
-    payload: InvestorCreateDTO, session: AsyncSession = Depends(get_async_db_session)
+    payload: InvestorCreateDTO, uow: UnitOfWork = Depends(get_unit_of_work)
 ):
-    investor_repo = repository.SqlAlchemyInvestorRepository(session)
-
     investor = models.Investor(
         name=payload.name,
         email=payload.email,
@@ -94,8 +228,8 @@ async def create_investor_async(
     )
 
     try:
-        await services.create_investor(investor, investor_repo, session)
+        await services.create_investor(investor, uow)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e)) from e
 
-    return {"message": "Investor created successfully"}
+    return {"investor_id": investor.id, "message": "Investor created successfully"}
@@ -1,6 +1,11 @@
-from fastapi import APIRouter, Depends
+import time
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
 
 from app.config import Settings, get_settings
+from app.db import get_pool_saturation, get_pool_stats
+from app.metrics import Metrics, get_metrics
 
 
 router = APIRouter(prefix="/v1")
@@ -16,10 +21,51 @@ async def pong(settings: Settings = Depends(get_settings)):
         "status": "healthy",
         "environment": settings.environment,
         "testing": settings.testing,
-        "database_url": settings.database_url,
     }
 
 
+@router.get("/health/live")
+async def liveness():
+    """
+    Liveness: the process is up and its event loop answers. Never touches
+    the database, so a database outage does not get workers restarted.
+    """
+    return {"status": "alive"}
+
+
+@router.get("/health/ready")
+async def readiness(request: Request, settings: Settings = Depends(get_settings)):
+    """
+    Readiness: whether this worker should be sent traffic. Answers 503 when
+    the database probe fails or when the connection pool is nearly
+    exhausted, so the balancer sheds load before requests start queueing
+    for connections.
+    """
+    saturation = get_pool_saturation(request.app.state.db_engine)
+    saturated = (
+        saturation is not None and saturation >= settings.health_max_pool_saturation
+    )
+    # With a saturated pool a probe would only queue behind the requests
+    probe = None if saturated else await request.app.state.db_probe.check()
+    ready = probe is not None and probe.ok
+    body = {
+        "status": "ready" if ready else "not_ready",
+        "database": None
+        if probe is None
+        else {
+            "ok": probe.ok,
+            "latency_ms": round(probe.latency * 1000, 3),
+            "age_seconds": round(time.monotonic() - probe.checked_at, 3),
+            "error": probe.error,
+        },
+        "pool": {
+            "saturation": None if saturation is None else round(saturation, 3),
+            "max_saturation": settings.health_max_pool_saturation,
+        },
+    }
+    return JSONResponse(body, status_code=200 if ready else 503)
+
+
 @router.get("/version")
 async def version():
     """
@@ -32,3 +78,35 @@ async def version():
         "api_version": "v1",
         "semantic_version": {"major": 1, "minor": 0, "patch": 0},
     }
+
+
+@router.get("/db/pool")
+async def db_pool(request: Request):
+    """
+    Connection pool statistics for this worker process: pool size,
+    checked-out connections, overflow in use and time spent waiting
+    for a connection.
+    """
+    return get_pool_stats(request.app.state.db_engine)
+
+
+@router.get("/cache")
+async def cache_stats(request: Request):
+    """
+    Hit/miss statistics of the hot-row cache for this worker process.
+    """
+    cache = getattr(request.app.state, "cache", None)
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics(metrics: Metrics | None = Depends(get_metrics)):
+    """
+    Request latency, SQL statements per request and database time of this
+    worker process, in the Prometheus text format.
+    """
+    if metrics is None:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,92 @@
+# app/api/responses.py
+
+"""
+JSON rendering for the API.
+List endpoints serialize their rows with the precompiled pydantic-core
+serializers below, straight to bytes, instead of running jsonable_encoder
+over every row. The response class used for everything else is chosen by
+the json_response_class setting.
+"""
+
+import importlib.util
+import logging
+from datetime import datetime
+
+from fastapi.responses import JSONResponse, ORJSONResponse, Response, UJSONResponse
+from pydantic import TypeAdapter
+from typing_extensions import TypedDict
+
+from app.models import CreditScoreStatus, InvestmentStatus, LoanStatus
+
+
+logger = logging.getLogger(__name__)
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class BorrowerResponse(TypedDict):
+    id: str
+    name: str
+    email: str
+    credit_score: int | None
+    credit_score_status: CreditScoreStatus
+
+
+class LoanResponse(TypedDict):
+    id: str
+    amount: float
+    purpose: str
+    term_months: int
+    status: LoanStatus
+    created_at: datetime | None
+
+
+class InvestmentResponse(TypedDict):
+    id: str
+    investor_id: str
+    loan_id: str
+    amount: float
+    repaid_total: float
+    remaining_amount: float
+    status: InvestmentStatus
+    created_at: datetime | None
+
+
+# Built once at import; dump_json runs entirely in pydantic-core
+borrower_list = TypeAdapter(list[BorrowerResponse])
+loan_list = TypeAdapter(list[LoanResponse])
+investment_list = TypeAdapter(list[InvestmentResponse])
+
+
+def serialized(
+    adapter: TypeAdapter, content, headers: dict[str, str] | None = None
+) -> Response:
+    return Response(
+        adapter.dump_json(content), media_type="application/json", headers=headers
+    )
+
+
+# Renderers for responses that go through jsonable_encoder, by setting value,
+# with the module they need
+RESPONSE_CLASSES = {
+    "orjson": (ORJSONResponse, "orjson"),
+    "ujson": (UJSONResponse, "ujson"),
+    "json": (JSONResponse, None),
+}
+
+
+def get_response_class(name: str) -> type[JSONResponse]:
+    """
+    Response class for the json_response_class setting. "auto" picks the
+    fastest renderer installed; a renderer whose library is missing falls
+    back to the standard library one.
+    """
+    if name == "auto":
+        for response_class, module in RESPONSE_CLASSES.values():
+            if module is None or importlib.util.find_spec(module):
+                return response_class
+    response_class, module = RESPONSE_CLASSES[name]
+    if module is not None and not importlib.util.find_spec(module):
+        logger.warning("%s is not installed, rendering JSON with json", module)
+        return JSONResponse
+    return response_class
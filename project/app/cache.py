@@ -0,0 +1,111 @@
+# app/cache.py
+
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Protocol
+
+from fastapi import FastAPI
+
+from app.config import Settings
+
+
+class CacheBackend(Protocol):
+    """
+    Read-through cache used by the repositories for hot rows.
+    Values are plain row dicts. The in-process implementation below is the
+    default; a shared backend (Redis, Memcached...) only needs to provide
+    these methods and serialize the dicts.
+    """
+
+    async def get(self, key: str) -> dict | None: ...
+
+    async def set(self, key: str, value: dict) -> None: ...
+
+    async def delete(self, *keys: str) -> None: ...
+
+    def stats(self) -> dict: ...
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    invalidations: int = 0
+
+    def as_dict(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+
+
+class InMemoryCache:
+    """
+    Per-process LRU cache whose entries also expire after ttl seconds, which
+    bounds how stale a row can get when another process changes it.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 10_000,
+        ttl: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self.counters = CacheStats()
+        self._entries: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+
+    async def get(self, key: str) -> dict | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.counters.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at <= self.clock():
+            del self._entries[key]
+            self.counters.expirations += 1
+            self.counters.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.counters.hits += 1
+        return value
+
+    async def set(self, key: str, value: dict) -> None:
+        self._entries[key] = (self.clock() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.counters.evictions += 1
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            if self._entries.pop(key, None) is not None:
+                self.counters.invalidations += 1
+
+    def stats(self) -> dict:
+        return {
+            "backend": "memory",
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            **self.counters.as_dict(),
+        }
+
+
+def init_cache(app: FastAPI, settings: Settings) -> None:
+    app.state.cache = None
+    if settings.cache_enabled:
+        app.state.cache = InMemoryCache(
+            max_entries=settings.cache_max_entries, ttl=settings.cache_ttl
+        )
@@ -0,0 +1,158 @@
+# app/cli.py
+"""
+Operational commands, run from the project directory:
+
+    python -m app.cli loan-counts check
+    python -m app.cli loan-counts rebuild [--borrower-id ID ...]
+    python -m app.cli analytics rebuild
+    python -m app.cli rescore [--workers N] [--chunk-size N] [--restart]
+    python -m app.cli idempotency purge
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.config import get_db_url
+from app.idempotency import utcnow
+from app.repository import (
+    SqlAlchemyAnalyticsRepository,
+    SqlAlchemyIdempotencyRepository,
+    SqlAlchemyLoanRepository,
+)
+from app.rescoring import BorrowerRescoringJob, RescoreProgress
+
+
+logger = logging.getLogger(__name__)
+
+
+async def loan_counts(
+    args: argparse.Namespace, session_maker: async_sessionmaker[AsyncSession]
+) -> int:
+    async with session_maker() as session:
+        repo = SqlAlchemyLoanRepository(session)
+        if args.action == "check":
+            drift = await repo.find_loan_count_drift()
+            for borrower_id in drift:
+                print(f"drift: borrower {borrower_id}")
+            print(f"{len(drift)} borrowers with drifted loan counts")
+            return 1 if drift else 0
+
+        await repo.rebuild_loan_counts(args.borrower_id)
+        await session.commit()
+    print("Loan counts rebuilt")
+    return 0
+
+
+async def analytics(
+    args: argparse.Namespace, session_maker: async_sessionmaker[AsyncSession]
+) -> int:
+    async with session_maker() as session:
+        await SqlAlchemyAnalyticsRepository(session).rebuild()
+        await session.commit()
+    print("Analytics aggregates rebuilt")
+    return 0
+
+
+async def idempotency(
+    args: argparse.Namespace, session_maker: async_sessionmaker[AsyncSession]
+) -> int:
+    async with session_maker() as session:
+        deleted = await SqlAlchemyIdempotencyRepository(session).delete_expired(
+            utcnow()
+        )
+        await session.commit()
+    print(f"{deleted} expired idempotency keys deleted")
+    return 0
+
+
+def print_progress(progress: RescoreProgress) -> None:
+    print(
+        f"{progress.scanned:,} borrowers rescored, {progress.updated:,} changed, "
+        f"{progress.rows_per_second:,.0f} rows/s"
+    )
+
+
+async def rescore(
+    args: argparse.Namespace, session_maker: async_sessionmaker[AsyncSession]
+) -> int:
+    job = BorrowerRescoringJob(
+        session_maker,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        on_progress=print_progress,
+    )
+    progress = await job.run(restart=args.restart)
+    if progress.resumed_after is not None:
+        print(f"Resumed after borrower {progress.resumed_after}")
+    print(f"Rescoring finished in {progress.elapsed:.1f}s")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    counts = commands.add_parser(
+        "loan-counts", help="Check or rebuild the maintained per-borrower loan counts"
+    )
+    counts.add_argument("action", choices=["check", "rebuild"])
+    counts.add_argument(
+        "--borrower-id",
+        action="append",
+        help="Only rebuild these borrowers (repeatable); defaults to everyone",
+    )
+    counts.set_defaults(handler=loan_counts)
+
+    rollup = commands.add_parser(
+        "analytics",
+        help="Recompute the loan status totals and investor exposure aggregates",
+    )
+    rollup.add_argument("action", choices=["rebuild"])
+    rollup.set_defaults(handler=analytics)
+
+    rescoring = commands.add_parser(
+        "rescore",
+        help="Recalculate every credit score with the current formula, resuming "
+        "an interrupted run from its checkpoint",
+    )
+    rescoring.add_argument("--workers", type=int, default=4)
+    rescoring.add_argument("--chunk-size", type=int, default=1000)
+    rescoring.add_argument(
+        "--restart",
+        action="store_true",
+        help="Ignore the checkpoint of an interrupted run and start over",
+    )
+    rescoring.set_defaults(handler=rescore)
+
+    keys = commands.add_parser(
+        "idempotency", help="Delete expired idempotency keys and their responses"
+    )
+    keys.add_argument("action", choices=["purge"])
+    keys.set_defaults(handler=idempotency)
+    return parser
+
+
+async def run(args: argparse.Namespace) -> int:
+    # Room for the rescoring workers, the reader and checkpoint writes
+    engine = create_async_engine(
+        get_db_url(), pool_size=max(5, getattr(args, "workers", 0) + 2)
+    )
+    session_maker = async_sessionmaker(engine, class_=AsyncSession)
+    try:
+        return await args.handler(args, session_maker)
+    finally:
+        await engine.dispose()
+
+
+def main(argv: list[str] | None = None) -> int:
+    logging.basicConfig(level=logging.WARNING)
+    args = build_parser().parse_args(argv)
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,6 +2,7 @@
 import logging
 import os
 from functools import lru_cache
+from typing import Literal
 from urllib.parse import urlparse, urlunparse
 
 from pydantic import AnyUrl
@@ -15,6 +16,48 @@ class Settings(BaseSettings):
     environment: str = "dev"
     testing: bool = 0
     database_url: AnyUrl = None
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30.0
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+    db_statement_cache_size: int = 100
+    db_create_all: bool = True
+    bulk_chunk_size: int = 1000
+    # Bulk endpoints stop reading a payload after this many rows or bytes
+    bulk_max_rows: int = 100_000
+    bulk_max_bytes: int = 64 * 1024 * 1024
+    credit_score_async: bool = True
+    credit_score_workers: int = 2
+    credit_score_batch_size: int = 100
+    credit_score_max_retries: int = 3
+    credit_score_retry_backoff: float = 0.5
+    cache_enabled: bool = True
+    cache_max_entries: int = 10_000
+    cache_ttl: float = 30.0
+    json_response_class: Literal["auto", "orjson", "ujson", "json"] = "auto"
+    metrics_enabled: bool = True
+    # Statements taking at least this many seconds are logged
+    slow_query_threshold: float = 0.5
+    # Readiness: how long a database probe result is reused, how long the
+    # probe may take, and the share of pool connections in use above which
+    # the worker reports itself as not ready
+    health_probe_ttl: float = 2.0
+    health_probe_timeout: float = 1.0
+    health_max_pool_saturation: float = 0.9
+    # text or json, one object per line
+    log_format: str = "text"
+    log_level: str = "INFO"
+    # Levels of individual loggers, e.g. {"app.helper": "DEBUG"}
+    log_levels: dict[str, str] = {}
+    # Share of the records below WARNING kept per logger, e.g. {"app.api": 0.01}
+    log_sample_rates: dict[str, float] = {}
+    idempotency_enabled: bool = True
+    # How long a response is replayed for an Idempotency-Key, and how long a
+    # request that never finished keeps its key reserved
+    idempotency_ttl: float = 86_400.0
+    idempotency_lock_timeout: float = 60.0
+    idempotency_cache_max_entries: int = 10_000
 
 
 @lru_cache
@@ -48,9 +91,12 @@ def get_db_url() -> str:
 
     # Parse the URL
     parsed = urlparse(db_url)
-    log.info(f"Database URL scheme: {parsed.scheme}")
-    log.info(f"Database URL netloc: {parsed.netloc}")
-    log.info(f"Database URL path: {parsed.path}")
+    log.debug(
+        "Database URL scheme %s, host %s, path %s",
+        parsed.scheme,
+        parsed.hostname,
+        parsed.path,
+    )
 
     # Keep postgresql:// as is, SQLAlchemy knows how to handle it
     return urlunparse(parsed)
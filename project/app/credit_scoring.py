@@ -0,0 +1,225 @@
+# app/credit_scoring.py
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Protocol
+
+from fastapi import FastAPI, Request
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.cache import CacheBackend
+from app.config import Settings
+from app.helper import calculate_credit_scores
+from app.unit_of_work import SqlAlchemyUnitOfWork
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class CreditScoreRequest:
+    borrower_id: str
+    attempt: int = 0
+
+
+class CreditScoreQueue(Protocol):
+    """
+    Transport for credit score requests.
+    The in-process implementation below is the default; a broker-backed
+    queue (RabbitMQ, Kafka, SQS...) only needs to provide these methods.
+    """
+
+    async def publish(self, request: CreditScoreRequest) -> None: ...
+
+    async def consume(self, max_items: int) -> list[CreditScoreRequest]: ...
+
+    async def ack(self, requests: list[CreditScoreRequest]) -> None: ...
+
+
+class InMemoryCreditScoreQueue:
+    def __init__(self, maxsize: int = 0):
+        self._queue: asyncio.Queue[CreditScoreRequest] = asyncio.Queue(maxsize)
+
+    async def publish(self, request: CreditScoreRequest) -> None:
+        await self._queue.put(request)
+
+    async def consume(self, max_items: int) -> list[CreditScoreRequest]:
+        """
+        Wait for at least one request, then drain whatever else is already
+        queued (up to max_items) so workers score in micro-batches.
+        """
+        batch = [await self._queue.get()]
+        while len(batch) < max_items and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def ack(self, requests: list[CreditScoreRequest]) -> None:
+        for _ in requests:
+            self._queue.task_done()
+
+    async def join(self) -> None:
+        await self._queue.join()
+
+
+class CreditScoreWorkerPool:
+    """
+    Background workers that score pending borrowers in micro-batches.
+    Failed batches are re-published with exponential backoff. Requests
+    still failing after max_retries are scored one at a time, so only the
+    borrowers that fail on their own are marked as FAILED.
+    """
+
+    def __init__(
+        self,
+        queue: CreditScoreQueue,
+        session_maker: async_sessionmaker[AsyncSession],
+        workers: int = 2,
+        batch_size: int = 100,
+        max_retries: int = 3,
+        retry_backoff: float = 0.5,
+        cache: CacheBackend | None = None,
+    ):
+        self.queue = queue
+        self.session_maker = session_maker
+        self.cache = cache
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self._tasks: set[asyncio.Task] = set()
+
+    def start(self) -> None:
+        for _ in range(self.workers):
+            self._spawn(self._run())
+
+    async def stop(self) -> None:
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def enqueue_pending(self) -> int:
+        """
+        Re-publish every borrower still waiting for a score, e.g. requests
+        lost by an in-process queue when the previous worker stopped.
+        """
+        async with self._unit_of_work() as uow:
+            borrower_ids = await uow.borrowers.list_pending_credit_score_ids()
+        for borrower_id in borrower_ids:
+            await self.queue.publish(CreditScoreRequest(borrower_id=borrower_id))
+        return len(borrower_ids)
+
+    async def process(self, batch: list[CreditScoreRequest]) -> None:
+        borrower_ids = list({request.borrower_id for request in batch})
+        async with self._unit_of_work() as uow:
+            rows = await uow.borrowers.get_scoring_inputs(borrower_ids)
+            if not rows:
+                return
+            ids, incomes, employment_years, has_previous_loans = zip(*rows)
+            credit_scores = calculate_credit_scores(
+                incomes, employment_years, has_previous_loans
+            )
+            await uow.borrowers.update_credit_scores(dict(zip(ids, credit_scores)))
+            await uow.commit()
+        logger.info("Scored %d borrowers", len(ids))
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self.queue.consume(self.batch_size)
+            try:
+                await self.process(batch)
+            except Exception:
+                logger.exception("Credit score batch of %d failed", len(batch))
+                await self._retry(batch)
+            finally:
+                await self.queue.ack(batch)
+
+    async def _retry(self, batch: list[CreditScoreRequest]) -> None:
+        exhausted = []
+        for request in batch:
+            if request.attempt >= self.max_retries:
+                exhausted.append(request)
+                continue
+            delay = self.retry_backoff * 2**request.attempt
+            retry = CreditScoreRequest(request.borrower_id, request.attempt + 1)
+            self._spawn(self._publish_later(retry, delay))
+        if exhausted and len(batch) > 1:
+            # They may only have failed along with another borrower
+            exhausted = await self._process_alone(exhausted)
+        if exhausted:
+            await self._mark_failed([request.borrower_id for request in exhausted])
+
+    async def _process_alone(
+        self, requests: list[CreditScoreRequest]
+    ) -> list[CreditScoreRequest]:
+        """
+        Score each request in its own transaction and return the failing ones.
+        """
+        failed = []
+        for request in requests:
+            try:
+                await self.process([request])
+            except Exception:
+                logger.exception("Credit score for %s failed", request.borrower_id)
+                failed.append(request)
+        return failed
+
+    async def _publish_later(self, request: CreditScoreRequest, delay: float) -> None:
+        await asyncio.sleep(delay)
+        await self.queue.publish(request)
+
+    async def _mark_failed(self, borrower_ids: list[str]) -> None:
+        logger.error("Giving up on credit score for %d borrowers", len(borrower_ids))
+        try:
+            async with self._unit_of_work() as uow:
+                await uow.borrowers.mark_credit_score_failed(borrower_ids)
+                await uow.commit()
+        except Exception:
+            logger.exception("Could not mark credit scores as failed")
+
+    def _unit_of_work(self) -> SqlAlchemyUnitOfWork:
+        return SqlAlchemyUnitOfWork(self.session_maker, self.cache)
+
+    def _spawn(self, coro) -> None:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+
+async def start_credit_scoring(app: FastAPI, settings: Settings) -> None:
+    app.state.credit_score_queue = None
+    app.state.credit_score_workers = None
+    if not settings.credit_score_async:
+        logger.info("Credit scores are calculated inline")
+        return
+
+    queue = InMemoryCreditScoreQueue()
+    pool = CreditScoreWorkerPool(
+        queue,
+        app.state.async_db_session,
+        workers=settings.credit_score_workers,
+        batch_size=settings.credit_score_batch_size,
+        max_retries=settings.credit_score_max_retries,
+        retry_backoff=settings.credit_score_retry_backoff,
+        cache=getattr(app.state, "cache", None),
+    )
+    pool.start()
+    app.state.credit_score_queue = queue
+    app.state.credit_score_workers = pool
+    requeued = await pool.enqueue_pending()
+    logger.info(
+        "Started %d credit score workers (%d pending borrowers re-queued)",
+        settings.credit_score_workers,
+        requeued,
+    )
+
+
+async def stop_credit_scoring(app: FastAPI) -> None:
+    pool = getattr(app.state, "credit_score_workers", None)
+    if pool is not None:
+        await pool.stop()
+
+
+def get_credit_score_queue(request: Request) -> CreditScoreQueue | None:
+    return getattr(request.app.state, "credit_score_queue", None)
@@ -1,37 +1,207 @@
 # project/app/db.py
 
 
+import asyncio
 import logging
+import time
+from dataclasses import dataclass
 
-from fastapi import FastAPI, Request
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from fastapi import FastAPI
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 
-from .config import get_db_url
+from .config import Settings, get_db_url, get_settings
+from .metrics import instrument_engine
 from .orm import metadata
 
 
 log = logging.getLogger("uvicorn")
 
 
+@dataclass
+class PoolWaitStats:
+    checkouts: int = 0
+    timeouts: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+
+    def record(self, wait: float) -> None:
+        self.checkouts += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+
+    def as_dict(self) -> dict:
+        return {
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "wait_seconds_total": round(self.total_wait, 6),
+            "wait_seconds_max": round(self.max_wait, 6),
+            "wait_seconds_avg": round(self.total_wait / self.checkouts, 6)
+            if self.checkouts
+            else 0.0,
+        }
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """
+    Queue pool that records how long callers wait for a connection, so the
+    pool can be sized against real load.
+    """
+
+    def __init__(self, *args, **kw):
+        super().__init__(*args, **kw)
+        self.max_overflow_limit = kw.get("max_overflow", 10)
+        self.wait_stats = PoolWaitStats()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            self.wait_stats.timeouts += 1
+            raise
+        finally:
+            self.wait_stats.record(time.perf_counter() - start)
+
+
+def create_engine(db_url: str, settings: Settings) -> AsyncEngine:
+    if db_url.startswith("sqlite"):
+        # SQLite picks its own pool; sizing options do not apply
+        return create_async_engine(db_url)
+
+    connect_args = {}
+    if "asyncpg" in db_url:
+        connect_args["prepared_statement_cache_size"] = settings.db_statement_cache_size
+    return create_async_engine(
+        db_url,
+        poolclass=InstrumentedAsyncQueuePool,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=settings.db_pool_pre_ping,
+        connect_args=connect_args,
+    )
+
+
 async def init_db(app: FastAPI) -> None:
+    settings = get_settings()
     db_url = get_db_url()
-    log.info(f"Creating async engine with URL: {db_url}")
-    engine = create_async_engine(db_url)
+    engine = create_engine(db_url, settings)
+    # The URL renders with the password masked
+    log.info("Created async engine for %s", engine.url)
+    metrics = getattr(app.state, "metrics", None)
+    if metrics is not None:
+        instrument_engine(engine, metrics)
 
-    async with engine.begin() as conn:
-        await conn.run_sync(metadata.create_all)
-    # metadata.create_all(engine)
+    if settings.db_create_all:
+        async with engine.begin() as conn:
+            await conn.run_sync(metadata.create_all)
     async_db_session = async_sessionmaker(
         engine, class_=AsyncSession, expire_on_commit=False
     )
-    # Add session to app state
+    # Add engine and session to app state
+    app.state.db_engine = engine
     app.state.async_db_session = async_db_session
+    app.state.db_probe = DatabaseProbe(
+        engine, settings.health_probe_ttl, settings.health_probe_timeout
+    )
+
+
+async def close_db(app: FastAPI) -> None:
+    engine = getattr(app.state, "db_engine", None)
+    if engine is not None:
+        log.info("Disposing async engine")
+        await engine.dispose()
+
+
+def get_pool_stats(engine: AsyncEngine) -> dict:
+    pool = engine.pool
+    stats = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+        )
+    if isinstance(pool, InstrumentedAsyncQueuePool):
+        stats["max_overflow"] = pool.max_overflow_limit
+        stats.update(pool.wait_stats.as_dict())
+    return stats
+
+
+def get_pool_saturation(engine: AsyncEngine) -> float | None:
+    """
+    Share of the connections the pool can hand out that are checked out,
+    overflow included; None for pools without a limit.
+    """
+    pool = engine.pool
+    if not isinstance(pool, InstrumentedAsyncQueuePool):
+        return None
+    if pool.max_overflow_limit < 0:
+        # Unlimited overflow, the pool never runs out of connections
+        return None
+    capacity = pool.size() + pool.max_overflow_limit
+    return pool.checkedout() / capacity if capacity else 1.0
+
+
+@dataclass(frozen=True)
+class ProbeResult:
+    ok: bool
+    latency: float
+    checked_at: float
+    error: str | None = None
+
+
+class DatabaseProbe:
+    """
+    Round trip to the database for readiness checks.
+    A result is reused for ttl seconds and concurrent checks share one
+    probe, so however often the balancer asks, a worker sends at most one
+    SELECT 1 per ttl. The probe gives up after timeout seconds, which
+    includes waiting for a pool connection.
+    """
+
+    def __init__(self, engine: AsyncEngine, ttl: float = 2.0, timeout: float = 1.0):
+        self.engine = engine
+        self.ttl = ttl
+        self.timeout = timeout
+        self._result: ProbeResult | None = None
+        self._lock = asyncio.Lock()
+
+    async def check(self) -> ProbeResult:
+        if self._fresh():
+            return self._result
+        async with self._lock:
+            # Another check may have probed while this one waited
+            if not self._fresh():
+                self._result = await self._probe()
+        return self._result
 
+    def _fresh(self) -> bool:
+        return (
+            self._result is not None
+            and time.monotonic() - self._result.checked_at < self.ttl
+        )
 
-async def get_async_db_session(request: Request) -> AsyncSession:
-    session_maker = request.app.state.async_db_session
-    session = session_maker()
-    try:
-        yield session
-    finally:
-        await session.close()
+    async def _probe(self) -> ProbeResult:
+        start = time.perf_counter()
+        try:
+            async with asyncio.timeout(self.timeout):
+                async with self.engine.connect() as conn:
+                    await conn.execute(text("SELECT 1"))
+        except Exception as e:
+            log.warning("Database probe failed: %r", e)
+            error = "timed out" if isinstance(e, TimeoutError) else type(e).__name__
+            return ProbeResult(
+                False, time.perf_counter() - start, time.monotonic(), error
+            )
+        return ProbeResult(True, time.perf_counter() - start, time.monotonic())
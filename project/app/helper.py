@@ -1,6 +1,13 @@
 # app/helper.py
 
 import logging
+from collections.abc import Iterable
+
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is an optional extra
+    np = None
 
 
 logger = logging.getLogger(__name__)
@@ -14,9 +21,6 @@ def calculate_credit_score(
     This is a simplified version that could be replaced with a more sophisticated
     scoring system or external service in the future.
     """
-    logger.info(f"""Calculating credit score for income={income},
-    employment_years={employment_years},
-    has_previous_loans={has_previous_loans}""")
     base_score = 500
     # Income factor (0-100 points)
     income_score = min(income // 1000, 200)
@@ -25,5 +29,53 @@ def calculate_credit_score(
     # Previous loans factor (-50 to 0 points)
     previous_loans_score = -50 if has_previous_loans else 0
     final_score = base_score + income_score + employment_score + previous_loans_score
-    logger.info(f"Calculated credit score: {final_score}")
+    logger.debug(
+        "Credit score %d for income=%d employment_years=%d has_previous_loans=%s",
+        final_score,
+        income,
+        employment_years,
+        has_previous_loans,
+    )
     return final_score
+
+
+def calculate_credit_scores(
+    incomes: Iterable[int],
+    employment_years: Iterable[int],
+    has_previous_loans: Iterable[bool],
+):
+    """
+    Batch version of calculate_credit_score, used for bulk onboarding and
+    rescoring. Applies the same formula to parallel columns without any
+    per-row logging.
+    NumPy arrays are scored in a single vectorized pass and return an int64
+    array; any other iterable (lists, array.array columns) returns a list.
+    """
+    if np is not None and any(
+        isinstance(column, np.ndarray)
+        for column in (incomes, employment_years, has_previous_loans)
+    ):
+        return _calculate_credit_scores_numpy(
+            incomes, employment_years, has_previous_loans
+        )
+    return [
+        500
+        + (income_score if (income_score := income // 1000) < 200 else 200)
+        + (employment_score if (employment_score := years * 10) < 50 else 50)
+        - (50 if previous else 0)
+        for income, years, previous in zip(
+            incomes, employment_years, has_previous_loans
+        )
+    ]
+
+
+def _calculate_credit_scores_numpy(incomes, employment_years, has_previous_loans):
+    incomes = np.asarray(incomes, dtype=np.int64)
+    employment_years = np.asarray(employment_years, dtype=np.int64)
+    has_previous_loans = np.asarray(has_previous_loans, dtype=bool)
+
+    scores = np.minimum(incomes // 1000, 200)
+    scores += np.minimum(employment_years * 10, 50)
+    scores -= has_previous_loans * 50
+    scores += 500
+    return scores
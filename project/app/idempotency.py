@@ -0,0 +1,291 @@
+# app/idempotency.py
+
+"""
+Idempotency-Key support for the POST endpoints clients retry on timeouts.
+The first request with a key reserves it, runs, and stores its successful
+response; a retry with the same key gets that response back without
+reaching the endpoint. Stored responses are kept in the database for the
+TTL and in a per-process LRU, so a replay costs at most one primary key
+lookup and usually none.
+
+A retry arriving while the first request still runs gets 409, a key
+reused for a different request 422. Failed requests release their key so
+they can be retried.
+"""
+
+import hashlib
+import logging
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from datetime import UTC, datetime, timedelta
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, Response
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.cache import InMemoryCache
+from app.config import Settings
+from app.repository import SqlAlchemyIdempotencyRepository
+
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = b"idempotency-key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+IDEMPOTENT_ROUTES = frozenset(
+    {
+        ("POST", "/v1/borrowers"),
+        ("POST", "/v1/loans/apply"),
+        ("POST", "/v1/investors"),
+    }
+)
+
+
+def utcnow() -> datetime:
+    # Timestamps are stored naive, in UTC
+    return datetime.now(UTC).replace(tzinfo=None)
+
+
+@dataclass(frozen=True, slots=True)
+class StoredResponse:
+    fingerprint: str
+    # None while the request holding the key is still running
+    status_code: int | None
+    content_type: str | None
+    body: str | None
+    expires_at: datetime
+
+
+class IdempotencyStore:
+    """
+    Stored responses by key: the LRU in front of the idempotency_keys table.
+    Only finished responses are cached in memory, as they never change.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 86_400.0,
+        lock_timeout: float = 60.0,
+        cache_max_entries: int = 10_000,
+        clock: Callable[[], datetime] = utcnow,
+    ):
+        self.ttl = timedelta(seconds=ttl)
+        self.lock_timeout = timedelta(seconds=lock_timeout)
+        self.clock = clock
+        self.cache = InMemoryCache(max_entries=cache_max_entries, ttl=ttl)
+
+    async def lookup(
+        self, session_maker: async_sessionmaker[AsyncSession], key: str
+    ) -> StoredResponse | None:
+        cached = await self.cache.get(key)
+        if cached is not None:
+            return StoredResponse(**cached)
+        async with session_maker() as session:
+            row = await SqlAlchemyIdempotencyRepository(session).get(key)
+        if row is None or row.expires_at <= self.clock():
+            return None
+        stored = StoredResponse(**row._mapping)
+        if stored.status_code is not None:
+            await self.cache.set(key, asdict(stored))
+        return stored
+
+    async def reserve(
+        self,
+        session_maker: async_sessionmaker[AsyncSession],
+        key: str,
+        fingerprint: str,
+    ) -> bool:
+        """
+        Claim the key for a request about to run. A request that never
+        finishes holds it for the lock timeout.
+        """
+        now = self.clock()
+        async with session_maker() as session:
+            reserved = await SqlAlchemyIdempotencyRepository(session).reserve(
+                key, fingerprint, now, now + self.lock_timeout
+            )
+            await session.commit()
+        return reserved
+
+    async def complete(
+        self,
+        session_maker: async_sessionmaker[AsyncSession],
+        key: str,
+        fingerprint: str,
+        status_code: int,
+        content_type: str | None,
+        body: str,
+    ) -> None:
+        response = StoredResponse(
+            fingerprint, status_code, content_type, body, self.clock() + self.ttl
+        )
+        async with session_maker() as session:
+            await SqlAlchemyIdempotencyRepository(session).complete(
+                key,
+                response.status_code,
+                response.content_type,
+                response.body,
+                response.expires_at,
+            )
+            await session.commit()
+        await self.cache.set(key, asdict(response))
+
+    async def release(
+        self, session_maker: async_sessionmaker[AsyncSession], key: str
+    ) -> None:
+        async with session_maker() as session:
+            await SqlAlchemyIdempotencyRepository(session).release(key)
+            await session.commit()
+
+
+def request_fingerprint(scope, body: bytes) -> str:
+    digest = hashlib.sha256()
+    for part in (
+        scope["method"].encode(),
+        scope["path"].encode(),
+        scope["query_string"],
+    ):
+        digest.update(part + b"\0")
+    digest.update(body)
+    return digest.hexdigest()
+
+
+def _header(headers: list[tuple[bytes, bytes]], name: bytes) -> str | None:
+    for key, value in headers:
+        if key.lower() == name:
+            return value.decode("latin-1")
+    return None
+
+
+async def _read_body(receive) -> tuple[bytes, Callable]:
+    """
+    Read the whole request body, and return it with a receive callable
+    that hands it to the application again.
+    """
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body"):
+            break
+    body = b"".join(chunks)
+    replayed = False
+
+    async def replay():
+        nonlocal replayed
+        if replayed:
+            return await receive()
+        replayed = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    return body, replay
+
+
+class IdempotencyMiddleware:
+    """
+    Replays stored responses for the idempotent routes. Plain ASGI, like
+    the metrics middleware, and installed outside it: replays never reach
+    the application, so the per-route metrics only count requests that ran.
+    """
+
+    def __init__(self, app, store: IdempotencyStore):
+        self.app = app
+        self.store = store
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or (scope["method"], scope["path"]) not in IDEMPOTENT_ROUTES
+        ):
+            await self.app(scope, receive, send)
+            return
+        key = _header(scope["headers"], IDEMPOTENCY_HEADER)
+        if key is None:
+            await self.app(scope, receive, send)
+            return
+        if not key or len(key) > MAX_KEY_LENGTH:
+            response = JSONResponse(
+                {"detail": f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters"},
+                status_code=422,
+            )
+            await response(scope, receive, send)
+            return
+
+        body, receive = await _read_body(receive)
+        fingerprint = request_fingerprint(scope, body)
+        session_maker = scope["app"].state.async_db_session
+        stored = await self.store.lookup(session_maker, key)
+        if stored is None:
+            if await self.store.reserve(session_maker, key, fingerprint):
+                await self._run(session_maker, key, fingerprint, scope, receive, send)
+                return
+            # Claimed by a concurrent request since the lookup
+            stored = await self.store.lookup(session_maker, key)
+        await self._replay(stored, fingerprint)(scope, receive, send)
+
+    def _replay(self, stored: StoredResponse | None, fingerprint: str) -> Response:
+        if stored is not None and stored.fingerprint != fingerprint:
+            return JSONResponse(
+                {"detail": "Idempotency-Key was already used for a different request"},
+                status_code=422,
+            )
+        if stored is None or stored.status_code is None:
+            return JSONResponse(
+                {"detail": "A request with this Idempotency-Key is in progress"},
+                status_code=409,
+            )
+        return Response(
+            stored.body,
+            status_code=stored.status_code,
+            media_type=stored.content_type,
+            headers={REPLAYED_HEADER: "true"},
+        )
+
+    async def _run(self, session_maker, key, fingerprint, scope, receive, send):
+        status = 500
+        content_type = None
+        chunks = []
+
+        async def capture(message):
+            nonlocal status, content_type
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                content_type = _header(message.get("headers", []), b"content-type")
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, capture)
+        except BaseException:
+            await self.store.release(session_maker, key)
+            raise
+        # The client already has its response; failing to store it only
+        # means retries get 409 until the reservation times out
+        try:
+            if 200 <= status < 300:
+                await self.store.complete(
+                    session_maker,
+                    key,
+                    fingerprint,
+                    status,
+                    content_type,
+                    b"".join(chunks).decode(),
+                )
+            else:
+                await self.store.release(session_maker, key)
+        except Exception:
+            logger.exception("Could not store the response for an idempotency key")
+
+
+def init_idempotency(app: FastAPI, settings: Settings) -> None:
+    app.state.idempotency = None
+    if not settings.idempotency_enabled:
+        return
+    app.state.idempotency = IdempotencyStore(
+        ttl=settings.idempotency_ttl,
+        lock_timeout=settings.idempotency_lock_timeout,
+        cache_max_entries=settings.idempotency_cache_max_entries,
+    )
+    app.add_middleware(IdempotencyMiddleware, store=app.state.idempotency)
@@ -0,0 +1,161 @@
+# app/logs.py
+
+"""
+Logging for the application process.
+Records are handed to a queue and written by a background thread, so a
+slow terminal or log collector never blocks the event loop. Output is
+plain text or one JSON object per line, levels can be set per logger, and
+chatty loggers can be sampled, keeping only a share of their records
+below WARNING.
+
+Messages use %-style arguments rather than f-strings: records that are
+filtered out by level are never formatted.
+"""
+
+import atexit
+import json
+import logging
+import queue
+from datetime import UTC, datetime
+from logging.handlers import QueueHandler, QueueListener
+
+from app.config import Settings
+
+
+# Attributes every LogRecord has; anything else was passed with extra=
+_RECORD_ATTRIBUTES = frozenset(
+    vars(logging.LogRecord("", 0, "", 0, "", (), None)).keys()
+) | {"message", "asctime", "taskName"}
+# uvicorn's loggers write to their own handlers unless told otherwise
+_SERVER_LOGGERS = ("uvicorn", "uvicorn.error", "uvicorn.access")
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per record: timestamp, level, logger and message, any
+    fields passed with extra=, and the formatted exception if there is one.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, UTC).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update(
+            (key, value)
+            for key, value in vars(record).items()
+            if key not in _RECORD_ATTRIBUTES
+        )
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps the given share of the records of each sampled logger and its
+    children, evenly spaced, e.g. one in a hundred at 0.01. Records of
+    WARNING and above and records of other loggers always pass.
+    """
+
+    def __init__(self, rates: dict[str, float]):
+        super().__init__()
+        self.rates = rates
+        self._credit = dict.fromkeys(rates, 0.0)
+        # Logger name to the closest sampled logger, or None
+        self._sampled_as: dict[str, str | None] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        if record.name not in self._sampled_as:
+            self._sampled_as[record.name] = self._closest(record.name)
+        sampled_as = self._sampled_as[record.name]
+        if sampled_as is None:
+            return True
+        self._credit[sampled_as] += self.rates[sampled_as]
+        if self._credit[sampled_as] < 1:
+            return False
+        self._credit[sampled_as] -= 1
+        return True
+
+    def _closest(self, name: str) -> str | None:
+        while name:
+            if name in self.rates:
+                return name
+            name = name.rpartition(".")[0]
+        return None
+
+
+class LazyQueueHandler(QueueHandler):
+    """
+    Queue handler that leaves formatting to the listener thread.
+    Only the message is rendered before the record is queued, since its
+    arguments may change once the caller moves on; timestamps, JSON and
+    tracebacks are rendered by the listener.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+_listener: QueueListener | None = None
+_handler: LazyQueueHandler | None = None
+
+
+def configure_logging(settings: Settings) -> None:
+    """
+    Route every log record through the queue, replacing the handler
+    installed by an earlier call.
+    """
+    global _listener, _handler
+    stop_logging()
+
+    output = logging.StreamHandler()
+    if settings.log_format == "json":
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+    log_queue = queue.SimpleQueue()
+    _listener = QueueListener(log_queue, output)
+    _handler = LazyQueueHandler(log_queue)
+    if settings.log_sample_rates:
+        _handler.addFilter(SamplingFilter(settings.log_sample_rates))
+
+    root = logging.getLogger()
+    root.addHandler(_handler)
+    root.setLevel(settings.log_level.upper())
+    if settings.log_format == "json":
+        for name in _SERVER_LOGGERS:
+            server_logger = logging.getLogger(name)
+            server_logger.handlers.clear()
+            server_logger.propagate = True
+    for name, level in settings.log_levels.items():
+        logging.getLogger(name).setLevel(level.upper())
+    _listener.start()
+
+
+def stop_logging() -> None:
+    """
+    Write out the queued records and remove the queue handler.
+    """
+    global _listener, _handler
+    if _handler is not None:
+        logging.getLogger().removeHandler(_handler)
+        _handler = None
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop_logging)
@@ -5,30 +5,54 @@ import logging
 
 from fastapi import FastAPI
 
-from app.api import loans, ping
-from app.db import init_db
+from app.api import analytics, investments, loans, ping
+from app.api.responses import get_response_class
+from app.cache import init_cache
+from app.config import get_settings
+from app.credit_scoring import start_credit_scoring, stop_credit_scoring
+from app.db import close_db, init_db
+from app.idempotency import init_idempotency
+from app.logs import configure_logging
+from app.metrics import init_metrics
 from app.orm import start_mappers
 
 
-logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 
 def create_application() -> FastAPI:
-    logging.info("Starting mappers...")
+    configure_logging(get_settings())
+
+    logger.info("Starting mappers...")
     start_mappers()
 
-    logging.info("Creating FastAPI application...")
-    application = FastAPI()
+    logger.info("Creating FastAPI application...")
+    application = FastAPI(
+        default_response_class=get_response_class(get_settings().json_response_class)
+    )
+
+    init_metrics(application, get_settings())
+    # Outside the metrics middleware, see IdempotencyMiddleware
+    init_idempotency(application, get_settings())
 
-    logging.info("Initializing database...")
+    logger.info("Initializing database...")
 
     @application.on_event("startup")
     async def on_startup():
-        logging.info("Initializing async DB…")
+        logger.info("Initializing async DB…")
         await init_db(application)
+        init_cache(application, get_settings())
+        await start_credit_scoring(application, get_settings())
+
+    @application.on_event("shutdown")
+    async def on_shutdown():
+        await stop_credit_scoring(application)
+        await close_db(application)
 
     application.include_router(ping.router)
     application.include_router(loans.router)
+    application.include_router(investments.router)
+    application.include_router(analytics.router)
 
     return application
 
@@ -0,0 +1,262 @@
+# app/metrics.py
+
+"""
+Request and database instrumentation for this worker process.
+An ASGI middleware times every request per route, and cursor events on the
+engine count the statements each request sends and the time they take.
+Statements slower than a threshold are logged. Everything is kept in
+memory and served by /v1/metrics in the Prometheus text format, so each
+worker process is scraped separately, as with the pool statistics.
+"""
+
+import logging
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from fastapi import FastAPI, Request
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.config import Settings
+
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+# Longest statement text written to the slow query log
+SLOW_QUERY_MAX_LENGTH = 1000
+
+
+class Histogram:
+    """
+    Cumulative histogram with fixed upper bounds, as Prometheus expects.
+    """
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        # One count per bucket plus the +Inf bucket, not yet cumulative
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> list[tuple[str, int]]:
+        bounds = [_format_value(bound) for bound in self.buckets] + ["+Inf"]
+        total, counts = 0, []
+        for bound, count in zip(bounds, self.counts):
+            total += count
+            counts.append((bound, total))
+        return counts
+
+
+@dataclass(slots=True)
+class RequestDbStats:
+    statements: int = 0
+    seconds: float = 0.0
+
+
+# Database work of the request being handled, set by the middleware
+_request_db_stats: ContextVar[RequestDbStats | None] = ContextVar(
+    "request_db_stats", default=None
+)
+
+
+class Metrics:
+    def __init__(self, slow_query_threshold: float = 0.5):
+        self.slow_query_threshold = slow_query_threshold
+        # Keyed by (method, route template, status code)
+        self.request_latency: dict[tuple[str, str, str], Histogram] = {}
+        # Keyed by (method, route template)
+        self.request_statements: dict[tuple[str, str], Histogram] = {}
+        self.request_db_time: dict[tuple[str, str], Histogram] = {}
+        self.statement_latency = Histogram(LATENCY_BUCKETS)
+        self.slow_statements = 0
+
+    def observe_request(
+        self,
+        method: str,
+        route: str,
+        status: int,
+        seconds: float,
+        db_stats: RequestDbStats,
+    ) -> None:
+        key = (method, route, str(status))
+        if key not in self.request_latency:
+            self.request_latency[key] = Histogram(LATENCY_BUCKETS)
+        self.request_latency[key].observe(seconds)
+
+        key = (method, route)
+        if key not in self.request_statements:
+            self.request_statements[key] = Histogram(STATEMENT_COUNT_BUCKETS)
+            self.request_db_time[key] = Histogram(LATENCY_BUCKETS)
+        self.request_statements[key].observe(db_stats.statements)
+        self.request_db_time[key].observe(db_stats.seconds)
+
+    def observe_statement(self, statement: str, seconds: float) -> None:
+        self.statement_latency.observe(seconds)
+        db_stats = _request_db_stats.get()
+        if db_stats is not None:
+            db_stats.statements += 1
+            db_stats.seconds += seconds
+        if seconds >= self.slow_query_threshold:
+            self.slow_statements += 1
+            logger.warning(
+                "Slow query (%.3fs): %s", seconds, statement[:SLOW_QUERY_MAX_LENGTH]
+            )
+
+    def render(self) -> str:
+        """
+        All metrics in the Prometheus text exposition format.
+        """
+        lines = []
+        _histograms(
+            lines,
+            "http_request_duration_seconds",
+            "Time to handle a request, by route",
+            ("method", "route", "status"),
+            self.request_latency,
+        )
+        _histograms(
+            lines,
+            "http_request_db_statements",
+            "SQL statements sent per request, by route",
+            ("method", "route"),
+            self.request_statements,
+        )
+        _histograms(
+            lines,
+            "http_request_db_duration_seconds",
+            "Time spent in SQL statements per request, by route",
+            ("method", "route"),
+            self.request_db_time,
+        )
+        _histograms(
+            lines,
+            "db_statement_duration_seconds",
+            "Time to execute a SQL statement",
+            (),
+            {(): self.statement_latency},
+        )
+        lines += [
+            "# HELP db_slow_statements_total SQL statements slower than the "
+            "slow query threshold",
+            "# TYPE db_slow_statements_total counter",
+            f"db_slow_statements_total {self.slow_statements}",
+        ]
+        return "\n".join(lines) + "\n"
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value))
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...], **extra: str) -> str:
+    pairs = list(zip(names, values)) + list(extra.items())
+    if not pairs:
+        return ""
+    escaped = (
+        (name, value.replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n"))
+        for name, value in pairs
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def _histograms(
+    lines: list[str],
+    name: str,
+    help_text: str,
+    label_names: tuple[str, ...],
+    histograms: dict[tuple, Histogram],
+) -> None:
+    lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    for label_values, histogram in sorted(histograms.items()):
+        for bound, count in histogram.cumulative():
+            labels = _labels(label_names, label_values, le=bound)
+            lines.append(f"{name}_bucket{labels} {count}")
+        labels = _labels(label_names, label_values)
+        lines.append(f"{name}_sum{labels} {_format_value(histogram.sum)}")
+        lines.append(f"{name}_count{labels} {histogram.count}")
+
+
+class MetricsMiddleware:
+    """
+    Times HTTP requests and collects the database work done while handling
+    them. Written as plain ASGI rather than BaseHTTPMiddleware so streamed
+    responses are timed to their last byte and pass through untouched.
+    """
+
+    def __init__(self, app, metrics: Metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        db_stats = RequestDbStats()
+        token = _request_db_stats.set(db_stats)
+        start = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            _request_db_stats.reset(token)
+            # The route template, not the path, keeps the number of series
+            # bounded; unknown paths all share one
+            route = scope.get("route")
+            self.metrics.observe_request(
+                scope["method"],
+                route.path if route is not None else "unmatched",
+                status,
+                time.perf_counter() - start,
+                db_stats,
+            )
+
+
+def instrument_engine(engine: AsyncEngine, metrics: Metrics) -> None:
+    """
+    Time every statement the engine sends to the database.
+    """
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def start_timer(conn, cursor, statement, parameters, context, executemany):
+        context._metrics_start = time.perf_counter()
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def stop_timer(conn, cursor, statement, parameters, context, executemany):
+        metrics.observe_statement(
+            statement, time.perf_counter() - context._metrics_start
+        )
+
+
+def init_metrics(app: FastAPI, settings: Settings) -> None:
+    """
+    Install the middleware when metrics are enabled. The database side is
+    hooked up by init_db once the engine exists.
+    """
+    app.state.metrics = None
+    if not settings.metrics_enabled:
+        return
+    app.state.metrics = Metrics(settings.slow_query_threshold)
+    app.add_middleware(MetricsMiddleware, metrics=app.state.metrics)
+
+
+def get_metrics(request: Request) -> Metrics | None:
+    return getattr(request.app.state, "metrics", None)
@@ -1,5 +1,5 @@
 from dataclasses import dataclass, field
-from datetime import datetime
+from datetime import date, datetime
 from decimal import Decimal
 from enum import Enum
 from uuid import UUID, uuid4
@@ -13,6 +13,12 @@ class LoanStatus(str, Enum):
     DEFAULTED = "defaulted"
 
 
+class CreditScoreStatus(str, Enum):
+    PENDING = "pending"
+    SCORED = "scored"
+    FAILED = "failed"
+
+
 class InvestmentStatus(str, Enum):
     PENDING_APPROVAL = "pending_approval"
     ACTIVE = "active"
@@ -36,15 +42,31 @@ class InsufficientCreditScoreError(Exception):
     pass
 
 
+class InvalidInvestmentStatusError(ValueError):
+    pass
+
+
+class CreditScorePendingError(Exception):
+    pass
+
+
 @dataclass
 class Borrower:
     name: str
     email: str
-    credit_score: int
+    credit_score: int | None
     id: UUID = field(default_factory=lambda: str(uuid4()))
+    income: int | None = None
+    employment_years: int | None = None
+    has_previous_loans: bool | None = None
+    credit_score_status: CreditScoreStatus = CreditScoreStatus.SCORED
+
+    @property
+    def is_credit_score_pending(self) -> bool:
+        return self.credit_score_status == CreditScoreStatus.PENDING
 
     def can_create_loan(self) -> bool:
-        return self.credit_score >= 600
+        return self.credit_score is not None and self.credit_score >= 600
 
     def to_dict(self) -> dict:
         return {
@@ -52,6 +74,7 @@ class Borrower:
             "name": self.name,
             "email": self.email,
             "credit_score": self.credit_score,
+            "credit_score_status": CreditScoreStatus(self.credit_score_status).value,
         }
 
 
@@ -65,6 +88,16 @@ class Loan:
     status: LoanStatus = LoanStatus.ACTIVE
     created_at: datetime | None = None
 
+    def to_dict(self) -> dict:
+        return {
+            "id": str(self.id),
+            "amount": float(self.amount),
+            "purpose": self.purpose,
+            "term_months": self.term_months,
+            "status": LoanStatus(self.status).value,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+        }
+
     def can_accept_investment(self, amount: Decimal) -> bool:
         return self.status == LoanStatus.ACTIVE and amount == self.amount
 
@@ -106,6 +139,8 @@ class Investment:
     amount: Decimal
     status: InvestmentStatus = InvestmentStatus.PENDING_APPROVAL
     created_at: datetime | None = None
+    # Maintained sum of the repayments, kept up to date by the repository
+    repaid_total: Decimal = Decimal("0")
     repayments: list["Repayment"] = field(default_factory=list)
     id: UUID = field(default_factory=lambda: str(uuid4()))
 
@@ -118,20 +153,20 @@ class Investment:
 
     def approve(self) -> None:
         if self.status != InvestmentStatus.PENDING_APPROVAL:
-            raise ValueError("Can only approve pending investments")
+            raise InvalidInvestmentStatusError("Can only approve pending investments")
         self.status = InvestmentStatus.ACTIVE
         self.loan.accept_investment(self)
 
     def reject(self) -> None:
         if self.status != InvestmentStatus.PENDING_APPROVAL:
-            raise ValueError("Can only reject pending investments")
+            raise InvalidInvestmentStatusError("Can only reject pending investments")
         self.status = InvestmentStatus.REJECTED
         self.investor.refund(self.amount)
         self.loan.reject_investment()
 
     @property
     def remaining_amount(self) -> Decimal:
-        return self.amount - sum(rep.amount for rep in self.repayments)
+        return self.amount - self.repaid_total
 
 
 @dataclass
@@ -144,3 +179,65 @@ class Repayment:
     def validate_amount(self) -> None:
         if self.amount > self.investment.remaining_amount:
             raise ValueError("Repayment amount exceeds remaining investment amount")
+
+
+# Read-only projections
+# Flat, slotted and frozen counterparts of the entities above for read paths
+# that materialize many rows (listings, reporting, rescoring). They hold
+# foreign keys instead of related objects, have no per-instance __dict__ and
+# are not mapped, so they cost a fraction of a mapped instance. Fields follow
+# the table columns, so a Core row converts with View(**row._mapping).
+@dataclass(frozen=True, slots=True)
+class BorrowerView:
+    id: str
+    name: str
+    email: str
+    credit_score: int | None
+    income: int | None = None
+    employment_years: int | None = None
+    has_previous_loans: bool | None = None
+    credit_score_status: CreditScoreStatus = CreditScoreStatus.SCORED
+
+    to_dict = Borrower.to_dict
+
+
+@dataclass(frozen=True, slots=True)
+class LoanView:
+    id: str
+    borrower_id: str
+    amount: Decimal
+    purpose: str
+    term_months: int
+    status: LoanStatus = LoanStatus.ACTIVE
+    created_at: datetime | None = None
+
+    to_dict = Loan.to_dict
+
+
+@dataclass(frozen=True, slots=True)
+class InvestorView:
+    id: str
+    name: str
+    email: str
+    available_funds: Decimal
+
+
+@dataclass(frozen=True, slots=True)
+class InvestmentView:
+    id: str
+    investor_id: str
+    loan_id: str
+    amount: Decimal
+    status: InvestmentStatus
+    created_at: datetime | None = None
+    repaid_total: Decimal = Decimal("0")
+
+    remaining_amount = Investment.remaining_amount
+
+
+@dataclass(frozen=True, slots=True)
+class RepaymentView:
+    id: str
+    investment_id: str
+    amount: Decimal
+    created_at: date | None = None
@@ -1,20 +1,25 @@
 from sqlalchemy import (
+    BigInteger,
+    Boolean,
     Column,
     Date,
     DateTime,
     Enum,
     ForeignKey,
+    Index,
     Integer,
     MetaData,
     Numeric,
     String,
     Table,
+    Text,
     func,
 )
 from sqlalchemy.orm import registry, relationship
 
 from .models import (
     Borrower,
+    CreditScoreStatus,
     Investment,
     InvestmentStatus,
     Investor,
@@ -33,7 +38,31 @@ borrowers = Table(
     Column("id", String(36), primary_key=True),  # UUID as string
     Column("name", String(255), nullable=False),
     Column("email", String(255), nullable=False),
-    Column("credit_score", Integer, nullable=False),
+    Column("credit_score", Integer, nullable=True),  # NULL while scoring
+    Column("income", BigInteger, nullable=True),
+    Column("employment_years", BigInteger, nullable=True),
+    Column("has_previous_loans", Boolean, nullable=True),
+    Column(
+        "credit_score_status",
+        Enum(CreditScoreStatus),
+        nullable=False,
+        server_default=CreditScoreStatus.SCORED.name,
+    ),
+    Index("ix_borrowers_email", "email"),
+)
+
+# Denormalized per-borrower loan counts, maintained in the same transaction
+# as every loan insert and status change, so loan eligibility is a single
+# primary-key read instead of an aggregate over the borrower's loans.
+borrower_loan_counts = Table(
+    "borrower_loan_counts",
+    metadata,
+    Column("borrower_id", ForeignKey("borrowers.id"), primary_key=True),
+    Column("active_count", Integer, nullable=False, server_default="0"),
+    Column("funded_count", Integer, nullable=False, server_default="0"),
+    Column("repaying_count", Integer, nullable=False, server_default="0"),
+    Column("paid_count", Integer, nullable=False, server_default="0"),
+    Column("defaulted_count", Integer, nullable=False, server_default="0"),
 )
 
 investors = Table(
@@ -55,6 +84,10 @@ loans = Table(
     Column("term_months", Integer, nullable=False),
     Column("status", Enum(LoanStatus), nullable=False),
     Column("created_at", DateTime, nullable=False, server_default=func.now()),
+    # Covers the per-borrower "count loans by status" eligibility check
+    Index("ix_loans_borrower_id_status", "borrower_id", "status"),
+    # Marketplace: active loans by amount range, keyset paginated on (amount, id)
+    Index("ix_loans_status_amount_id", "status", "amount", "id"),
 )
 
 investments = Table(
@@ -66,6 +99,9 @@ investments = Table(
     Column("amount", Numeric(10, 2), nullable=False),
     Column("status", Enum(InvestmentStatus), nullable=False),
     Column("created_at", DateTime, nullable=False, server_default=func.now()),
+    Column("repaid_total", Numeric(10, 2), nullable=False, server_default="0"),
+    Index("ix_investments_loan_id", "loan_id"),
+    Index("ix_investments_investor_id", "investor_id"),
 )
 
 repayments = Table(
@@ -75,6 +111,76 @@ repayments = Table(
     Column("investment_id", ForeignKey("investments.id"), nullable=False),
     Column("amount", Numeric(10, 2), nullable=False),
     Column("created_at", Date, nullable=False, server_default=func.now()),
+    Index("ix_repayments_investment_id", "investment_id"),
+)
+
+# Portfolio aggregates behind the analytics endpoints, maintained in the same
+# transaction as the writes they summarize so reports never scan the loans.
+# Rows every writer would touch are split into ANALYTICS_SHARDS shards, picked
+# from the loan id, so concurrent transactions rarely wait on the same row;
+# readers sum the shards.
+ANALYTICS_SHARDS = 16
+
+loan_status_totals = Table(
+    "loan_status_totals",
+    metadata,
+    Column("status", Enum(LoanStatus), primary_key=True),
+    Column("shard", Integer, primary_key=True, autoincrement=False),
+    Column("loan_count", Integer, nullable=False, server_default="0"),
+    Column("total_amount", Numeric(14, 2), nullable=False, server_default="0"),
+)
+
+daily_funded_volume = Table(
+    "daily_funded_volume",
+    metadata,
+    Column("day", Date, primary_key=True),
+    Column("shard", Integer, primary_key=True, autoincrement=False),
+    Column("loan_count", Integer, nullable=False, server_default="0"),
+    Column("total_amount", Numeric(14, 2), nullable=False, server_default="0"),
+)
+
+investor_exposure = Table(
+    "investor_exposure",
+    metadata,
+    Column("investor_id", ForeignKey("investors.id"), primary_key=True),
+    # Reserved by investments waiting for approval
+    Column("pending_amount", Numeric(14, 2), nullable=False, server_default="0"),
+    # Approved investments, and what has been repaid on them
+    Column("invested_amount", Numeric(14, 2), nullable=False, server_default="0"),
+    Column("repaid_amount", Numeric(14, 2), nullable=False, server_default="0"),
+)
+
+# Progress of resumable batch jobs: the last id a job has fully processed,
+# so a restarted run carries on from there
+job_checkpoints = Table(
+    "job_checkpoints",
+    metadata,
+    Column("job", String(64), primary_key=True),
+    Column("last_id", String(36), nullable=False),
+    Column("rows_done", Integer, nullable=False, server_default="0"),
+    Column(
+        "updated_at",
+        DateTime,
+        nullable=False,
+        server_default=func.now(),
+        onupdate=func.now(),
+    ),
+)
+
+# Responses of POST requests sent with an Idempotency-Key header, replayed
+# when the client retries. A row without a status code is a reservation by
+# the request still running; expires_at bounds both
+idempotency_keys = Table(
+    "idempotency_keys",
+    metadata,
+    Column("key", String(255), primary_key=True),
+    # Hash of the method, path, query and body the key was first used with
+    Column("fingerprint", String(64), nullable=False),
+    Column("status_code", Integer, nullable=True),
+    Column("content_type", String(255), nullable=True),
+    Column("body", Text, nullable=True),
+    Column("expires_at", DateTime, nullable=False),
+    Index("ix_idempotency_keys_expires_at", "expires_at"),
 )
 
 
@@ -0,0 +1,294 @@
+# app/queries.py
+
+"""
+Read side of the application.
+List endpoints only turn what they read into JSON, so instead of going
+through the repositories and the identity map they run Core selects whose
+columns are already shaped like the response, and hand the rows as plain
+dicts straight to the serializer.
+"""
+
+from collections.abc import Awaitable, Callable
+from datetime import date
+from decimal import Decimal
+from typing import TypeVar
+
+from fastapi import Request
+from sqlalchemy import Numeric, Select, func, select, tuple_, type_coerce
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.models import InvestmentStatus, LoanStatus
+from app.orm import (
+    borrowers,
+    daily_funded_volume,
+    investments,
+    investor_exposure,
+    investors,
+    loan_status_totals,
+    loans,
+)
+
+
+T = TypeVar("T")
+
+
+def _as_float(column, label: str):
+    # Amounts are served as JSON numbers
+    return type_coerce(column, Numeric(10, 2, asdecimal=False)).label(label)
+
+
+BORROWER_COLUMNS = (
+    borrowers.c.id,
+    borrowers.c.name,
+    borrowers.c.email,
+    borrowers.c.credit_score,
+    borrowers.c.credit_score_status,
+)
+
+LOAN_COLUMNS = (
+    loans.c.id,
+    _as_float(loans.c.amount, "amount"),
+    loans.c.purpose,
+    loans.c.term_months,
+    loans.c.status,
+    loans.c.created_at,
+)
+
+INVESTMENT_COLUMNS = (
+    investments.c.id,
+    investments.c.investor_id,
+    investments.c.loan_id,
+    _as_float(investments.c.amount, "amount"),
+    _as_float(investments.c.repaid_total, "repaid_total"),
+    _as_float(investments.c.amount - investments.c.repaid_total, "remaining_amount"),
+    investments.c.status,
+    investments.c.created_at,
+)
+
+
+def filter_borrowers(
+    stmt: Select,
+    after_id: str | None,
+    min_credit_score: int | None,
+    max_credit_score: int | None,
+    email: str | None,
+) -> Select:
+    if after_id is not None:
+        stmt = stmt.where(borrowers.c.id > after_id)
+    if min_credit_score is not None:
+        stmt = stmt.where(borrowers.c.credit_score >= min_credit_score)
+    if max_credit_score is not None:
+        stmt = stmt.where(borrowers.c.credit_score <= max_credit_score)
+    if email is not None:
+        stmt = stmt.where(borrowers.c.email == email)
+    return stmt.order_by(borrowers.c.id)
+
+
+def filter_loans(
+    stmt: Select,
+    borrower_id: str | None = None,
+    status: LoanStatus | None = None,
+    min_amount: Decimal | None = None,
+    max_amount: Decimal | None = None,
+    min_term_months: int | None = None,
+    max_term_months: int | None = None,
+    after: tuple[Decimal, str] | None = None,
+) -> Select:
+    if borrower_id is not None:
+        stmt = stmt.where(loans.c.borrower_id == borrower_id)
+    if status is not None:
+        stmt = stmt.where(loans.c.status == status)
+    if min_amount is not None:
+        stmt = stmt.where(loans.c.amount >= min_amount)
+    if max_amount is not None:
+        stmt = stmt.where(loans.c.amount <= max_amount)
+    if min_term_months is not None:
+        stmt = stmt.where(loans.c.term_months >= min_term_months)
+    if max_term_months is not None:
+        stmt = stmt.where(loans.c.term_months <= max_term_months)
+    if after is not None:
+        stmt = stmt.where(tuple_(loans.c.amount, loans.c.id) > tuple(after))
+    return stmt.order_by(loans.c.amount, loans.c.id)
+
+
+async def borrowers_page(
+    session: AsyncSession,
+    after_id: str | None = None,
+    limit: int | None = None,
+    min_credit_score: int | None = None,
+    max_credit_score: int | None = None,
+    email: str | None = None,
+) -> list[dict]:
+    """
+    One keyset page of borrowers in id order, as response rows.
+    """
+    stmt = filter_borrowers(
+        select(*BORROWER_COLUMNS),
+        after_id,
+        min_credit_score,
+        max_credit_score,
+        email,
+    ).limit(limit)
+    result = await session.execute(stmt)
+    return [dict(row) for row in result.mappings()]
+
+
+async def marketplace_page(
+    session: AsyncSession,
+    after: tuple[Decimal, str] | None = None,
+    limit: int | None = None,
+    min_amount: Decimal | None = None,
+    max_amount: Decimal | None = None,
+    min_term_months: int | None = None,
+    max_term_months: int | None = None,
+) -> list[dict]:
+    """
+    One keyset page of the loans open to investment, cheapest first, as
+    response rows.
+    """
+    stmt = filter_loans(
+        select(*LOAN_COLUMNS),
+        status=LoanStatus.ACTIVE,
+        min_amount=min_amount,
+        max_amount=max_amount,
+        min_term_months=min_term_months,
+        max_term_months=max_term_months,
+        after=after,
+    ).limit(limit)
+    result = await session.execute(stmt)
+    return [dict(row) for row in result.mappings()]
+
+
+async def investments_page(
+    session: AsyncSession,
+    after_id: str | None = None,
+    limit: int | None = None,
+    investor_id: str | None = None,
+    loan_id: str | None = None,
+    status: InvestmentStatus | None = None,
+) -> list[dict]:
+    """
+    One keyset page of investments in id order, as response rows.
+    """
+    stmt = select(*INVESTMENT_COLUMNS)
+    if after_id is not None:
+        stmt = stmt.where(investments.c.id > after_id)
+    if investor_id is not None:
+        stmt = stmt.where(investments.c.investor_id == investor_id)
+    if loan_id is not None:
+        stmt = stmt.where(investments.c.loan_id == loan_id)
+    if status is not None:
+        stmt = stmt.where(investments.c.status == status)
+    result = await session.execute(stmt.order_by(investments.c.id).limit(limit))
+    return [dict(row) for row in result.mappings()]
+
+
+# Analytics
+# Served from the aggregate tables, so the cost depends on the number of
+# statuses, days or investors asked for, never on the number of loans.
+
+
+async def portfolio_summary(session: AsyncSession) -> dict:
+    """
+    Loan count and amount per status, overall totals and the default rate:
+    the share of loans that reached funding and then defaulted.
+    """
+    stmt = select(
+        loan_status_totals.c.status,
+        func.sum(loan_status_totals.c.loan_count).label("loan_count"),
+        _as_float(func.sum(loan_status_totals.c.total_amount), "total_amount"),
+    ).group_by(loan_status_totals.c.status)
+    by_status = {
+        status: {"loan_count": 0, "total_amount": 0.0} for status in LoanStatus
+    }
+    for row in await session.execute(stmt):
+        by_status[row.status] = {
+            "loan_count": int(row.loan_count),
+            "total_amount": row.total_amount,
+        }
+
+    funded = (
+        sum(by_status[status]["loan_count"] for status in LoanStatus)
+        - (by_status[LoanStatus.ACTIVE]["loan_count"])
+    )
+    defaulted = by_status[LoanStatus.DEFAULTED]["loan_count"]
+    return {
+        "total_loans": sum(totals["loan_count"] for totals in by_status.values()),
+        "total_amount": sum(totals["total_amount"] for totals in by_status.values()),
+        "by_status": {status.value: totals for status, totals in by_status.items()},
+        "default_rate": round(defaulted / funded, 4) if funded else 0.0,
+    }
+
+
+async def funded_volume(session: AsyncSession, start: date, end: date) -> list[dict]:
+    """
+    Loans funded and amount funded per day, for the days between start and
+    end inclusive that had any.
+    """
+    stmt = (
+        select(
+            daily_funded_volume.c.day,
+            func.sum(daily_funded_volume.c.loan_count).label("loan_count"),
+            _as_float(func.sum(daily_funded_volume.c.total_amount), "total_amount"),
+        )
+        .where(daily_funded_volume.c.day.between(start, end))
+        .group_by(daily_funded_volume.c.day)
+        .order_by(daily_funded_volume.c.day)
+    )
+    result = await session.execute(stmt)
+    return [
+        {
+            "day": row.day,
+            "loan_count": int(row.loan_count),
+            "total_amount": row.total_amount,
+        }
+        for row in result
+    ]
+
+
+async def investor_exposure_for(session: AsyncSession, investor_id: str) -> dict | None:
+    """
+    What an investor has reserved, invested, been repaid and still has
+    outstanding, or None if there is no such investor.
+    """
+
+    def amount(column, label: str):
+        return _as_float(func.coalesce(column, 0), label)
+
+    stmt = (
+        select(
+            investors.c.id.label("investor_id"),
+            _as_float(investors.c.available_funds, "available_funds"),
+            amount(investor_exposure.c.pending_amount, "pending_amount"),
+            amount(investor_exposure.c.invested_amount, "invested_amount"),
+            amount(investor_exposure.c.repaid_amount, "repaid_amount"),
+            amount(
+                investor_exposure.c.invested_amount - investor_exposure.c.repaid_amount,
+                "outstanding_amount",
+            ),
+        )
+        .outerjoin(investor_exposure, investor_exposure.c.investor_id == investors.c.id)
+        .where(investors.c.id == investor_id)
+    )
+    row = (await session.execute(stmt)).mappings().one_or_none()
+    return dict(row) if row is not None else None
+
+
+class Reader:
+    """
+    Runs the read queries of a request, each in a session of its own.
+    Nothing is opened until a query runs, and the pooled connection is
+    returned as soon as its rows are fetched, so validating the request and
+    serializing the response never hold one.
+    """
+
+    def __init__(self, session_factory: async_sessionmaker[AsyncSession]):
+        self.session_factory = session_factory
+
+    async def __call__(self, query: Callable[..., Awaitable[T]], *args, **kwargs) -> T:
+        async with self.session_factory() as session:
+            return await query(session, *args, **kwargs)
+
+
+def get_reader(request: Request) -> Reader:
+    return Reader(request.app.state.async_db_session)
@@ -1,11 +1,319 @@
+import zlib
+from collections.abc import AsyncIterator
+from datetime import date, datetime
+from decimal import Decimal
+from functools import cache
 from typing import Protocol
 from uuid import UUID
 
-from sqlalchemy import func, insert, select
+from sqlalchemy import (
+    Column,
+    Row,
+    Table,
+    bindparam,
+    case,
+    delete,
+    func,
+    insert,
+    literal,
+    select,
+    update,
+)
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from sqlalchemy.sql import Executable
 
-from app.models import Borrower, Investment, Investor, Loan, LoanStatus
-from app.orm import borrowers, investments, investors, loans
+from app.cache import CacheBackend
+from app.models import (
+    Borrower,
+    BorrowerView,
+    CreditScoreStatus,
+    Investment,
+    InvestmentStatus,
+    Investor,
+    Loan,
+    LoanStatus,
+    LoanView,
+)
+from app.orm import (
+    ANALYTICS_SHARDS,
+    borrower_loan_counts,
+    borrowers,
+    daily_funded_volume,
+    idempotency_keys,
+    investments,
+    investor_exposure,
+    investors,
+    job_checkpoints,
+    loan_status_totals,
+    loans,
+    repayments,
+)
+from app.queries import filter_borrowers, filter_loans
+
+
+def _upsert_for(session: AsyncSession):
+    """
+    Dialect-specific INSERT construct supporting ON CONFLICT.
+    """
+    if session.get_bind().dialect.name == "postgresql":
+        return postgresql.insert
+    return sqlite.insert
+
+
+def _loan_count_column(status: LoanStatus) -> Column:
+    return borrower_loan_counts.c[f"{LoanStatus(status).value}_count"]
+
+
+def _shard(loan_id: str) -> int:
+    return zlib.crc32(loan_id.encode()) % ANALYTICS_SHARDS
+
+
+# Investor exposure column holding an investment's amount in each status
+_EXPOSURE_COLUMNS = {
+    InvestmentStatus.PENDING_APPROVAL: "pending_amount",
+    InvestmentStatus.ACTIVE: "invested_amount",
+    InvestmentStatus.COMPLETED: "invested_amount",
+}
+
+
+# Write statements are built once so that rows queued for the same
+# statement end up in the same executemany when a WriteBatch is flushed.
+_insert_borrower = insert(borrowers)
+_insert_loan = insert(loans)
+_insert_investor = insert(investors)
+_insert_investment = insert(investments)
+_insert_repayment = insert(repayments)
+_repaid_amount = bindparam("b_amount", type_=investments.c.amount.type)
+_apply_repayment = (
+    update(investments)
+    .where(investments.c.id == bindparam("b_investment_id"))
+    .values(
+        {
+            # SET expressions see the row as it was before the update
+            investments.c.repaid_total: investments.c.repaid_total + _repaid_amount,
+            investments.c.status: case(
+                (
+                    investments.c.repaid_total + _repaid_amount >= investments.c.amount,
+                    literal(InvestmentStatus.COMPLETED, investments.c.status.type),
+                ),
+                else_=investments.c.status,
+            ),
+        }
+    )
+)
+_add_repaid_exposure = (
+    update(investor_exposure)
+    .where(
+        investor_exposure.c.investor_id
+        == select(investments.c.investor_id)
+        .where(investments.c.id == bindparam("b_investment_id"))
+        .scalar_subquery()
+    )
+    .values(repaid_amount=investor_exposure.c.repaid_amount + _repaid_amount)
+)
+_set_credit_score = (
+    update(borrowers)
+    .where(borrowers.c.id == bindparam("b_id"))
+    .values(
+        credit_score=bindparam("b_credit_score"),
+        credit_score_status=CreditScoreStatus.SCORED,
+    )
+)
+
+# Postgres rescoring UPDATE ... FROM a VALUES-style list of (id, score)
+# rows, passed as two arrays so the statement text never changes and is
+# compiled and prepared once
+_new_scores = (
+    func.unnest(
+        bindparam("b_ids", type_=postgresql.ARRAY(borrowers.c.id.type)),
+        bindparam(
+            "b_credit_scores", type_=postgresql.ARRAY(borrowers.c.credit_score.type)
+        ),
+    )
+    .table_valued("id", "credit_score")
+    .render_derived(name="scores")
+)
+_set_credit_scores = (
+    update(borrowers)
+    .where(
+        borrowers.c.id == _new_scores.c.id,
+        # Without a range on the key the planner may join the new scores
+        # against a scan of the whole table
+        borrowers.c.id.between(bindparam("b_first_id"), bindparam("b_last_id")),
+    )
+    .values(
+        credit_score=_new_scores.c.credit_score,
+        credit_score_status=CreditScoreStatus.SCORED,
+    )
+)
+
+
+@cache
+def _increment_loan_count_stmt(dialect_name: str, status: LoanStatus):
+    upsert = postgresql.insert if dialect_name == "postgresql" else sqlite.insert
+    count = _loan_count_column(status)
+    return upsert(borrower_loan_counts).on_conflict_do_update(
+        index_elements=[borrower_loan_counts.c.borrower_id],
+        set_={count.name: count + 1},
+    )
+
+
+@cache
+def _accumulate_stmt(dialect_name: str, table: Table):
+    """
+    Upsert adding each row's values to the stored ones, creating missing
+    rows, for the aggregate tables.
+    """
+    upsert = postgresql.insert if dialect_name == "postgresql" else sqlite.insert
+    stmt = upsert(table)
+    return stmt.on_conflict_do_update(
+        index_elements=list(table.primary_key),
+        set_={
+            column.name: column + stmt.excluded[column.name]
+            for column in table.c
+            if not column.primary_key
+        },
+    )
+
+
+@cache
+def _shift_loan_count_stmt(from_status: LoanStatus, to_status: LoanStatus):
+    from_count = _loan_count_column(from_status)
+    to_count = _loan_count_column(to_status)
+    return (
+        update(borrower_loan_counts)
+        .where(borrower_loan_counts.c.borrower_id == bindparam("b_borrower_id"))
+        .values({from_count: from_count - 1, to_count: to_count + 1})
+    )
+
+
+class WriteBatch:
+    """
+    Writes buffered by a unit of work, sent in the order they were queued.
+    Consecutive rows queued for the same statement are sent as a single
+    executemany when the batch is flushed.
+    """
+
+    def __init__(self):
+        self._writes: list[tuple[Executable, list[dict]]] = []
+        # Cache keys written in this unit of work, evicted again once it ends
+        self.stale_keys: set[str] = set()
+        # Whether writes were sent in the current transaction
+        self.written = False
+
+    def __len__(self) -> int:
+        return len(self._writes)
+
+    def add(self, stmt: Executable, params: dict | list[dict]) -> None:
+        if self._writes and self._writes[-1][0] is stmt:
+            rows = self._writes[-1][1]
+        else:
+            rows = []
+            self._writes.append((stmt, rows))
+        if isinstance(params, dict):
+            rows.append(params)
+        else:
+            rows.extend(params)
+
+    def clear(self) -> None:
+        self._writes.clear()
+
+    async def flush(self, session: AsyncSession) -> None:
+        writes, self._writes = self._writes, []
+        self.written = self.written or bool(writes)
+        for stmt, rows in writes:
+            await session.execute(stmt, rows)
+
+
+class SqlAlchemyRepository:
+    """
+    Base for the SQLAlchemy repositories.
+    Writes are queued on the unit of work's batch when there is one and
+    executed straight away otherwise; every other statement flushes the
+    queued writes first so reads always see them.
+    Repositories given a cache read hot rows through it and evict the rows
+    they write. Rows read after the unit of work has written are not cached,
+    as they may not be committed.
+    """
+
+    def __init__(
+        self,
+        session: AsyncSession,
+        batch: WriteBatch | None = None,
+        cache: CacheBackend | None = None,
+    ):
+        self.session = session
+        self.batch = batch
+        self.cache = cache
+
+    async def _queue(self, stmt: Executable, params: dict | list[dict]) -> None:
+        if self.batch is None:
+            await self.session.execute(stmt, params)
+        else:
+            self.batch.add(stmt, params)
+
+    async def _execute(self, stmt: Executable, params: dict | list[dict] | None = None):
+        if self.batch:
+            await self.batch.flush(self.session)
+        return await self.session.execute(stmt, params)
+
+    async def _get_row(self, key: str, stmt: Executable) -> dict | None:
+        """
+        Read-through lookup of a single row as a dict.
+        """
+        if self.cache is not None:
+            row = await self.cache.get(key)
+            if row is not None:
+                return row
+        row = (await self._execute(stmt)).mappings().one_or_none()
+        if row is None:
+            return None
+        row = dict(row)
+        if self.cache is not None and not self._in_write_transaction():
+            await self.cache.set(key, row)
+        return row
+
+    def _in_write_transaction(self) -> bool:
+        """
+        Whether the unit of work has written anything it has not committed
+        yet. Rows read then may include those writes, so they are not cached.
+        """
+        return self.batch is not None and bool(
+            self.batch or self.batch.written or self.batch.stale_keys
+        )
+
+    async def _accumulate(self, table: Table, rows: list[dict]) -> None:
+        """
+        Queue rows of deltas for an aggregate table. Rows are sorted by key
+        so every transaction locks aggregate rows in the same order.
+        """
+        key = [column.name for column in table.primary_key]
+        await self._queue(
+            _accumulate_stmt(self.session.get_bind().dialect.name, table),
+            sorted(rows, key=lambda row: [str(row[name]) for name in key]),
+        )
+
+    async def _evict(self, *keys: str) -> None:
+        """
+        Drop written rows from the cache. Inside a unit of work they are
+        evicted again when it commits or rolls back, so a read racing the
+        transaction cannot leave a stale or uncommitted row behind.
+        """
+        if self.cache is None or not keys:
+            return
+        await self.cache.delete(*keys)
+        if self.batch is not None:
+            self.batch.stale_keys.update(keys)
+
+
+def borrower_cache_key(borrower_id: str) -> str:
+    return f"borrower:{borrower_id}"
+
+
+def investor_cache_key(investor_id: str) -> str:
+    return f"investor:{investor_id}"
 
 
 class LoanRepository(Protocol):
@@ -13,19 +321,61 @@ class LoanRepository(Protocol):
 
     async def get(self, loan_id: UUID) -> Loan | None: ...
 
-    async def list(self) -> list[Loan]: ...
-
     async def get_loan_counts_by_status(
-        self, borrower_id: UUID
+        self, borrower_id: UUID, for_update: bool = False
     ) -> dict[LoanStatus, int]: ...
 
+    async def change_status(
+        self, loan: Loan, from_status: LoanStatus, to_status: LoanStatus
+    ) -> bool: ...
+
+    async def change_status_many(
+        self, loan_ids: list[str], from_status: LoanStatus, to_status: LoanStatus
+    ) -> int: ...
+
+    async def fund(self, loan_id: str, amount: Decimal) -> bool: ...
+
+    async def list(
+        self,
+        borrower_id: UUID | None = None,
+        status: LoanStatus | None = None,
+        min_amount: Decimal | None = None,
+        max_amount: Decimal | None = None,
+        min_term_months: int | None = None,
+        max_term_months: int | None = None,
+        after: tuple[Decimal, str] | None = None,
+        limit: int | None = None,
+    ) -> list[LoanView]: ...
+
 
 class BorrowerRepository(Protocol):
     async def add(self, borrower: Borrower) -> None: ...
 
+    async def add_many(self, borrowers: list[Borrower]) -> None: ...
+
     async def get(self, borrower_id: UUID) -> Borrower | None: ...
 
-    async def list(self) -> list[Loan]: ...
+    async def get_scoring_inputs(self, borrower_ids: list[str]) -> list[Row]: ...
+
+    async def update_credit_scores(self, credit_scores: dict[str, int]) -> None: ...
+
+    def stream(
+        self,
+        after_id: str | None = None,
+        min_credit_score: int | None = None,
+        max_credit_score: int | None = None,
+        email: str | None = None,
+        batch_size: int = 1000,
+    ) -> AsyncIterator[list[dict]]: ...
+
+    async def list(
+        self,
+        after_id: str | None = None,
+        limit: int | None = None,
+        min_credit_score: int | None = None,
+        max_credit_score: int | None = None,
+        email: str | None = None,
+    ) -> list[BorrowerView]: ...
 
 
 class InvestorRepository(Protocol):
@@ -33,127 +383,833 @@ class InvestorRepository(Protocol):
 
     async def get(self, investor_id: UUID) -> Investor | None: ...
 
+    async def reserve_funds(self, investor_id: str, amount: Decimal) -> bool: ...
+
+    async def release_funds(self, investor_id: str, amount: Decimal) -> None: ...
+
 
 class InvestmentRepository(Protocol):
     async def add(self, investment: Investment) -> None: ...
 
     async def get(self, investment_id: UUID) -> Investment | None: ...
 
+    async def add_for_open_loan(
+        self, investment_id: str, investor_id: str, loan_id: str, amount: Decimal
+    ) -> bool: ...
 
-class SqlAlchemyLoanRepository:
-    def __init__(self, session: AsyncSession):
-        self.session = session
+    async def change_status(
+        self,
+        investment_id: str,
+        from_status: InvestmentStatus,
+        to_status: InvestmentStatus,
+    ) -> Row | None: ...
+
+    async def get_repayment_state(
+        self, investment_ids: list[str]
+    ) -> dict[str, Row]: ...
+
+    async def add_repayments(self, new_repayments: list[dict]) -> None: ...
+
+    async def apply_repayments(self, repaid: dict[str, Decimal]) -> None: ...
 
+
+class SqlAlchemyLoanRepository(SqlAlchemyRepository):
     async def add(self, loan: Loan) -> None:
-        stmt = insert(loans).values(
-            id=loan.id,
-            borrower_id=loan.borrower.id,
-            amount=loan.amount,
-            purpose=loan.purpose,
-            term_months=loan.term_months,
-            status=loan.status.value,
+        await self._queue(
+            _insert_loan,
+            {
+                "id": loan.id,
+                "borrower_id": loan.borrower.id,
+                "amount": loan.amount,
+                "purpose": loan.purpose,
+                "term_months": loan.term_months,
+                "status": loan.status.value,
+            },
+        )
+        await self._increment_loan_count(loan.borrower.id, loan.status)
+        await self._accumulate(
+            loan_status_totals,
+            [
+                {
+                    "status": loan.status,
+                    "shard": _shard(loan.id),
+                    "loan_count": 1,
+                    "total_amount": loan.amount,
+                }
+            ],
         )
-        await self.session.execute(stmt)
 
-    async def get(self, loan_id: UUID) -> Loan | None:
-        stmt = select(Loan).where(Loan.id == loan_id)
-        result = await self.session.execute(stmt)
-        return result.scalar_one_or_none()
+    async def change_status(
+        self, loan: Loan, from_status: LoanStatus, to_status: LoanStatus
+    ) -> bool:
+        """
+        Move a loan from one status to another and the borrower's loan
+        counts with it, in the caller's transaction. The loan is only
+        updated if it still has from_status; returns whether it was.
+        """
+        updated = await self._transition(loans.c.id == loan.id, from_status, to_status)
+        return updated == 1
 
-    async def list(
-        self,
-        borrower_id: UUID | None = None,
-        status: LoanStatus | None = None,
-    ) -> list[Loan]:
+    async def change_status_many(
+        self, loan_ids: list[str], from_status: LoanStatus, to_status: LoanStatus
+    ) -> int:
         """
-        List loans with optional filters.
-        Used to check borrower's loan history and status.
+        Same as change_status for many loans in one UPDATE; loans that no
+        longer have from_status are left alone.
+        Returns how many loans were updated.
         """
-        query = select(Loan)
+        if not loan_ids:
+            return 0
+        return await self._transition(loans.c.id.in_(loan_ids), from_status, to_status)
 
-        if borrower_id is not None:
-            query = query.where(Loan.borrower_id == borrower_id)
-        if status is not None:
-            query = query.where(Loan.status == status)
-        return self.session.execute(query).scalars().all()
+    async def fund(self, loan_id: str, amount: Decimal) -> bool:
+        """
+        Move an ACTIVE loan of exactly amount to FUNDED with a single
+        conditional UPDATE; returns whether it was.
+        """
+        funded = await self._transition(
+            (loans.c.id == loan_id) & (loans.c.amount == amount),
+            LoanStatus.ACTIVE,
+            LoanStatus.FUNDED,
+        )
+        return funded == 1
+
+    async def _transition(
+        self, condition, from_status: LoanStatus, to_status: LoanStatus
+    ) -> int:
+        stmt = (
+            update(loans)
+            .where(condition, loans.c.status == from_status)
+            .values(status=to_status)
+            .returning(loans.c.borrower_id, loans.c.id, loans.c.amount)
+        )
+        updated = (await self._execute(stmt)).all()
+        if not updated:
+            return 0
+        from_status, to_status = LoanStatus(from_status), LoanStatus(to_status)
+        await self._queue(
+            _shift_loan_count_stmt(from_status, to_status),
+            [{"b_borrower_id": row.borrower_id} for row in updated],
+        )
+        await self._accumulate(
+            loan_status_totals,
+            [
+                {
+                    "status": status,
+                    "shard": _shard(row.id),
+                    "loan_count": sign,
+                    "total_amount": sign * row.amount,
+                }
+                for row in updated
+                for status, sign in ((from_status, -1), (to_status, 1))
+            ],
+        )
+        if to_status == LoanStatus.FUNDED:
+            today = date.today()
+            await self._accumulate(
+                daily_funded_volume,
+                [
+                    {
+                        "day": today,
+                        "shard": _shard(row.id),
+                        "loan_count": 1,
+                        "total_amount": row.amount,
+                    }
+                    for row in updated
+                ],
+            )
+        return len(updated)
+
+    async def get(self, loan_id: UUID) -> Loan | None:
+        stmt = select(Loan).where(Loan.id == loan_id).options(joinedload(Loan.borrower))
+        result = await self._execute(stmt)
+        return result.scalar_one_or_none()
 
     async def get_loan_counts_by_status(
-        self, borrower_id: UUID
+        self, borrower_id: UUID, for_update: bool = False
     ) -> dict[LoanStatus, int]:
         """
-        Get counts of loans by status for a borrower in a single query.
+        Get counts of loans by status for a borrower.
+        Reads the maintained borrower_loan_counts row by primary key.
+        With for_update the row is created if missing and locked until the
+        transaction ends, serializing concurrent check-then-insert flows for
+        the same borrower.
         Returns a dictionary mapping status to count.
         """
+        query = select(borrower_loan_counts).where(
+            borrower_loan_counts.c.borrower_id == borrower_id
+        )
+        if for_update:
+            await self._execute(
+                _upsert_for(self.session)(borrower_loan_counts)
+                .values(borrower_id=borrower_id)
+                .on_conflict_do_nothing(
+                    index_elements=[borrower_loan_counts.c.borrower_id]
+                )
+            )
+            query = query.with_for_update()
+        row = (await self._execute(query)).first()
+        if row is None:
+            return {}
+        return {
+            status: row._mapping[_loan_count_column(status)] for status in LoanStatus
+        }
+
+    async def count_loans_by_status(self, borrower_id: UUID) -> dict[LoanStatus, int]:
+        """
+        Count a borrower's loans by status straight from the loans table.
+        Source of truth for checking the maintained counts.
+        """
+        # count(*) keeps this an index-only scan on (borrower_id, status)
         query = (
-            select(Loan.status, func.count(Loan.id).label("count"))
+            select(Loan.status, func.count().label("count"))
             .where(Loan.borrower_id == borrower_id)
             .group_by(Loan.status)
         )
-        result = await self.session.execute(query)
+        result = await self._execute(query)
         result = result.all()
         # Convert result to dictionary, defaulting to 0 for missing statuses
         return dict(result)
 
+    async def find_loan_count_drift(self) -> list[str]:
+        """
+        Return the ids of borrowers whose maintained loan counts differ from
+        their actual loans.
+        """
+        actual = {
+            row[0]: tuple(row[1:])
+            for row in await self._execute(self._loan_count_aggregate())
+        }
+        stored_columns = [_loan_count_column(status) for status in LoanStatus]
+        stored = {
+            row[0]: tuple(row[1:])
+            for row in await self._execute(
+                select(borrower_loan_counts.c.borrower_id, *stored_columns)
+            )
+        }
+        zero = (0,) * len(LoanStatus)
+        return sorted(
+            borrower_id
+            for borrower_id in actual.keys() | stored.keys()
+            if actual.get(borrower_id, zero) != stored.get(borrower_id, zero)
+        )
 
-class SqlAlchemyBorrowerRepository:
-    def __init__(self, session: AsyncSession):
-        self.session = session
+    async def rebuild_loan_counts(self, borrower_ids: list[str] | None = None) -> None:
+        """
+        Recompute the maintained loan counts from the loans table, for the
+        given borrowers or for everyone.
+        """
+        clear = delete(borrower_loan_counts)
+        aggregate = self._loan_count_aggregate()
+        if borrower_ids is not None:
+            clear = clear.where(borrower_loan_counts.c.borrower_id.in_(borrower_ids))
+            aggregate = aggregate.where(loans.c.borrower_id.in_(borrower_ids))
+        await self._execute(clear)
+        await self._execute(
+            insert(borrower_loan_counts).from_select(
+                ["borrower_id"]
+                + [_loan_count_column(status).name for status in LoanStatus],
+                aggregate,
+            )
+        )
+
+    @staticmethod
+    def _loan_count_aggregate():
+        return select(
+            loans.c.borrower_id,
+            *(
+                func.sum(case((loans.c.status == status, 1), else_=0))
+                for status in LoanStatus
+            ),
+        ).group_by(loans.c.borrower_id)
+
+    async def _increment_loan_count(self, borrower_id: str, status: LoanStatus) -> None:
+        status = LoanStatus(status)
+        stmt = _increment_loan_count_stmt(self.session.get_bind().dialect.name, status)
+        await self._queue(
+            stmt, {"borrower_id": borrower_id, _loan_count_column(status).name: 1}
+        )
+
+    async def list(
+        self,
+        borrower_id: UUID | None = None,
+        status: LoanStatus | None = None,
+        min_amount: Decimal | None = None,
+        max_amount: Decimal | None = None,
+        min_term_months: int | None = None,
+        max_term_months: int | None = None,
+        after: tuple[Decimal, str] | None = None,
+        limit: int | None = None,
+    ) -> list[LoanView]:
+        """
+        List loans with optional filters, ordered by amount then id, as
+        read-only projections.
+        Used to check borrower's loan history and status, and for the
+        marketplace, where (status, amount, id) is covered by an index.
+        Pages are keyset based: pass the (amount, id) of the last loan of
+        the previous page as after.
+        """
+        query = filter_loans(
+            select(*loans.c),
+            borrower_id=borrower_id,
+            status=status,
+            min_amount=min_amount,
+            max_amount=max_amount,
+            min_term_months=min_term_months,
+            max_term_months=max_term_months,
+            after=after,
+        )
+        if limit is not None:
+            query = query.limit(limit)
+        result = await self._execute(query)
+        return [LoanView(**row) for row in result.mappings()]
 
+
+class SqlAlchemyBorrowerRepository(SqlAlchemyRepository):
     async def add(self, borrower: Borrower) -> None:
-        stmt = insert(borrowers).values(
-            id=borrower.id,
-            name=borrower.name,
-            email=borrower.email,
-            credit_score=borrower.credit_score,
+        await self._queue(_insert_borrower, self._row(borrower))
+        await self._evict(borrower_cache_key(borrower.id))
+
+    async def add_many(self, new_borrowers: list[Borrower]) -> None:
+        """
+        Insert several borrowers with a single executemany round-trip.
+        """
+        if not new_borrowers:
+            return
+        await self._queue(
+            _insert_borrower, [self._row(borrower) for borrower in new_borrowers]
         )
-        await self.session.execute(stmt)
+        await self._evict(*(borrower_cache_key(b.id) for b in new_borrowers))
+
+    @staticmethod
+    def _row(borrower: Borrower) -> dict:
+        return {
+            "id": borrower.id,
+            "name": borrower.name,
+            "email": borrower.email,
+            "credit_score": borrower.credit_score,
+            "income": borrower.income,
+            "employment_years": borrower.employment_years,
+            "has_previous_loans": borrower.has_previous_loans,
+            "credit_score_status": borrower.credit_score_status,
+        }
 
     async def get(self, borrower_id: UUID) -> Borrower | None:
-        stmt = select(Borrower).where(Borrower.id == borrower_id)
-        result = await self.session.execute(stmt)
-        return result.scalar_one_or_none()
+        stmt = select(*borrowers.c).where(borrowers.c.id == borrower_id)
+        row = await self._get_row(borrower_cache_key(borrower_id), stmt)
+        return Borrower(**row) if row is not None else None
 
-    async def list(self) -> list[Borrower]:
-        stmt = select(Borrower)
-        result = await self.session.execute(stmt)
-        existing = result.scalars().all()
-        return existing
+    async def list_pending_credit_score_ids(self) -> list[str]:
+        stmt = select(borrowers.c.id).where(
+            borrowers.c.credit_score_status == CreditScoreStatus.PENDING
+        )
+        result = await self._execute(stmt)
+        return list(result.scalars())
 
+    async def get_scoring_inputs(self, borrower_ids: list[str]) -> list[Row]:
+        """
+        Fetch the scoring inputs of the given borrowers that still wait for
+        a credit score. Already scored borrowers are skipped, which makes
+        replayed scoring requests a no-op.
+        """
+        stmt = select(
+            borrowers.c.id,
+            borrowers.c.income,
+            borrowers.c.employment_years,
+            borrowers.c.has_previous_loans,
+        ).where(
+            borrowers.c.id.in_(borrower_ids),
+            borrowers.c.credit_score_status == CreditScoreStatus.PENDING,
+        )
+        result = await self._execute(stmt)
+        return result.all()
 
-class SqlAlchemyInvestorRepository:
-    def __init__(self, session: AsyncSession):
-        self.session = session
+    async def update_credit_scores(self, credit_scores: dict[str, int]) -> None:
+        """
+        Store calculated credit scores with a single executemany UPDATE.
+        Only pending borrowers are updated, so applying the same scores twice
+        is harmless.
+        """
+        if not credit_scores:
+            return
+        stmt = (
+            update(borrowers)
+            .where(
+                borrowers.c.id == bindparam("b_id"),
+                borrowers.c.credit_score_status == CreditScoreStatus.PENDING,
+            )
+            .values(
+                credit_score=bindparam("b_credit_score"),
+                credit_score_status=CreditScoreStatus.SCORED,
+            )
+        )
+        await self._queue(
+            stmt,
+            [
+                {"b_id": borrower_id, "b_credit_score": credit_score}
+                for borrower_id, credit_score in credit_scores.items()
+            ],
+        )
+        await self._evict(*map(borrower_cache_key, credit_scores))
+
+    async def mark_credit_score_failed(self, borrower_ids: list[str]) -> None:
+        stmt = (
+            update(borrowers)
+            .where(
+                borrowers.c.id.in_(borrower_ids),
+                borrowers.c.credit_score_status == CreditScoreStatus.PENDING,
+            )
+            .values(credit_score_status=CreditScoreStatus.FAILED)
+        )
+        await self._execute(stmt)
+        await self._evict(*map(borrower_cache_key, borrower_ids))
+
+    async def stream_scoring_inputs(
+        self, after_id: str | None = None, batch_size: int = 1000
+    ) -> AsyncIterator[list[Row]]:
+        """
+        Yield the scoring inputs and current score of every borrower that is
+        not waiting for a first score, in id order, batch_size rows at a
+        time from a server-side cursor. Borrowers missing an input cannot be
+        scored and are left out.
+        """
+        stmt = select(
+            borrowers.c.id,
+            borrowers.c.income,
+            borrowers.c.employment_years,
+            borrowers.c.has_previous_loans,
+            borrowers.c.credit_score,
+            borrowers.c.credit_score_status,
+        ).where(
+            borrowers.c.income.is_not(None),
+            borrowers.c.employment_years.is_not(None),
+            borrowers.c.has_previous_loans.is_not(None),
+            borrowers.c.credit_score_status != CreditScoreStatus.PENDING,
+        )
+        if after_id is not None:
+            stmt = stmt.where(borrowers.c.id > after_id)
+        stmt = stmt.order_by(borrowers.c.id).execution_options(yield_per=batch_size)
+        if self.batch:
+            await self.batch.flush(self.session)
+        result = await self.session.stream(stmt)
+        async for rows in result.partitions():
+            yield rows
+
+    async def set_credit_scores(self, credit_scores: dict[str, int]) -> int:
+        """
+        Overwrite the credit scores of already scored borrowers and mark them
+        as scored, returning the number of rows updated.
+        On Postgres the new scores are joined in with a single
+        UPDATE ... FROM; other databases get one executemany UPDATE.
+        """
+        if not credit_scores:
+            return 0
+        if self.session.get_bind().dialect.name == "postgresql":
+            ids = sorted(credit_scores)
+            result = await self._execute(
+                _set_credit_scores,
+                {
+                    "b_ids": ids,
+                    "b_credit_scores": [credit_scores[id_] for id_ in ids],
+                    "b_first_id": ids[0],
+                    "b_last_id": ids[-1],
+                },
+            )
+        else:
+            result = await self._execute(
+                _set_credit_score,
+                [
+                    {"b_id": borrower_id, "b_credit_score": credit_score}
+                    for borrower_id, credit_score in credit_scores.items()
+                ],
+            )
+        await self._evict(*map(borrower_cache_key, credit_scores))
+        return result.rowcount
+
+    async def stream(
+        self,
+        after_id: str | None = None,
+        min_credit_score: int | None = None,
+        max_credit_score: int | None = None,
+        email: str | None = None,
+        batch_size: int = 1000,
+    ) -> AsyncIterator[list[dict]]:
+        """
+        Yield matching borrowers in id order, batch_size rows at a time,
+        from a server-side cursor so memory use does not grow with the
+        number of rows.
+        """
+        stmt = filter_borrowers(
+            select(
+                borrowers.c.id,
+                borrowers.c.name,
+                borrowers.c.email,
+                borrowers.c.credit_score,
+                borrowers.c.credit_score_status,
+            ),
+            after_id,
+            min_credit_score,
+            max_credit_score,
+            email,
+        ).execution_options(yield_per=batch_size)
+        if self.batch:
+            await self.batch.flush(self.session)
+        result = await self.session.stream(stmt)
+        async for rows in result.mappings().partitions():
+            yield [
+                {**row, "credit_score_status": row["credit_score_status"].value}
+                for row in rows
+            ]
+
+    async def list(
+        self,
+        after_id: str | None = None,
+        limit: int | None = None,
+        min_credit_score: int | None = None,
+        max_credit_score: int | None = None,
+        email: str | None = None,
+    ) -> list[BorrowerView]:
+        """
+        List borrowers in id order, optionally filtered, as read-only
+        projections.
+        Pages are keyset based: pass the id of the last borrower of the
+        previous page as after_id.
+        """
+        stmt = filter_borrowers(
+            select(*borrowers.c), after_id, min_credit_score, max_credit_score, email
+        )
+        if limit is not None:
+            stmt = stmt.limit(limit)
+        result = await self._execute(stmt)
+        return [BorrowerView(**row) for row in result.mappings()]
 
+
+class SqlAlchemyInvestorRepository(SqlAlchemyRepository):
     async def add(self, investor: Investor) -> None:
-        stmt = insert(investors).values(
-            id=investor.id,
-            name=investor.name,
-            email=investor.email,
-            available_funds=investor.available_funds,
+        await self._queue(
+            _insert_investor,
+            {
+                "id": investor.id,
+                "name": investor.name,
+                "email": investor.email,
+                "available_funds": investor.available_funds,
+            },
         )
-        await self.session.execute(stmt)
+        await self._evict(investor_cache_key(investor.id))
 
     async def get(self, investor_id: UUID) -> Investor | None:
-        stmt = select(Investor).where(Investor.id == investor_id)
-        result = await self.session.execute(stmt)
-        return result.scalar_one_or_none()
+        stmt = select(*investors.c).where(investors.c.id == investor_id)
+        row = await self._get_row(investor_cache_key(investor_id), stmt)
+        return Investor(**row) if row is not None else None
 
+    async def reserve_funds(self, investor_id: str, amount: Decimal) -> bool:
+        """
+        Take amount from the investor's available funds if they cover it.
+        A single conditional UPDATE: concurrent reservations never
+        overdraw the balance and nothing has to be loaded or locked first.
+        Returns whether the funds were reserved.
+        """
+        stmt = (
+            update(investors)
+            .where(investors.c.id == investor_id, investors.c.available_funds >= amount)
+            .values(available_funds=investors.c.available_funds - amount)
+        )
+        result = await self._execute(stmt)
+        await self._evict(investor_cache_key(investor_id))
+        return result.rowcount == 1
 
-class SqlAlchemyInvestmentRepository:
-    def __init__(self, session: AsyncSession):
-        self.session = session
+    async def release_funds(self, investor_id: str, amount: Decimal) -> None:
+        stmt = (
+            update(investors)
+            .where(investors.c.id == investor_id)
+            .values(available_funds=investors.c.available_funds + amount)
+        )
+        await self._execute(stmt)
+        await self._evict(investor_cache_key(investor_id))
 
+
+class SqlAlchemyInvestmentRepository(SqlAlchemyRepository):
     async def add(self, investment: Investment) -> None:
-        stmt = insert(investments).values(
-            id=investment.id,
-            investor_id=investment.investor.id,
-            loan_id=investment.loan.id,
-            amount=investment.amount,
-            status=investment.status.value,
+        await self._queue(
+            _insert_investment,
+            {
+                "id": investment.id,
+                "investor_id": investment.investor.id,
+                "loan_id": investment.loan.id,
+                "amount": investment.amount,
+                "status": investment.status.value,
+            },
+        )
+        await self._add_exposure(
+            investment.investor.id, investment.amount, to_status=investment.status
         )
-        await self.session.execute(stmt)
 
     async def get(self, investment_id: UUID) -> Investment | None:
-        stmt = select(Investment).where(Investment.id == investment_id)
-        result = await self.session.execute(stmt)
+        """
+        Get an investment together with its investor, its loan and the
+        loan's borrower, loaded in the same query.
+        """
+        stmt = (
+            select(Investment)
+            .where(Investment.id == investment_id)
+            .options(
+                joinedload(Investment.investor),
+                joinedload(Investment.loan).joinedload(Loan.borrower),
+            )
+        )
+        result = await self._execute(stmt)
         return result.scalar_one_or_none()
+
+    async def add_for_open_loan(
+        self, investment_id: str, investor_id: str, loan_id: str, amount: Decimal
+    ) -> bool:
+        """
+        Insert a pending investment only if the loan is ACTIVE and asks for
+        exactly amount, checked in the same INSERT ... SELECT.
+        Returns whether the investment was created.
+        """
+        open_loan = select(
+            literal(investment_id, investments.c.id.type),
+            literal(investor_id, investments.c.investor_id.type),
+            loans.c.id,
+            loans.c.amount,
+            literal(InvestmentStatus.PENDING_APPROVAL, investments.c.status.type),
+        ).where(
+            loans.c.id == loan_id,
+            loans.c.status == LoanStatus.ACTIVE,
+            loans.c.amount == amount,
+        )
+        stmt = insert(investments).from_select(
+            ["id", "investor_id", "loan_id", "amount", "status"], open_loan
+        )
+        result = await self._execute(stmt)
+        if result.rowcount != 1:
+            return False
+        await self._add_exposure(
+            investor_id, amount, to_status=InvestmentStatus.PENDING_APPROVAL
+        )
+        return True
+
+    async def change_status(
+        self,
+        investment_id: str,
+        from_status: InvestmentStatus,
+        to_status: InvestmentStatus,
+    ) -> Row | None:
+        """
+        Move an investment to another status if it still has from_status.
+        Returns its investor_id, loan_id and amount if it did, None otherwise.
+        """
+        stmt = (
+            update(investments)
+            .where(
+                investments.c.id == investment_id,
+                investments.c.status == from_status,
+            )
+            .values(status=to_status)
+            .returning(
+                investments.c.investor_id, investments.c.loan_id, investments.c.amount
+            )
+        )
+        updated = (await self._execute(stmt)).one_or_none()
+        if updated is not None:
+            await self._add_exposure(
+                updated.investor_id, updated.amount, from_status, to_status
+            )
+        return updated
+
+    async def _add_exposure(
+        self,
+        investor_id: str,
+        amount: Decimal,
+        from_status: InvestmentStatus | None = None,
+        to_status: InvestmentStatus | None = None,
+    ) -> None:
+        """
+        Move amount between the investor's exposure columns as one of their
+        investments goes from one status to the other.
+        """
+        row = dict.fromkeys(
+            ["pending_amount", "invested_amount", "repaid_amount"], Decimal("0")
+        )
+        if from_status in _EXPOSURE_COLUMNS:
+            row[_EXPOSURE_COLUMNS[InvestmentStatus(from_status)]] -= amount
+        if to_status in _EXPOSURE_COLUMNS:
+            row[_EXPOSURE_COLUMNS[InvestmentStatus(to_status)]] += amount
+        if any(row.values()):
+            await self._accumulate(
+                investor_exposure, [{"investor_id": investor_id, **row}]
+            )
+
+    async def get_repayment_state(self, investment_ids: list[str]) -> dict[str, Row]:
+        """
+        Lock the given investments until the transaction ends and return
+        their id, loan_id, amount, repaid_total and status, keyed by id.
+        Rows are locked in id order so concurrent batches cannot deadlock.
+        """
+        stmt = (
+            select(
+                investments.c.id,
+                investments.c.loan_id,
+                investments.c.amount,
+                investments.c.repaid_total,
+                investments.c.status,
+            )
+            .where(investments.c.id.in_(investment_ids))
+            .order_by(investments.c.id)
+            .with_for_update()
+        )
+        result = await self._execute(stmt)
+        return {row.id: row for row in result}
+
+    async def add_repayments(self, new_repayments: list[dict]) -> None:
+        """
+        Queue repayment rows (id, investment_id, amount and optionally
+        created_at) for a single executemany.
+        """
+        await self._queue(_insert_repayment, new_repayments)
+
+    async def apply_repayments(self, repaid: dict[str, Decimal]) -> None:
+        """
+        Add the repaid amounts to the investments' repaid_total, completing
+        the ones that are fully repaid, and to their investors' exposure, as
+        one executemany each.
+        """
+        rows = [
+            {"b_investment_id": investment_id, "b_amount": amount}
+            for investment_id, amount in repaid.items()
+        ]
+        await self._queue(_apply_repayment, rows)
+        await self._queue(_add_repaid_exposure, rows)
+
+
+class SqlAlchemyAnalyticsRepository(SqlAlchemyRepository):
+    async def rebuild(self) -> None:
+        """
+        Recompute the loan status totals and the investor exposure from the
+        loans and investments tables, as a periodic rollup or after drift.
+        Funded volume per day is history no other table keeps, so it is left
+        as it is.
+        """
+        await self._execute(delete(loan_status_totals))
+        await self._execute(
+            insert(loan_status_totals).from_select(
+                ["status", "shard", "loan_count", "total_amount"],
+                select(
+                    loans.c.status,
+                    literal(0),
+                    func.count(),
+                    func.sum(loans.c.amount),
+                ).group_by(loans.c.status),
+            )
+        )
+
+        def total(column, *statuses: InvestmentStatus):
+            return func.sum(case((investments.c.status.in_(statuses), column), else_=0))
+
+        approved = (InvestmentStatus.ACTIVE, InvestmentStatus.COMPLETED)
+        await self._execute(delete(investor_exposure))
+        await self._execute(
+            insert(investor_exposure).from_select(
+                ["investor_id", "pending_amount", "invested_amount", "repaid_amount"],
+                select(
+                    investments.c.investor_id,
+                    total(investments.c.amount, InvestmentStatus.PENDING_APPROVAL),
+                    total(investments.c.amount, *approved),
+                    total(investments.c.repaid_total, *approved),
+                ).group_by(investments.c.investor_id),
+            )
+        )
+
+
+class SqlAlchemyCheckpointRepository(SqlAlchemyRepository):
+    async def get(self, job: str) -> Row | None:
+        stmt = select(job_checkpoints.c.last_id, job_checkpoints.c.rows_done).where(
+            job_checkpoints.c.job == job
+        )
+        return (await self._execute(stmt)).one_or_none()
+
+    async def save(self, job: str, last_id: str, rows_done: int) -> None:
+        stmt = _upsert_for(self.session)(job_checkpoints).values(
+            job=job, last_id=last_id, rows_done=rows_done
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[job_checkpoints.c.job],
+            set_={
+                "last_id": stmt.excluded.last_id,
+                "rows_done": stmt.excluded.rows_done,
+                "updated_at": func.now(),
+            },
+        )
+        await self._execute(stmt)
+
+    async def clear(self, job: str) -> None:
+        await self._execute(delete(job_checkpoints).where(job_checkpoints.c.job == job))
+
+
+class SqlAlchemyIdempotencyRepository(SqlAlchemyRepository):
+    async def get(self, key: str) -> Row | None:
+        stmt = select(
+            idempotency_keys.c.fingerprint,
+            idempotency_keys.c.status_code,
+            idempotency_keys.c.content_type,
+            idempotency_keys.c.body,
+            idempotency_keys.c.expires_at,
+        ).where(idempotency_keys.c.key == key)
+        return (await self._execute(stmt)).one_or_none()
+
+    async def reserve(
+        self, key: str, fingerprint: str, now: datetime, expires_at: datetime
+    ) -> bool:
+        """
+        Claim a key for a request about to run, taking over an expired row.
+        Returns False when another request holds the key or has stored a
+        response under it.
+        """
+        stmt = _upsert_for(self.session)(idempotency_keys).values(
+            key=key, fingerprint=fingerprint, expires_at=expires_at
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[idempotency_keys.c.key],
+            set_={
+                "fingerprint": stmt.excluded.fingerprint,
+                "status_code": None,
+                "content_type": None,
+                "body": None,
+                "expires_at": stmt.excluded.expires_at,
+            },
+            where=idempotency_keys.c.expires_at <= now,
+        ).returning(idempotency_keys.c.key)
+        return (await self._execute(stmt)).first() is not None
+
+    async def complete(
+        self,
+        key: str,
+        status_code: int,
+        content_type: str | None,
+        body: str,
+        expires_at: datetime,
+    ) -> None:
+        await self._execute(
+            update(idempotency_keys)
+            .where(idempotency_keys.c.key == key)
+            .values(
+                status_code=status_code,
+                content_type=content_type,
+                body=body,
+                expires_at=expires_at,
+            )
+        )
+
+    async def release(self, key: str) -> None:
+        await self._execute(
+            delete(idempotency_keys).where(
+                idempotency_keys.c.key == key, idempotency_keys.c.status_code.is_(None)
+            )
+        )
+
+    async def delete_expired(self, now: datetime) -> int:
+        result = await self._execute(
+            delete(idempotency_keys).where(idempotency_keys.c.expires_at <= now)
+        )
+        return result.rowcount
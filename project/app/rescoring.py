@@ -0,0 +1,198 @@
+# app/rescoring.py
+
+"""
+Bulk rescoring of every scored borrower, for when the credit score formula
+in app.helper changes.
+One reader streams borrowers in id order from a server-side cursor and
+hands chunks to a few workers. Each worker scores its chunk in one pass and
+writes back only the scores that changed, with a single statement in its
+own transaction. After every chunk the job checkpoints the last id below
+which every chunk is done, so an interrupted run picks up from there; a
+completed run clears its checkpoint, and the next one starts over.
+"""
+
+import asyncio
+import logging
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+
+from sqlalchemy import Row
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.cache import CacheBackend
+from app.helper import calculate_credit_scores
+from app.models import CreditScoreStatus
+from app.repository import SqlAlchemyCheckpointRepository
+from app.unit_of_work import SqlAlchemyUnitOfWork
+
+
+logger = logging.getLogger(__name__)
+
+RESCORE_JOB = "rescore_borrowers"
+
+
+@dataclass
+class RescoreProgress:
+    # Borrowers read and rescored so far by this run
+    scanned: int = 0
+    updated: int = 0
+    # Where this run started, None for a fresh run
+    resumed_after: str | None = None
+    started: float = field(default_factory=time.perf_counter)
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    @property
+    def rows_per_second(self) -> float:
+        elapsed = self.elapsed
+        return self.scanned / elapsed if elapsed else 0.0
+
+
+class BorrowerRescoringJob:
+    """
+    Rescore every borrower that already has a score (or failed to get one)
+    with the current formula. Borrowers still waiting for their first score
+    are left to the credit score workers.
+    """
+
+    def __init__(
+        self,
+        session_maker: async_sessionmaker[AsyncSession],
+        workers: int = 4,
+        chunk_size: int = 1000,
+        on_progress: Callable[[RescoreProgress], None] | None = None,
+        progress_interval: float = 5.0,
+        cache: CacheBackend | None = None,
+    ):
+        self.session_maker = session_maker
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.on_progress = on_progress
+        self.progress_interval = progress_interval
+        self.cache = cache
+
+    async def run(self, restart: bool = False) -> RescoreProgress:
+        """
+        Rescore from the checkpoint left by an interrupted run, or from the
+        start with restart=True or when there is none.
+        """
+        async with self.session_maker() as session:
+            checkpoints = SqlAlchemyCheckpointRepository(session)
+            if restart:
+                await checkpoints.clear(RESCORE_JOB)
+                await session.commit()
+            checkpoint = await checkpoints.get(RESCORE_JOB)
+
+        self._progress = RescoreProgress()
+        self._done_before = 0
+        if checkpoint is not None:
+            self._progress.resumed_after = checkpoint.last_id
+            self._done_before = checkpoint.rows_done
+            logger.info("Resuming rescoring after borrower %s", checkpoint.last_id)
+        # Chunks finished out of order, by sequence number, until every
+        # chunk before them is finished too
+        self._finished: dict[int, tuple[str, int]] = {}
+        self._next_chunk = 0
+        self._checkpointed = self._done_before
+        self._reported = time.perf_counter()
+        self._checkpoint_lock = asyncio.Lock()
+
+        chunks: asyncio.Queue[tuple[int, list[Row]] | None] = asyncio.Queue(
+            maxsize=self.workers * 2
+        )
+        try:
+            async with asyncio.TaskGroup() as tasks:
+                tasks.create_task(self._read(chunks, self._progress.resumed_after))
+                for _ in range(self.workers):
+                    tasks.create_task(self._work(chunks))
+        except BaseException:
+            logger.error(
+                "Rescoring stopped after %d borrowers; run it again to resume",
+                self._checkpointed,
+            )
+            raise
+
+        async with self.session_maker() as session:
+            await SqlAlchemyCheckpointRepository(session).clear(RESCORE_JOB)
+            await session.commit()
+        self._report()
+        logger.info(
+            "Rescored %d borrowers, %d changed, in %.1fs",
+            self._progress.scanned,
+            self._progress.updated,
+            self._progress.elapsed,
+        )
+        return self._progress
+
+    async def _read(self, chunks: asyncio.Queue, after_id: str | None) -> None:
+        async with self._unit_of_work() as uow:
+            sequence = 0
+            async for rows in uow.borrowers.stream_scoring_inputs(
+                after_id, self.chunk_size
+            ):
+                await chunks.put((sequence, rows))
+                sequence += 1
+        for _ in range(self.workers):
+            await chunks.put(None)
+
+    async def _work(self, chunks: asyncio.Queue) -> None:
+        while (chunk := await chunks.get()) is not None:
+            sequence, rows = chunk
+            updated = await self._rescore(rows)
+            self._progress.scanned += len(rows)
+            self._progress.updated += updated
+            await self._finish(sequence, rows[-1].id, len(rows))
+
+    async def _rescore(self, rows: list[Row]) -> int:
+        ids, incomes, employment_years, has_previous_loans, scores, statuses = zip(
+            *rows
+        )
+        new_scores = calculate_credit_scores(
+            incomes, employment_years, has_previous_loans
+        )
+        changed = {
+            borrower_id: new_score
+            for borrower_id, new_score, score, status in zip(
+                ids, new_scores, scores, statuses
+            )
+            if new_score != score or status != CreditScoreStatus.SCORED
+        }
+        if not changed:
+            return 0
+        async with self._unit_of_work() as uow:
+            updated = await uow.borrowers.set_credit_scores(changed)
+            await uow.commit()
+        return updated
+
+    async def _finish(self, sequence: int, last_id: str, rows: int) -> None:
+        """
+        Move the checkpoint past every chunk finished without a gap before
+        it. Saves are serialized, so the checkpoint only moves forward.
+        """
+        async with self._checkpoint_lock:
+            self._finished[sequence] = (last_id, rows)
+            checkpoint = None
+            while self._next_chunk in self._finished:
+                checkpoint, rows = self._finished.pop(self._next_chunk)
+                self._checkpointed += rows
+                self._next_chunk += 1
+            if checkpoint is None:
+                return
+            async with self.session_maker() as session:
+                await SqlAlchemyCheckpointRepository(session).save(
+                    RESCORE_JOB, checkpoint, self._checkpointed
+                )
+                await session.commit()
+        if time.perf_counter() - self._reported >= self.progress_interval:
+            self._report()
+
+    def _report(self) -> None:
+        self._reported = time.perf_counter()
+        if self.on_progress is not None:
+            self.on_progress(self._progress)
+
+    def _unit_of_work(self) -> SqlAlchemyUnitOfWork:
+        return SqlAlchemyUnitOfWork(self.session_maker, self.cache)
@@ -1,21 +1,44 @@
 # app/services.py
 
 import logging
+from collections.abc import AsyncIterable, AsyncIterator, Iterable
+from datetime import date
+from decimal import Decimal
+from itertools import islice
+from typing import TypeVar
+from uuid import uuid4
 
-from pydantic import BaseModel
-from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import BaseModel, Field
+from sqlalchemy.exc import SQLAlchemyError
 
-from app.helper import calculate_credit_score
-from app.models import Borrower, InsufficientCreditScoreError, Loan, LoanStatus
-from app.repository import (
-    SqlAlchemyBorrowerRepository,
-    SqlAlchemyInvestorRepository,
-    SqlAlchemyLoanRepository,
+from app.credit_scoring import CreditScoreQueue, CreditScoreRequest
+from app.helper import calculate_credit_score, calculate_credit_scores
+from app.models import (
+    Borrower,
+    CreditScorePendingError,
+    CreditScoreStatus,
+    InsufficientCreditScoreError,
+    InsufficientFundsError,
+    InvalidInvestmentAmountError,
+    InvalidInvestmentStatusError,
+    InvestmentStatus,
+    Investor,
+    Loan,
+    LoanAlreadyFundedError,
+    LoanStatus,
 )
+from app.unit_of_work import UnitOfWork
 
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+BULK_BORROWER_ERROR = "Could not create borrower"
+REPAYMENT_ERROR = "Could not apply repayment"
+# Range of the BigInteger columns borrower profiles are stored in
+MAX_BIGINT = 2**63 - 1
+
 
 class BorrowerDTO(BaseModel):
     id: str
@@ -25,13 +48,26 @@ class BorrowerDTO(BaseModel):
 
 
 class CreateBorrowerDTO(BaseModel):
-    name: str
-    email: str
-    income: int
-    employment_years: int
+    name: str = Field(max_length=255)
+    email: str = Field(max_length=255)
+    income: int = Field(ge=-MAX_BIGINT, le=MAX_BIGINT)
+    employment_years: int = Field(ge=-MAX_BIGINT, le=MAX_BIGINT)
     has_previous_loans: bool
 
 
+class BulkBorrowerResultDTO(BaseModel):
+    index: int
+    borrower_id: str | None = None
+    credit_score: int | None = None
+    error: str | None = None
+
+
+class BorrowerFilterDTO(BaseModel):
+    min_credit_score: int | None = None
+    max_credit_score: int | None = None
+    email: str | None = None
+
+
 class LoanApplicationDTO(BaseModel):
     borrower_id: str
     amount: int
@@ -45,39 +81,161 @@ class InvestorCreateDTO(BaseModel):
     available_funds: int
 
 
+class InvestmentCreateDTO(BaseModel):
+    investor_id: str
+    loan_id: str
+    amount: Decimal = Field(gt=0, max_digits=10, decimal_places=2)
+
+
+class RepaymentDTO(BaseModel):
+    investment_id: str
+    amount: Decimal = Field(gt=0, max_digits=10, decimal_places=2)
+    paid_at: date | None = None
+
+
+class RepaymentResultDTO(BaseModel):
+    index: int
+    repayment_id: str | None = None
+    investment_id: str | None = None
+    remaining_amount: Decimal | None = None
+    error: str | None = None
+
+
 class LoanApplicationError(Exception):
     pass
 
 
+class NotFoundError(Exception):
+    pass
+
+
 async def create_borrower(
     prospect_borrower: CreateBorrowerDTO,
-    borrower_repo: SqlAlchemyBorrowerRepository,
-    session: AsyncSession,
-) -> tuple[str, int]:
+    uow: UnitOfWork,
+    score_queue: CreditScoreQueue | None = None,
+) -> Borrower:
     """
-    Create a new borrower with calculated credit score.
-    Returns tuple of (borrower_id, credit_score)
+    Create a new borrower.
+    With a score queue the borrower is stored with a pending credit score and
+    a scoring request is published once the borrower is committed; without
+    one the credit score is calculated inline.
     """
-    logger.info("Starting borrower creation")
-    credit_score = calculate_credit_score(
+    borrower = Borrower(
+        name=prospect_borrower.name,
+        email=prospect_borrower.email,
+        credit_score=None,
         income=prospect_borrower.income,
         employment_years=prospect_borrower.employment_years,
         has_previous_loans=prospect_borrower.has_previous_loans,
+        credit_score_status=CreditScoreStatus.PENDING,
     )
+    if score_queue is None:
+        borrower.credit_score = calculate_credit_score(
+            income=prospect_borrower.income,
+            employment_years=prospect_borrower.employment_years,
+            has_previous_loans=prospect_borrower.has_previous_loans,
+        )
+        borrower.credit_score_status = CreditScoreStatus.SCORED
 
-    borrower = Borrower(
-        name=prospect_borrower.name,
-        email=prospect_borrower.email,
-        credit_score=credit_score,
+    async with uow:
+        await uow.borrowers.add(borrower)
+        await uow.commit()
+    if score_queue is not None:
+        await score_queue.publish(CreditScoreRequest(borrower_id=borrower.id))
+    return borrower
+
+
+async def _chunks(
+    rows: Iterable[T] | AsyncIterable[T], size: int
+) -> AsyncIterator[list[T]]:
+    """
+    Lists of up to size rows. Rows streamed from a request are taken as
+    they arrive.
+    """
+    if not isinstance(rows, AsyncIterable):
+        rows = iter(rows)
+        while chunk := list(islice(rows, size)):
+            yield chunk
+        return
+    chunk = []
+    async for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+async def create_borrowers_bulk(
+    prospect_borrowers: Iterable[CreateBorrowerDTO] | AsyncIterable[CreateBorrowerDTO],
+    uow: UnitOfWork,
+    chunk_size: int = 1000,
+) -> list[BulkBorrowerResultDTO]:
+    """
+    Create many borrowers at once.
+    Each chunk is scored in one pass, inserted with a single executemany and
+    committed once. A failing chunk is rolled back and retried in halves,
+    so only the rows that cannot be inserted are reported as failed.
+    Returns one result per input row, in input order.
+    """
+    results = []
+    offset = 0
+    async with uow:
+        async for chunk in _chunks(prospect_borrowers, chunk_size):
+            results.extend(await _create_borrower_chunk(chunk, offset, uow))
+            offset += len(chunk)
+    logger.info("Bulk borrower creation processed %d rows", offset)
+    return results
+
+
+async def _create_borrower_chunk(
+    chunk: list[CreateBorrowerDTO],
+    offset: int,
+    uow: UnitOfWork,
+) -> list[BulkBorrowerResultDTO]:
+    credit_scores = calculate_credit_scores(
+        incomes=[prospect.income for prospect in chunk],
+        employment_years=[prospect.employment_years for prospect in chunk],
+        has_previous_loans=[prospect.has_previous_loans for prospect in chunk],
     )
-    await borrower_repo.add(borrower)
-    await session.commit()
-    return str(borrower.id), credit_score
+    new_borrowers = [
+        Borrower(
+            name=prospect.name,
+            email=prospect.email,
+            credit_score=score,
+            income=prospect.income,
+            employment_years=prospect.employment_years,
+            has_previous_loans=prospect.has_previous_loans,
+        )
+        for prospect, score in zip(chunk, credit_scores)
+    ]
+    try:
+        await uow.borrowers.add_many(new_borrowers)
+        await uow.commit()
+    except SQLAlchemyError as e:
+        await uow.rollback()
+        if len(chunk) == 1:
+            # The error carries the statement and its parameters, so it
+            # is only logged
+            logger.error("Bulk borrower row %d failed: %s", offset, e)
+            return [BulkBorrowerResultDTO(index=offset, error=BULK_BORROWER_ERROR)]
+        middle = len(chunk) // 2
+        return [
+            *await _create_borrower_chunk(chunk[:middle], offset, uow),
+            *await _create_borrower_chunk(chunk[middle:], offset + middle, uow),
+        ]
+    return [
+        BulkBorrowerResultDTO(
+            index=offset + i,
+            borrower_id=str(borrower.id),
+            credit_score=borrower.credit_score,
+        )
+        for i, borrower in enumerate(new_borrowers)
+    ]
 
 
-async def apply_for_loan(
-    loan_object: Loan, loan_repo: SqlAlchemyLoanRepository, session: AsyncSession
-) -> str:
+async def apply_for_loan(application: LoanApplicationDTO, uow: UnitOfWork) -> str:
     """
     Apply for a new loan with the following rules:
     - If borrower has 2 or more FUNDED or REPAYING loans, reject
@@ -85,15 +243,42 @@ async def apply_for_loan(
     - If borrower has 2 ACTIVE loans, allow up to 4 ACTIVE loans
     - Otherwise, allow the loan
     """
-    # Get all loan counts in a single query
-    # CHECK SCORING OF BORROWER
-    if not loan_object.borrower.can_create_loan():
-        raise InsufficientCreditScoreError("""Borrower has insufficient credit score
-        (minimum 600 required)""")
+    async with uow:
+        borrower = await uow.borrowers.get(application.borrower_id)
+        if borrower is None:
+            raise NotFoundError("Borrower not found")
+
+        # CHECK SCORING OF BORROWER
+        if borrower.is_credit_score_pending:
+            raise CreditScorePendingError(
+                "Borrower credit score is still being calculated"
+            )
+        if not borrower.can_create_loan():
+            raise InsufficientCreditScoreError("""Borrower has insufficient credit score
+            (minimum 600 required)""")
+
+        # Lock the borrower's loan counts so concurrent applications for the
+        # same borrower are checked and inserted one at a time. A rejected
+        # application leaves the unit of work uncommitted, which rolls back
+        # and releases the lock right away.
+        loan_counts = await uow.loans.get_loan_counts_by_status(
+            borrower.id, for_update=True
+        )
+        _check_loan_limits(loan_counts)
+
+        # If we get here, the loan is allowed
+        loan = Loan(
+            borrower=borrower,
+            amount=application.amount,
+            term_months=application.term_months,
+            purpose=application.purpose,
+        )
+        await uow.loans.add(loan)
+        await uow.commit()
+    return loan.id
 
-    # Get all loan counts for the borrower
-    loan_counts = await loan_repo.get_loan_counts_by_status(loan_object.borrower.id)
 
+def _check_loan_limits(loan_counts: dict[LoanStatus, int]) -> None:
     # Check for defaulted loans
     if loan_counts.get(LoanStatus.DEFAULTED, 0) > 0:
         raise LoanApplicationError("""Cannot apply for loan:
@@ -113,22 +298,220 @@ async def apply_for_loan(
         raise LoanApplicationError("""Cannot apply for loan:
         Borrower has maximum allowed pending approval loans""")
 
-    # If we get here, the loan is allowed
-    await loan_repo.add(loan_object)
-    await session.commit()
-    return loan_object.id
+
+async def invest(investment: InvestmentCreateDTO, uow: UnitOfWork) -> str:
+    """
+    Reserve the investor's funds and record a pending investment.
+    Funds are taken with a conditional UPDATE and the investment is only
+    inserted if the loan is still open for exactly that amount, so nothing
+    is loaded or locked up front. If either step fails nothing is committed.
+    """
+    investment_id = str(uuid4())
+    async with uow:
+        reserved = await uow.investors.reserve_funds(
+            investment.investor_id, investment.amount
+        )
+        if not reserved:
+            if await uow.investors.get(investment.investor_id) is None:
+                raise NotFoundError("Investor not found")
+            raise InsufficientFundsError(
+                f"Insufficient funds for investment of {investment.amount}"
+            )
+
+        created = await uow.investments.add_for_open_loan(
+            investment_id,
+            investment.investor_id,
+            investment.loan_id,
+            investment.amount,
+        )
+        if not created:
+            loan = await uow.loans.get(investment.loan_id)
+            if loan is None:
+                raise NotFoundError("Loan not found")
+            if loan.status != LoanStatus.ACTIVE:
+                raise LoanAlreadyFundedError(f"Loan {loan.id} cannot accept investment")
+            raise InvalidInvestmentAmountError(
+                f"Investment amount {investment.amount} must match "
+                f"loan amount {loan.amount}"
+            )
+        await uow.commit()
+    return investment_id
+
+
+async def approve_investment(investment_id: str, uow: UnitOfWork) -> None:
+    """
+    Approve a pending investment and fund its loan.
+    Both aggregates change in one transaction with conditional updates, so
+    a concurrent approval or rejection of the same investment or loan makes
+    this one fail instead of overwriting it.
+    """
+    async with uow:
+        investment = await uow.investments.change_status(
+            investment_id, InvestmentStatus.PENDING_APPROVAL, InvestmentStatus.ACTIVE
+        )
+        if investment is None:
+            await _raise_not_pending(investment_id, "approve", uow)
+        if not await uow.loans.fund(investment.loan_id, investment.amount):
+            raise LoanAlreadyFundedError(
+                f"Loan {investment.loan_id} cannot accept investment"
+            )
+        await uow.commit()
+
+
+async def reject_investment(investment_id: str, uow: UnitOfWork) -> None:
+    """
+    Reject a pending investment and give the investor the funds back.
+    """
+    async with uow:
+        investment = await uow.investments.change_status(
+            investment_id,
+            InvestmentStatus.PENDING_APPROVAL,
+            InvestmentStatus.REJECTED,
+        )
+        if investment is None:
+            await _raise_not_pending(investment_id, "reject", uow)
+        await uow.investors.release_funds(investment.investor_id, investment.amount)
+        await uow.commit()
+
+
+async def _raise_not_pending(investment_id: str, action: str, uow: UnitOfWork):
+    if await uow.investments.get(investment_id) is None:
+        raise NotFoundError("Investment not found")
+    raise InvalidInvestmentStatusError(f"Can only {action} pending investments")
+
+
+async def ingest_repayments(
+    repayments: Iterable[RepaymentDTO] | AsyncIterable[RepaymentDTO],
+    uow: UnitOfWork,
+    chunk_size: int = 1000,
+) -> list[RepaymentResultDTO]:
+    """
+    Apply a batch of repayments, such as a daily bank file.
+    Each chunk locks the investments it touches, validates its rows in order
+    against their running repaid totals, then inserts the repayments and
+    updates the totals with one executemany each and commits once. Loans
+    start REPAYING with their first repayment and are PAID once their
+    investment is fully repaid. A failing chunk is rolled back and retried
+    in halves, so only the rows that cannot be applied are reported as failed.
+    Returns one result per input row, in input order.
+    """
+    results = []
+    offset = 0
+    async with uow:
+        async for chunk in _chunks(repayments, chunk_size):
+            results.extend(await _ingest_repayment_chunk(chunk, offset, uow))
+            offset += len(chunk)
+    logger.info("Repayment ingestion processed %d rows", offset)
+    return results
+
+
+async def _ingest_repayment_chunk(
+    chunk: list[RepaymentDTO],
+    offset: int,
+    uow: UnitOfWork,
+) -> list[RepaymentResultDTO]:
+    state = await uow.investments.get_repayment_state(
+        sorted({repayment.investment_id for repayment in chunk})
+    )
+    repaid = {investment_id: row.repaid_total for investment_id, row in state.items()}
+    deltas: dict[str, Decimal] = {}
+    new_repayments, results = [], []
+    for i, repayment in enumerate(chunk):
+        investment = state.get(repayment.investment_id)
+        result = RepaymentResultDTO(
+            index=offset + i, investment_id=repayment.investment_id
+        )
+        results.append(result)
+        if investment is None:
+            result.error = "Investment not found"
+            continue
+        remaining = investment.amount - repaid[investment.id]
+        if investment.status != InvestmentStatus.ACTIVE or remaining == 0:
+            result.error = "Only active investments can be repaid"
+            continue
+        if repayment.amount > remaining:
+            result.error = "Repayment amount exceeds remaining investment amount"
+            continue
+
+        repaid[investment.id] += repayment.amount
+        deltas[investment.id] = (
+            deltas.get(investment.id, Decimal("0")) + repayment.amount
+        )
+        result.repayment_id = str(uuid4())
+        result.remaining_amount = remaining - repayment.amount
+        new_repayments.append(
+            {
+                "id": result.repayment_id,
+                "investment_id": investment.id,
+                "amount": repayment.amount,
+                "created_at": repayment.paid_at or date.today(),
+            }
+        )
+
+    if not new_repayments:
+        # Nothing to write, release the locks
+        await uow.rollback()
+        return results
+    repaid_loan_ids = sorted({state[key].loan_id for key in deltas})
+    paid_loan_ids = sorted(
+        state[key].loan_id for key in deltas if repaid[key] == state[key].amount
+    )
+    try:
+        await uow.investments.add_repayments(new_repayments)
+        await uow.investments.apply_repayments(deltas)
+        await uow.loans.change_status_many(
+            repaid_loan_ids, LoanStatus.FUNDED, LoanStatus.REPAYING
+        )
+        await uow.loans.change_status_many(
+            paid_loan_ids, LoanStatus.REPAYING, LoanStatus.PAID
+        )
+        await uow.commit()
+    except SQLAlchemyError as e:
+        await uow.rollback()
+        if len(chunk) == 1:
+            logger.error("Repayment row %d failed: %s", offset, e)
+            return [
+                RepaymentResultDTO(
+                    index=offset,
+                    investment_id=chunk[0].investment_id,
+                    error=REPAYMENT_ERROR,
+                )
+            ]
+        # Halves in order, so later rows see the repayments applied before them
+        middle = len(chunk) // 2
+        return [
+            *await _ingest_repayment_chunk(chunk[:middle], offset, uow),
+            *await _ingest_repayment_chunk(chunk[middle:], offset + middle, uow),
+        ]
+    return results
 
 
-async def get_borrowers(
-    borrower_repo: SqlAlchemyBorrowerRepository, session: AsyncSession
-) -> list[Borrower]:
-    return await borrower_repo.list()
+async def get_borrower(borrower_id: str, uow: UnitOfWork) -> Borrower:
+    async with uow:
+        borrower = await uow.borrowers.get(borrower_id)
+    if borrower is None:
+        raise NotFoundError("Borrower not found")
+    return borrower
+
+
+async def stream_borrowers(
+    uow: UnitOfWork,
+    filters: BorrowerFilterDTO | None = None,
+    after_id: str | None = None,
+) -> AsyncIterator[list[dict]]:
+    """
+    Yield every matching borrower as plain dicts, in batches.
+    The unit of work stays open until the caller has consumed the stream.
+    """
+    filters = filters or BorrowerFilterDTO()
+    async with uow:
+        async for rows in uow.borrowers.stream(
+            after_id=after_id, **filters.model_dump()
+        ):
+            yield rows
 
 
-async def create_investor(
-    investor: InvestorCreateDTO,
-    investor_repo: SqlAlchemyInvestorRepository,
-    session: AsyncSession,
-) -> None:
-    await investor_repo.add(investor)
-    await session.commit()
+async def create_investor(investor: Investor, uow: UnitOfWork) -> None:
+    async with uow:
+        await uow.investors.add(investor)
+        await uow.commit()
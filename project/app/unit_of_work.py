@@ -0,0 +1,98 @@
+# app/unit_of_work.py
+
+from typing import Protocol
+
+from fastapi import Request
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.cache import CacheBackend
+from app.repository import (
+    BorrowerRepository,
+    InvestmentRepository,
+    InvestorRepository,
+    LoanRepository,
+    SqlAlchemyBorrowerRepository,
+    SqlAlchemyInvestmentRepository,
+    SqlAlchemyInvestorRepository,
+    SqlAlchemyLoanRepository,
+    WriteBatch,
+)
+
+
+class UnitOfWork(Protocol):
+    borrowers: BorrowerRepository
+    loans: LoanRepository
+    investors: InvestorRepository
+    investments: InvestmentRepository
+
+    async def __aenter__(self) -> "UnitOfWork": ...
+
+    async def __aexit__(self, *args) -> None: ...
+
+    async def commit(self) -> None: ...
+
+    async def rollback(self) -> None: ...
+
+
+class SqlAlchemyUnitOfWork:
+    """
+    One use case, one transaction.
+    Owns the session and the repositories for the duration of an
+    `async with` block. Repository writes are buffered and sent at commit,
+    one executemany per statement; leaving the block without committing
+    rolls everything back. Cached rows written in the block are evicted
+    again once it ends.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        cache: CacheBackend | None = None,
+    ):
+        self.session_factory = session_factory
+        self.cache = cache
+
+    async def __aenter__(self) -> "SqlAlchemyUnitOfWork":
+        self.session = self.session_factory()
+        self.batch = WriteBatch()
+        self.borrowers = SqlAlchemyBorrowerRepository(
+            self.session, self.batch, self.cache
+        )
+        self.loans = SqlAlchemyLoanRepository(self.session, self.batch)
+        self.investors = SqlAlchemyInvestorRepository(
+            self.session, self.batch, self.cache
+        )
+        self.investments = SqlAlchemyInvestmentRepository(self.session, self.batch)
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        # Closing rolls back whatever was not committed and, unlike an
+        # explicit rollback, keeps loaded objects readable afterwards
+        self.batch.clear()
+        await self.session.close()
+        await self._evict_stale()
+
+    async def flush(self) -> None:
+        await self.batch.flush(self.session)
+
+    async def commit(self) -> None:
+        await self.flush()
+        await self.session.commit()
+        await self._evict_stale()
+
+    async def rollback(self) -> None:
+        self.batch.clear()
+        await self.session.rollback()
+        await self._evict_stale()
+
+    async def _evict_stale(self) -> None:
+        if self.cache is not None and self.batch.stale_keys:
+            await self.cache.delete(*self.batch.stale_keys)
+        self.batch.stale_keys.clear()
+        self.batch.written = False
+
+
+def get_unit_of_work(request: Request) -> SqlAlchemyUnitOfWork:
+    return SqlAlchemyUnitOfWork(
+        request.app.state.async_db_session, getattr(request.app.state, "cache", None)
+    )
@@ -0,0 +1,108 @@
+# project/benchmarks/bench_concurrent_apply.py
+"""
+Throughput of POST /v1/loans/apply under concurrency with the per-borrower
+row lock taken by apply_for_loan.
+
+Drives the application in-process against DATABASE_URL and writes real
+borrowers and loans, so point it at a disposable database:
+
+    python -m benchmarks.bench_concurrent_apply --applications 2000 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+import uuid
+
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from app.main import create_application
+
+
+async def create_borrowers(app: FastAPI, client: AsyncClient, count: int) -> list[str]:
+    payload = [
+        {
+            "name": f"Bench Borrower {i}",
+            "email": f"bench-{uuid.uuid4()}@example.com",
+            "income": 150000,
+            "employment_years": 6,
+            "has_previous_loans": False,
+        }
+        for i in range(count)
+    ]
+    response = await client.post("/v1/borrowers/bulk", json=payload)
+    response.raise_for_status()
+    # Applications for borrowers still waiting on a score are rejected with 409.
+    queue = app.state.credit_score_queue
+    if queue is not None:
+        await queue.join()
+    return [row["borrower_id"] for row in response.json()["results"]]
+
+
+async def fire(
+    client: AsyncClient, borrower_ids: list[str], applications: int, concurrency: int
+) -> tuple[float, list[float], list[int]]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, statuses = [], []
+
+    async def apply(i: int) -> None:
+        application = {
+            "borrower_id": borrower_ids[i % len(borrower_ids)],
+            "amount": 1000,
+            "term_months": 12,
+            "purpose": "bench",
+        }
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.post("/v1/loans/apply", json=application)
+            latencies.append((time.perf_counter() - start) * 1000)
+            statuses.append(response.status_code)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(apply(i) for i in range(applications)))
+    return time.perf_counter() - start, latencies, statuses
+
+
+def report(label: str, elapsed: float, latencies: list[float], statuses: list[int]):
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(
+        f"{label:>16}: {len(statuses) / elapsed:8.1f} req/s  "
+        f"p50 {statistics.median(latencies):7.2f} ms  p95 {p95:7.2f} ms  "
+        f"accepted {statuses.count(201)}  rejected {statuses.count(400)}"
+    )
+
+
+async def main(applications: int, concurrency: int) -> None:
+    logging.disable(logging.INFO)
+    app = create_application()
+    await app.router.startup()
+    try:
+        transport = ASGITransport(app=app)
+        async with AsyncClient(base_url="http://bench", transport=transport) as client:
+            # Every application targets the same borrower: worst case contention,
+            # only 4 may be accepted.
+            [hot] = await create_borrowers(app, client, 1)
+            report(
+                "same borrower", *await fire(client, [hot], applications, concurrency)
+            )
+
+            # Four applications per borrower: no lock contention, all accepted.
+            spread = await create_borrowers(app, client, max(applications // 4, 1))
+            report(
+                "spread borrowers",
+                *await fire(client, spread, applications, concurrency),
+            )
+    finally:
+        await app.router.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--applications", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.applications, args.concurrency))
@@ -0,0 +1,76 @@
+# project/benchmarks/bench_credit_scores.py
+"""
+Throughput of the credit score formula, scalar vs batch.
+
+    python -m benchmarks.bench_credit_scores --sizes 1000 100000 10000000
+"""
+
+import argparse
+import logging
+import random
+import time
+from array import array
+
+from app.helper import calculate_credit_score, calculate_credit_scores
+
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def make_columns(rows: int, seed: int = 42) -> tuple[array, array, array]:
+    rng = random.Random(seed)
+    incomes = array("q", (rng.randrange(0, 400_000) for _ in range(rows)))
+    employment_years = array("q", (rng.randrange(0, 30) for _ in range(rows)))
+    has_previous_loans = array("b", (rng.random() < 0.3 for _ in range(rows)))
+    return incomes, employment_years, has_previous_loans
+
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def engines_for(columns: tuple, include_scalar: bool) -> dict:
+    engines = {"array.array": lambda: calculate_credit_scores(*columns)}
+    if np is not None:
+        np_columns = tuple(
+            np.frombuffer(column, dtype=column.typecode) for column in columns
+        )
+        engines["numpy"] = lambda: calculate_credit_scores(*np_columns)
+    if include_scalar:
+        engines["scalar"] = lambda: [
+            calculate_credit_score(*profile) for profile in zip(*columns)
+        ]
+    return engines
+
+
+def run(sizes: list[int], scalar_limit: int) -> None:
+    # The scalar path logs one DEBUG record per call. Keep it disabled even
+    # under a DEBUG root level, so the scalar numbers only pay the level check.
+    logging.getLogger("app.helper").setLevel(logging.WARNING)
+
+    print(f"{'rows':>12} {'engine':>14} {'seconds':>10} {'rows/sec':>14}")
+    for rows in sizes:
+        engines = engines_for(make_columns(rows), rows <= scalar_limit)
+        for engine, fn in engines.items():
+            seconds = timed(fn)
+            print(f"{rows:>12,} {engine:>14} {seconds:>10.4f} {rows / seconds:>14,.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[1_000, 100_000, 10_000_000]
+    )
+    parser.add_argument(
+        "--scalar-limit",
+        type=int,
+        default=100_000,
+        help="Skip the per-row scalar baseline above this many rows",
+    )
+    args = parser.parse_args()
+    run(args.sizes, args.scalar_limit)
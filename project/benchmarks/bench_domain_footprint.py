@@ -0,0 +1,106 @@
+# project/benchmarks/bench_domain_footprint.py
+"""
+Memory per object and construction rate of loans held in memory, as a plain
+dataclass, as a mapped (instrumented) entity and as the slotted LoanView
+projection.
+
+Field values are built up front and shared by every object, so the numbers
+are the cost of the objects themselves:
+
+    python -m benchmarks.bench_domain_footprint --loans 1000000
+"""
+
+import argparse
+import gc
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy.orm import clear_mappers
+
+from app.models import Borrower, Loan, LoanStatus, LoanView
+from app.orm import start_mappers
+
+
+def make_loans(model, ids: list[str], borrower: Borrower) -> list:
+    amount = Decimal("1000.00")
+    created_at = datetime(2026, 1, 1)
+    if model is LoanView:
+        return [
+            LoanView(
+                id=loan_id,
+                borrower_id=borrower.id,
+                amount=amount,
+                purpose="bench",
+                term_months=12,
+                status=LoanStatus.ACTIVE,
+                created_at=created_at,
+            )
+            for loan_id in ids
+        ]
+    return [
+        Loan(
+            borrower=borrower,
+            amount=amount,
+            purpose="bench",
+            term_months=12,
+            id=loan_id,
+            status=LoanStatus.ACTIVE,
+            created_at=created_at,
+        )
+        for loan_id in ids
+    ]
+
+
+def measure(model, ids: list[str]) -> tuple[float, float]:
+    """
+    Returns (bytes per object, objects per second). The two are measured in
+    separate passes because tracing allocations slows construction down.
+    """
+    gc.collect()
+    start = time.perf_counter()
+    loans = make_loans(model, ids, Borrower(name="B", email="b@e.com", credit_score=1))
+    seconds = time.perf_counter() - start
+    del loans
+    gc.collect()
+
+    borrower = Borrower(name="B", email="b@e.com", credit_score=1)
+    tracemalloc.start()
+    loans = make_loans(model, ids, borrower)
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # Leave out the list holding them and, for mapped loans, the
+    # borrower.loans backref collection
+    allocated -= sys.getsizeof(loans)
+    if "loans" in vars(borrower):
+        allocated -= sys.getsizeof(vars(borrower)["loans"])
+    return allocated / len(ids), len(ids) / seconds
+
+
+def run(count: int) -> None:
+    ids = [f"{i:036d}" for i in range(count)]
+    print(f"{'loans':>12} {'model':>12} {'bytes/object':>14} {'objects/sec':>14}")
+    variants = [
+        ("dataclass", Loan, False),
+        ("LoanView", LoanView, False),
+        # Mapping instruments Loan in place, so it is measured last
+        ("mapped", Loan, True),
+    ]
+    for name, model, mapped in variants:
+        if mapped:
+            start_mappers()
+        try:
+            per_object, rate = measure(model, ids)
+        finally:
+            if mapped:
+                clear_mappers()
+        print(f"{count:>12,} {name:>12} {per_object:>14,.0f} {rate:>14,.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--loans", type=int, default=1_000_000)
+    args = parser.parse_args()
+    run(args.loans)
@@ -0,0 +1,80 @@
+# project/benchmarks/bench_json_responses.py
+"""
+Serialization cost of a GET /v1/borrowers page, from the rows returned by
+app.queries to the response body bytes:
+
+- fastapi: what FastAPI does with a list[dict] return value (validate,
+  serialize through the response field), rendered by each response class
+- typed: the precompiled serializer of app.api.responses
+
+    python -m benchmarks.bench_json_responses --rows 10000
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import time
+import uuid
+
+from fastapi.responses import JSONResponse, ORJSONResponse, UJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from app.api.responses import borrower_list, serialized
+from app.models import CreditScoreStatus
+
+
+def make_rows(rows: int) -> list[dict]:
+    return [
+        {
+            "id": str(uuid.uuid4()),
+            "name": f"Borrower {i}",
+            "email": f"b{i}@example.com",
+            "credit_score": 300 + i % 550,
+            "credit_score_status": CreditScoreStatus.SCORED,
+        }
+        for i in range(rows)
+    ]
+
+
+def fastapi_path(response_class):
+    field = create_model_field(name="Response_get_borrowers", type_=list[dict])
+
+    def render(rows: list[dict]) -> bytes:
+        content = asyncio.run(serialize_response(field=field, response_content=rows))
+        return response_class(content).body
+
+    return render
+
+
+def typed_path(rows: list[dict]) -> bytes:
+    return serialized(borrower_list, rows).body
+
+
+def run(rows: int, repeat: int) -> None:
+    data = make_rows(rows)
+    paths = {"fastapi+json": fastapi_path(JSONResponse)}
+    for name, response_class in [("ujson", UJSONResponse), ("orjson", ORJSONResponse)]:
+        if importlib.util.find_spec(name):
+            paths[f"fastapi+{name}"] = fastapi_path(response_class)
+    paths["typed"] = typed_path
+
+    print(f"{'rows':>8} {'path':>16} {'ms/page':>10} {'rows/sec':>14} {'bytes':>10}")
+    for name, render in paths.items():
+        body = render(data)
+        start = time.perf_counter()
+        for _ in range(repeat):
+            render(data)
+        seconds = (time.perf_counter() - start) / repeat
+        print(
+            f"{rows:>8,} {name:>16} {seconds * 1000:>10.2f} "
+            f"{rows / seconds:>14,.0f} {len(body):>10,}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    run(args.rows, args.repeat)
@@ -0,0 +1,131 @@
+# project/benchmarks/bench_loan_indexes.py
+"""
+Latency of the loan application eligibility query with and without the
+(borrower_id, status) index on a seeded loans table.
+
+Runs against Postgres (DATABASE_URL) inside a throwaway "bench" schema, so
+application data is never touched:
+
+    python -m benchmarks.bench_loan_indexes --loans 1000000
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.config import get_db_url
+from app.orm import metadata, start_mappers
+from app.repository import SqlAlchemyLoanRepository
+
+
+SCHEMA = "bench"
+INDEX = "ix_loans_borrower_id_status"
+
+
+async def seed(engine, loans: int, borrowers: int) -> None:
+    async with engine.begin() as conn:
+        await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        await conn.run_sync(metadata.create_all)
+        await conn.execute(
+            text(
+                """INSERT INTO borrowers (id, name, email, credit_score)
+                SELECT 'b-' || i, 'Borrower ' || i, 'b' || i || '@example.com', 700
+                FROM generate_series(1, :borrowers) AS i"""
+            ),
+            {"borrowers": borrowers},
+        )
+        await conn.execute(
+            text(
+                """INSERT INTO loans
+                (id, borrower_id, amount, purpose, term_months, status)
+                SELECT 'l-' || i, 'b-' || (1 + i % :borrowers), 1000, 'bench', 12,
+                (ARRAY['PAID', 'PAID', 'PAID', 'ACTIVE', 'FUNDED'])[1 + i % 5]
+                    ::loanstatus
+                FROM generate_series(1, :loans) AS i"""
+            ),
+            {"borrowers": borrowers, "loans": loans},
+        )
+
+
+async def measure(session_maker, borrowers: int, queries: int) -> list[float]:
+    rng = random.Random(7)
+    latencies = []
+    async with session_maker() as session:
+        repo = SqlAlchemyLoanRepository(session)
+        for _ in range(queries):
+            borrower_id = f"b-{rng.randint(1, borrowers)}"
+            start = time.perf_counter()
+            await repo.get_loan_counts_by_status(borrower_id)
+            latencies.append((time.perf_counter() - start) * 1000)
+            await session.rollback()
+    return latencies
+
+
+async def vacuum_analyze(engine) -> None:
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text("VACUUM ANALYZE loans"))
+
+
+async def plan(engine) -> str:
+    async with engine.connect() as conn:
+        result = await conn.execute(
+            text(
+                """EXPLAIN SELECT status, count(*) FROM loans
+                WHERE borrower_id = 'b-1' GROUP BY status"""
+            )
+        )
+        return " | ".join(row[0].strip() for row in result)
+
+
+def report(label: str, latencies: list[float]) -> None:
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(
+        f"{label:>14}: mean {statistics.mean(latencies):8.3f} ms  "
+        f"p50 {statistics.median(latencies):8.3f} ms  p95 {p95:8.3f} ms"
+    )
+
+
+async def main(loans: int, borrowers: int, queries: int) -> None:
+    start_mappers()
+    engine = create_async_engine(
+        get_db_url(), connect_args={"server_settings": {"search_path": SCHEMA}}
+    )
+    session_maker = async_sessionmaker(engine, class_=AsyncSession)
+    try:
+        print(f"Seeding {loans:,} loans for {borrowers:,} borrowers...")
+        await seed(engine, loans, borrowers)
+
+        async with engine.begin() as conn:
+            await conn.execute(text(f"DROP INDEX {INDEX}"))
+        await vacuum_analyze(engine)
+        print("plan without index:", await plan(engine))
+        report("without index", await measure(session_maker, borrowers, queries))
+
+        async with engine.begin() as conn:
+            await conn.execute(
+                text(f"CREATE INDEX {INDEX} ON loans (borrower_id, status)")
+            )
+        await vacuum_analyze(engine)
+        print("plan with index:", await plan(engine))
+        report("with index", await measure(session_maker, borrowers, queries))
+    finally:
+        async with engine.begin() as conn:
+            await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--loans", type=int, default=1_000_000)
+    parser.add_argument("--borrowers", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.loans, args.borrowers, args.queries))
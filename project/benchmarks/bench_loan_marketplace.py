@@ -0,0 +1,147 @@
+# project/benchmarks/bench_loan_marketplace.py
+"""
+Latency of the investor marketplace query (active loans in an amount range,
+keyset paginated) with and without the (status, amount, id) index.
+
+Runs against Postgres (DATABASE_URL) inside a throwaway "bench" schema, so
+application data is never touched:
+
+    python -m benchmarks.bench_loan_marketplace --loans 1000000 --concurrency 20
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from decimal import Decimal
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.config import get_db_url
+from app.models import LoanStatus
+from app.orm import metadata, start_mappers
+from app.repository import SqlAlchemyLoanRepository
+
+
+SCHEMA = "bench"
+INDEX = "ix_loans_status_amount_id"
+PAGE_SIZE = 50
+
+
+async def seed(engine, loans: int) -> None:
+    async with engine.begin() as conn:
+        await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        await conn.run_sync(metadata.create_all)
+        await conn.execute(
+            text(
+                """INSERT INTO borrowers (id, name, email, credit_score)
+                SELECT 'b-' || i, 'Borrower ' || i, 'b' || i || '@example.com', 700
+                FROM generate_series(1, 1000) AS i"""
+            )
+        )
+        await conn.execute(
+            text(
+                """INSERT INTO loans
+                (id, borrower_id, amount, purpose, term_months, status)
+                SELECT 'l-' || i, 'b-' || (1 + i % 1000),
+                100 + (i::bigint * 7919) % 99900, 'bench',
+                (ARRAY[6, 12, 24, 36])[1 + i % 4],
+                (ARRAY['PAID', 'PAID', 'ACTIVE', 'FUNDED', 'REPAYING'])[1 + i % 5]
+                    ::loanstatus
+                FROM generate_series(1, :loans) AS i"""
+            ),
+            {"loans": loans},
+        )
+
+
+async def browse(session_maker, rng: random.Random) -> float:
+    """
+    One investor: a random amount range, first page then the next one.
+    Returns the slowest of the two page loads in milliseconds.
+    """
+    min_amount = Decimal(rng.randrange(100, 90000))
+    max_amount = min_amount + rng.choice([1000, 10000, 50000])
+    slowest, after = 0.0, None
+    async with session_maker() as session:
+        repo = SqlAlchemyLoanRepository(session)
+        for _ in range(2):
+            start = time.perf_counter()
+            page = await repo.list(
+                status=LoanStatus.ACTIVE,
+                min_amount=min_amount,
+                max_amount=max_amount,
+                after=after,
+                limit=PAGE_SIZE,
+            )
+            slowest = max(slowest, (time.perf_counter() - start) * 1000)
+            if len(page) < PAGE_SIZE:
+                break
+            after = (page[-1].amount, page[-1].id)
+    return slowest
+
+
+async def measure(session_maker, investors: int, concurrency: int) -> list[float]:
+    rng = random.Random(7)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def investor() -> float:
+        async with semaphore:
+            return await browse(session_maker, rng)
+
+    return list(await asyncio.gather(*(investor() for _ in range(investors))))
+
+
+async def vacuum_analyze(engine) -> None:
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text("VACUUM ANALYZE loans"))
+
+
+def report(label: str, latencies: list[float]) -> None:
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(
+        f"{label:>14}: p50 {statistics.median(latencies):8.3f} ms  "
+        f"p99 {p99:8.3f} ms  max {latencies[-1]:8.3f} ms"
+    )
+
+
+async def main(loans: int, investors: int, concurrency: int) -> None:
+    start_mappers()
+    engine = create_async_engine(
+        get_db_url(),
+        pool_size=concurrency,
+        connect_args={"server_settings": {"search_path": SCHEMA}},
+    )
+    session_maker = async_sessionmaker(engine, class_=AsyncSession)
+    try:
+        print(f"Seeding {loans:,} loans...")
+        await seed(engine, loans)
+
+        async with engine.begin() as conn:
+            await conn.execute(text(f"DROP INDEX {INDEX}"))
+        await vacuum_analyze(engine)
+        report("without index", await measure(session_maker, investors, concurrency))
+
+        async with engine.begin() as conn:
+            await conn.execute(
+                text(f"CREATE INDEX {INDEX} ON loans (status, amount, id)")
+            )
+        await vacuum_analyze(engine)
+        report("with index", await measure(session_maker, investors, concurrency))
+    finally:
+        async with engine.begin() as conn:
+            await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--loans", type=int, default=1_000_000)
+    parser.add_argument("--investors", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.loans, args.investors, args.concurrency))
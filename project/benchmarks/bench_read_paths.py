@@ -0,0 +1,153 @@
+# project/benchmarks/bench_read_paths.py
+"""
+Rows per second of the list endpoints' read paths, from query to the dicts
+handed to the response serializer:
+
+- orm: mapped entities through the identity map, then to_dict()
+- views: repository list() into slotted projections, then to_dict()
+- core: app.queries row mappings, used as they are
+
+Every path reads the whole table in keyset pages. Runs against Postgres
+(DATABASE_URL) inside a throwaway "bench" schema, so application data is
+never touched:
+
+    python -m benchmarks.bench_read_paths --rows 200000 --page-size 1000
+"""
+
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app import queries
+from app.config import get_db_url
+from app.models import Borrower, Loan, LoanStatus
+from app.orm import metadata, start_mappers
+from app.repository import SqlAlchemyBorrowerRepository, SqlAlchemyLoanRepository
+
+
+SCHEMA = "bench"
+
+
+async def seed(engine, rows: int) -> None:
+    async with engine.begin() as conn:
+        await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        await conn.run_sync(metadata.create_all)
+        await conn.execute(
+            text(
+                """INSERT INTO borrowers (id, name, email, credit_score)
+                SELECT 'b-' || lpad(i::text, 9, '0'), 'Borrower ' || i,
+                'b' || i || '@example.com', 300 + i % 550
+                FROM generate_series(1, :rows) AS i"""
+            ),
+            {"rows": rows},
+        )
+        await conn.execute(
+            text(
+                """INSERT INTO loans
+                (id, borrower_id, amount, purpose, term_months, status)
+                SELECT 'l-' || i, 'b-' || lpad(i::text, 9, '0'),
+                100 + (i::bigint * 7919) % 99900, 'bench',
+                (ARRAY[6, 12, 24, 36])[1 + i % 4], 'ACTIVE'
+                FROM generate_series(1, :rows) AS i"""
+            ),
+            {"rows": rows},
+        )
+        await conn.execute(text("ANALYZE"))
+
+
+async def orm_borrowers(session, after, limit):
+    stmt = queries.filter_borrowers(select(Borrower), after, None, None, None)
+    page = (await session.execute(stmt.limit(limit))).scalars().all()
+    return [borrower.to_dict() for borrower in page], page[-1].id if page else None
+
+
+async def view_borrowers(session, after, limit):
+    page = await SqlAlchemyBorrowerRepository(session).list(after_id=after, limit=limit)
+    return [borrower.to_dict() for borrower in page], page[-1].id if page else None
+
+
+async def core_borrowers(session, after, limit):
+    page = await queries.borrowers_page(session, after_id=after, limit=limit)
+    return page, page[-1]["id"] if page else None
+
+
+async def orm_loans(session, after, limit):
+    stmt = queries.filter_loans(select(Loan), status=LoanStatus.ACTIVE, after=after)
+    page = (await session.execute(stmt.limit(limit))).scalars().all()
+    cursor = (page[-1].amount, page[-1].id) if page else None
+    return [loan.to_dict() for loan in page], cursor
+
+
+async def view_loans(session, after, limit):
+    page = await SqlAlchemyLoanRepository(session).list(
+        status=LoanStatus.ACTIVE, after=after, limit=limit
+    )
+    cursor = (page[-1].amount, page[-1].id) if page else None
+    return [loan.to_dict() for loan in page], cursor
+
+
+async def core_loans(session, after, limit):
+    page = await queries.marketplace_page(session, after=after, limit=limit)
+    cursor = (page[-1]["amount"], page[-1]["id"]) if page else None
+    return page, cursor
+
+
+PATHS = {
+    "borrowers": {
+        "orm": orm_borrowers,
+        "views": view_borrowers,
+        "core": core_borrowers,
+    },
+    "loans": {"orm": orm_loans, "views": view_loans, "core": core_loans},
+}
+
+
+async def read_all(session_maker, read_page, page_size: int) -> tuple[int, float]:
+    rows, after = 0, None
+    start = time.perf_counter()
+    while True:
+        # A session per page, like a request per page
+        async with session_maker() as session:
+            page, after = await read_page(session, after, page_size)
+        rows += len(page)
+        if len(page) < page_size:
+            break
+    return rows, time.perf_counter() - start
+
+
+async def main(rows: int, page_size: int) -> None:
+    start_mappers()
+    engine = create_async_engine(
+        get_db_url(), connect_args={"server_settings": {"search_path": SCHEMA}}
+    )
+    session_maker = async_sessionmaker(engine, class_=AsyncSession)
+    try:
+        print(f"Seeding {rows:,} borrowers and loans...")
+        await seed(engine, rows)
+
+        print(f"{'table':>10} {'path':>6} {'rows':>10} {'seconds':>9} {'rows/sec':>12}")
+        for table, paths in PATHS.items():
+            for path, read_page in paths.items():
+                # Warm up the connection pool and statement caches
+                await read_all(session_maker, read_page, page_size)
+                read, seconds = await read_all(session_maker, read_page, page_size)
+                print(
+                    f"{table:>10} {path:>6} {read:>10,} {seconds:>9.3f} "
+                    f"{read / seconds:>12,.0f}"
+                )
+    finally:
+        async with engine.begin() as conn:
+            await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--page-size", type=int, default=1000)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.page_size))
@@ -0,0 +1,86 @@
+# project/benchmarks/conftest.py
+"""
+Fixtures for the repository micro-benchmarks in this directory.
+
+Each benchmark runs once per backend. The SQLite database is seeded with
+benchmarks.seed on first use and kept in the pytest cache, one file per
+size. Postgres runs only when BENCH_DATABASE_URL is set; an empty database
+is seeded the same way, a seeded one (for example with millions of rows
+from python -m benchmarks.seed) is used as it is.
+"""
+
+import asyncio
+import os
+from dataclasses import dataclass
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.config import sanitize_db_url
+from app.orm import borrowers, loans, start_mappers
+from benchmarks.seed import prepare, seed
+
+
+# Rows of each kind looked up by the benchmarks, cycled through so single
+# row reads are not all served from the same pages
+SAMPLES = 1000
+# Size of the database seeded for a run, when it is empty
+BORROWERS = int(os.environ.get("BENCH_BORROWERS", 100_000))
+
+
+@dataclass
+class BenchDatabase:
+    runner: asyncio.Runner
+    session_maker: async_sessionmaker
+    borrower_ids: list[str]
+    loan_ids: list[str]
+
+    def run(self, fn):
+        """
+        Call fn(session) in a fresh session and wait for it, once per round.
+        Writes are rolled back so every round sees the same data.
+        """
+
+        async def call():
+            async with self.session_maker() as session:
+                result = await fn(session)
+                await session.rollback()
+                return result
+
+        return self.runner.run(call())
+
+
+def _database_url(backend: str, config) -> str:
+    if backend == "postgresql":
+        url = os.environ.get("BENCH_DATABASE_URL")
+        if not url:
+            pytest.skip("BENCH_DATABASE_URL is not set")
+        return sanitize_db_url(url)
+    path = config.cache.mkdir("bench") / f"seed-{BORROWERS}.sqlite"
+    return f"sqlite+aiosqlite:///{path}"
+
+
+async def _open(url: str) -> tuple:
+    engine = create_async_engine(url)
+    if await prepare(engine, reset=False):
+        await seed(engine, BORROWERS)
+    async with engine.connect() as conn:
+        borrower_ids = (await conn.scalars(select(borrowers.c.id).limit(SAMPLES))).all()
+        loan_ids = (await conn.scalars(select(loans.c.id).limit(SAMPLES))).all()
+    return engine, borrower_ids, loan_ids
+
+
+@pytest.fixture(scope="session", params=["sqlite", "postgresql"])
+def bench_db(request):
+    url = _database_url(request.param, request.config)
+    start_mappers()
+    with asyncio.Runner() as runner:
+        engine, borrower_ids, loan_ids = runner.run(_open(url))
+        yield BenchDatabase(
+            runner,
+            async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False),
+            borrower_ids,
+            loan_ids,
+        )
+        runner.run(engine.dispose())
@@ -0,0 +1,345 @@
+# project/benchmarks/load_api.py
+"""
+Load test of the v1 API under a mixed workload: borrower sign-ups, loan
+applications and the borrower and marketplace listings, interleaved at
+random in proportion to their weights.
+
+Reports throughput, p50/p95/p99 latency and SQL statements per request
+(read from /v1/metrics) for every operation. Drives the application
+in-process by default, or a running server with --url. Writes borrowers
+and loans, so point DATABASE_URL (or the server) at a disposable database:
+
+    python -m benchmarks.load_api --requests 2000 --concurrency 32
+    python -m benchmarks.load_api --url http://localhost:8000
+
+Baselines are kept in benchmarks/baselines/load_api.json. --check reruns
+the baseline's workload and exits non-zero on a regression, --save-baseline
+records a new one.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import re
+import statistics
+import sys
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+
+from httpx import ASGITransport, AsyncClient
+
+from app.main import create_application
+
+
+BASELINE = Path(__file__).parent / "baselines" / "load_api.json"
+
+
+@dataclass(frozen=True)
+class Operation:
+    method: str
+    # Route template, as /v1/metrics labels it
+    route: str
+    expected_status: int
+    weight: int
+
+
+OPERATIONS = {
+    "create_borrower": Operation("POST", "/v1/borrowers", 201, 1),
+    "apply": Operation("POST", "/v1/loans/apply", 201, 2),
+    "list_borrowers": Operation("GET", "/v1/borrowers", 200, 4),
+    "list_loans": Operation("GET", "/v1/loans", 200, 3),
+}
+
+# Applications a scored borrower can make before hitting the active loan cap
+APPLICATIONS_PER_BORROWER = 4
+# Statements per request vary slightly with cache hits; one more statement
+# on every request is a regression
+STATEMENT_SLACK = 0.25
+
+
+def borrower_payload() -> dict:
+    return {
+        "name": "Load Borrower",
+        "email": f"load-{uuid.uuid4()}@example.com",
+        "income": 150000,
+        "employment_years": 6,
+        "has_previous_loans": False,
+    }
+
+
+class Workload:
+    def __init__(self, mix: dict[str, int], requests: int, seed: int):
+        names = list(mix)
+        self.schedule = random.Random(seed).choices(
+            names, weights=[mix[name] for name in names], k=requests
+        )
+        self.applicants: list[str] = []
+
+    async def seed(self, client: AsyncClient) -> None:
+        """
+        Create enough scored borrowers for every scheduled application to be
+        accepted.
+        """
+        applications = self.schedule.count("apply")
+        count = -(-applications // APPLICATIONS_PER_BORROWER)
+        if not count:
+            return
+        response = await client.post(
+            "/v1/borrowers/bulk", json=[borrower_payload() for _ in range(count)]
+        )
+        response.raise_for_status()
+        borrower_ids = [row["borrower_id"] for row in response.json()["results"]]
+        self.applicants = borrower_ids * APPLICATIONS_PER_BORROWER
+
+    def request(self, name: str) -> dict:
+        if name == "create_borrower":
+            return {"json": borrower_payload()}
+        if name == "apply":
+            return {
+                "json": {
+                    "borrower_id": self.applicants.pop(),
+                    "amount": 1000,
+                    "term_months": 12,
+                    "purpose": "load test",
+                }
+            }
+        return {"params": {"limit": 50}}
+
+
+@dataclass
+class Samples:
+    latencies: list[float]
+    errors: int = 0
+
+
+async def fire(
+    client: AsyncClient, workload: Workload, concurrency: int
+) -> tuple[float, dict[str, Samples]]:
+    samples = {name: Samples([]) for name in OPERATIONS}
+    schedule = iter(workload.schedule)
+
+    async def worker() -> None:
+        for name in schedule:
+            operation = OPERATIONS[name]
+            request = workload.request(name)
+            start = time.perf_counter()
+            response = await client.request(
+                operation.method, operation.route, **request
+            )
+            samples[name].latencies.append((time.perf_counter() - start) * 1000)
+            if response.status_code != operation.expected_status:
+                samples[name].errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - start, samples
+
+
+_STATEMENTS = re.compile(
+    r"^http_request_db_statements_(sum|count)"
+    r'\{method="([^"]+)",route="([^"]+)"\} (\S+)$',
+    re.MULTILINE,
+)
+
+
+async def statement_totals(client: AsyncClient) -> dict[tuple, float] | None:
+    """
+    Cumulative SQL statement sums and request counts per route, or None
+    when the server has metrics disabled.
+    """
+    response = await client.get("/v1/metrics")
+    if response.status_code != 200:
+        return None
+    return {
+        (kind, method, route): float(value)
+        for kind, method, route, value in _STATEMENTS.findall(response.text)
+    }
+
+
+def summarize(
+    elapsed: float,
+    samples: dict[str, Samples],
+    before: dict | None,
+    after: dict | None,
+) -> dict:
+    operations = {}
+    for name, operation in OPERATIONS.items():
+        latencies = samples[name].latencies
+        if not latencies:
+            continue
+        percentiles = statistics.quantiles(latencies, n=100, method="inclusive")
+        statements = None
+        if before is not None and after is not None:
+            key = (operation.method, operation.route)
+            count = after.get(("count", *key), 0) - before.get(("count", *key), 0)
+            total = after.get(("sum", *key), 0) - before.get(("sum", *key), 0)
+            statements = round(total / count, 2) if count else None
+        operations[name] = {
+            "requests": len(latencies),
+            "errors": samples[name].errors,
+            "p50_ms": round(percentiles[49], 2),
+            "p95_ms": round(percentiles[94], 2),
+            "p99_ms": round(percentiles[98], 2),
+            "statements_per_request": statements,
+        }
+    requests = sum(len(s.latencies) for s in samples.values())
+    return {"throughput": round(requests / elapsed, 1), "operations": operations}
+
+
+def report(result: dict) -> None:
+    print(
+        f"{'operation':>16} {'requests':>9} {'errors':>7} {'p50 ms':>8} "
+        f"{'p95 ms':>8} {'p99 ms':>8} {'stmts/req':>10}"
+    )
+    for name, stats in result["operations"].items():
+        statements = stats["statements_per_request"]
+        print(
+            f"{name:>16} {stats['requests']:>9,} {stats['errors']:>7,} "
+            f"{stats['p50_ms']:>8.2f} {stats['p95_ms']:>8.2f} {stats['p99_ms']:>8.2f} "
+            f"{'-' if statements is None else statements:>10}"
+        )
+    print(f"{'total':>16} {result['throughput']:>9,.1f} req/s")
+
+
+def regressions(result: dict, baseline: dict, tolerance: float) -> list[str]:
+    """
+    Latency and throughput may drift by the tolerance, as a share of the
+    baseline; statements per request may not grow.
+    """
+    found = []
+    if result["throughput"] < baseline["throughput"] / (1 + tolerance):
+        found.append(
+            f"throughput {result['throughput']} req/s, "
+            f"baseline {baseline['throughput']} req/s"
+        )
+    for name, expected in baseline["operations"].items():
+        stats = result["operations"].get(name)
+        if stats is None:
+            continue
+        if stats["errors"]:
+            found.append(f"{name}: {stats['errors']} failed requests")
+        if stats["p95_ms"] > expected["p95_ms"] * (1 + tolerance):
+            found.append(
+                f"{name}: p95 {stats['p95_ms']} ms, baseline {expected['p95_ms']} ms"
+            )
+        statements, allowed = (
+            stats["statements_per_request"],
+            expected["statements_per_request"],
+        )
+        if (
+            statements is not None
+            and allowed is not None
+            and statements > allowed + STATEMENT_SLACK
+        ):
+            found.append(
+                f"{name}: {statements} statements per request, baseline {allowed}"
+            )
+    return found
+
+
+async def run(args: argparse.Namespace, mix: dict[str, int]) -> dict:
+    app = None
+    if args.url:
+        client = AsyncClient(base_url=args.url, timeout=30)
+    else:
+        logging.disable(logging.WARNING)
+        app = create_application()
+        await app.router.startup()
+        client = AsyncClient(
+            base_url="http://load", transport=ASGITransport(app=app), timeout=30
+        )
+    try:
+        async with client:
+            # Warm up connections, statement caches and serializers
+            warmup = Workload(mix, args.warmup, args.seed + 1)
+            await warmup.seed(client)
+            await fire(client, warmup, args.concurrency)
+
+            workload = Workload(mix, args.requests, args.seed)
+            await workload.seed(client)
+            before = await statement_totals(client)
+            elapsed, samples = await fire(client, workload, args.concurrency)
+            after = await statement_totals(client)
+    finally:
+        if app is not None:
+            await app.router.shutdown()
+    return summarize(elapsed, samples, before, after)
+
+
+def parse_mix(value: str) -> dict[str, int]:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f"unknown operation {name!r}")
+        mix[name] = int(weight or 1)
+    return mix
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--url", help="Load a running server instead of in-process")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--warmup", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument(
+        "--mix",
+        type=parse_mix,
+        default=",".join(f"{name}={op.weight}" for name, op in OPERATIONS.items()),
+        help="Operation weights, e.g. apply=2,list_loans=3",
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--check", action="store_true")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.5,
+        help="Allowed latency and throughput drift when checking (0.5 = 50%%)",
+    )
+    args = parser.parse_args()
+
+    baseline = json.loads(BASELINE.read_text()) if BASELINE.exists() else None
+    if args.check:
+        if baseline is None:
+            print(f"No baseline at {BASELINE}, record one with --save-baseline")
+            return 1
+        # Same workload as the baseline
+        for name in ("requests", "warmup", "concurrency", "seed"):
+            setattr(args, name, baseline["settings"][name])
+        args.mix = baseline["settings"]["mix"]
+
+    result = asyncio.run(run(args, args.mix))
+    report(result)
+
+    if args.save_baseline:
+        settings = {
+            "requests": args.requests,
+            "warmup": args.warmup,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+            "mix": args.mix,
+        }
+        BASELINE.parent.mkdir(exist_ok=True)
+        BASELINE.write_text(
+            json.dumps({"settings": settings, **result}, indent=2) + "\n"
+        )
+        print(f"Baseline saved to {BASELINE}")
+    if args.check:
+        found = regressions(result, baseline, args.tolerance)
+        for regression in found:
+            print(f"REGRESSION {regression}")
+        if found:
+            return 1
+        print("No regression against the baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
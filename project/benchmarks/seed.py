@@ -0,0 +1,285 @@
+# project/benchmarks/seed.py
+"""
+Deterministic synthetic data at realistic scale, for benchmarks.
+Generates borrowers, their loans, the investors funding every loan past
+ACTIVE, the investments and the monthly repayments on them, in chunks so
+memory stays flat. Rows are written with COPY on Postgres and executemany
+elsewhere, then the maintained loan counts and analytics aggregates are
+rebuilt from them.
+
+The same --borrowers and --seed always produce the same rows. Seeds an
+empty database only; --reset drops and recreates every table first:
+
+    python -m benchmarks.seed --borrowers 1000000
+    python -m benchmarks.seed --url sqlite+aiosqlite:///bench.sqlite --borrowers 100000
+"""
+
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from sqlalchemy import Table, func, insert, select, text
+from sqlalchemy.ext.asyncio import (
+    AsyncConnection,
+    AsyncEngine,
+    AsyncSession,
+    create_async_engine,
+)
+
+from app.config import get_db_url, sanitize_db_url
+from app.helper import calculate_credit_scores
+from app.models import CreditScoreStatus, InvestmentStatus, LoanStatus
+from app.orm import borrowers, investments, investors, loans, metadata, repayments
+from app.repository import SqlAlchemyAnalyticsRepository, SqlAlchemyLoanRepository
+
+
+CHUNK_BORROWERS = 10_000
+BORROWERS_PER_INVESTOR = 100
+TERMS = (6, 12, 24, 36)
+STATUS_WEIGHTS = {
+    LoanStatus.ACTIVE: 40,
+    LoanStatus.FUNDED: 15,
+    LoanStatus.REPAYING: 20,
+    LoanStatus.PAID: 20,
+    LoanStatus.DEFAULTED: 5,
+}
+START = datetime(2024, 1, 1)
+
+
+@dataclass
+class SeedCounts:
+    borrowers: int = 0
+    loans: int = 0
+    investors: int = 0
+    investments: int = 0
+    repayments: int = 0
+    started: float = field(default_factory=time.perf_counter)
+
+    def __str__(self) -> str:
+        rows = (
+            self.borrowers
+            + self.loans
+            + self.investors
+            + self.investments
+            + self.repayments
+        )
+        seconds = time.perf_counter() - self.started
+        return (
+            f"{self.borrowers:,} borrowers, {self.loans:,} loans, "
+            f"{self.investors:,} investors, {self.investments:,} investments, "
+            f"{self.repayments:,} repayments in {seconds:.1f}s "
+            f"({rows / seconds:,.0f} rows/s)"
+        )
+
+
+class Generator:
+    def __init__(self, seed: int, loans_per_borrower: float):
+        self.rng = random.Random(seed)
+        self.loans_per_borrower = loans_per_borrower
+        self.investor_ids: list[str] = []
+
+    def uuid(self) -> str:
+        return str(uuid.UUID(int=self.rng.getrandbits(128), version=4))
+
+    def investors(self, count: int) -> list[dict]:
+        rows = [
+            {
+                "id": self.uuid(),
+                "name": f"Investor {i}",
+                "email": f"investor{i}@example.com",
+                "available_funds": Decimal(self.rng.randrange(10_000, 10_000_000)),
+            }
+            for i in range(count)
+        ]
+        self.investor_ids = [row["id"] for row in rows]
+        return rows
+
+    def chunk(self, first: int, count: int) -> dict[Table, list[dict]]:
+        rng = self.rng
+        rows = {borrowers: [], loans: [], investments: [], repayments: []}
+        incomes = [rng.randrange(10_000, 250_000) for _ in range(count)]
+        years = [rng.randrange(0, 30) for _ in range(count)]
+        previous = [rng.random() < 0.3 for _ in range(count)]
+        scores = calculate_credit_scores(incomes, years, previous)
+        for i in range(count):
+            borrower_id = self.uuid()
+            rows[borrowers].append(
+                {
+                    "id": borrower_id,
+                    "name": f"Borrower {first + i}",
+                    "email": f"borrower{first + i}@example.com",
+                    "credit_score": scores[i],
+                    "income": incomes[i],
+                    "employment_years": years[i],
+                    "has_previous_loans": previous[i],
+                    "credit_score_status": CreditScoreStatus.SCORED,
+                }
+            )
+            # Exponential around the mean, so most borrowers have a loan or
+            # two and a few have many
+            for _ in range(int(rng.expovariate(1 / self.loans_per_borrower) + 0.5)):
+                self._loan(rows, borrower_id)
+        return rows
+
+    def _loan(self, rows: dict[Table, list[dict]], borrower_id: str) -> None:
+        rng = self.rng
+        loan_id = self.uuid()
+        amount = Decimal(rng.randrange(500, 50_000))
+        term = rng.choice(TERMS)
+        status = rng.choices(list(STATUS_WEIGHTS), list(STATUS_WEIGHTS.values()))[0]
+        created_at = START + timedelta(seconds=rng.randrange(0, 2 * 365 * 86400))
+        rows[loans].append(
+            {
+                "id": loan_id,
+                "borrower_id": borrower_id,
+                "amount": amount,
+                "purpose": "Generated",
+                "term_months": term,
+                "status": status,
+                "created_at": created_at,
+            }
+        )
+        if status == LoanStatus.ACTIVE:
+            return
+
+        payments = {
+            LoanStatus.REPAYING: rng.randrange(1, term),
+            LoanStatus.PAID: term,
+        }.get(status, 0)
+        installment = (amount / term).quantize(Decimal("0.01"))
+        # The last installment of a paid loan settles the rounding
+        paid = [installment] * payments
+        if status == LoanStatus.PAID:
+            paid[-1] = amount - installment * (term - 1)
+        investment_id = self.uuid()
+        rows[investments].append(
+            {
+                "id": investment_id,
+                "investor_id": rng.choice(self.investor_ids),
+                "loan_id": loan_id,
+                "amount": amount,
+                "status": InvestmentStatus.COMPLETED
+                if status == LoanStatus.PAID
+                else InvestmentStatus.ACTIVE,
+                "created_at": created_at,
+                "repaid_total": sum(paid, Decimal(0)),
+            }
+        )
+        first_due = created_at.date()
+        rows[repayments].extend(
+            {
+                "id": self.uuid(),
+                "investment_id": investment_id,
+                "amount": payment,
+                "created_at": first_due + timedelta(days=30 * (month + 1)),
+            }
+            for month, payment in enumerate(paid)
+        )
+
+
+def _copy_value(value):
+    # COPY bypasses SQLAlchemy's types, and enum columns store names
+    if isinstance(value, LoanStatus | InvestmentStatus | CreditScoreStatus):
+        return value.name
+    return value
+
+
+async def write(conn: AsyncConnection, table: Table, rows: list[dict]) -> None:
+    if not rows:
+        return
+    if conn.dialect.name != "postgresql":
+        await conn.execute(insert(table), rows)
+        return
+    columns = list(rows[0])
+    raw = await conn.get_raw_connection()
+    await raw.driver_connection.copy_records_to_table(
+        table.name,
+        columns=columns,
+        records=[tuple(_copy_value(row[name]) for name in columns) for row in rows],
+    )
+
+
+async def seed(
+    engine: AsyncEngine,
+    borrowers_count: int,
+    loans_per_borrower: float = 2.0,
+    seed_value: int = 42,
+    progress: bool = False,
+) -> SeedCounts:
+    generator = Generator(seed_value, loans_per_borrower)
+    counts = SeedCounts()
+    async with engine.begin() as conn:
+        investor_rows = generator.investors(
+            max(borrowers_count // BORROWERS_PER_INVESTOR, 10)
+        )
+        await write(conn, investors, investor_rows)
+        counts.investors = len(investor_rows)
+
+    for first in range(0, borrowers_count, CHUNK_BORROWERS):
+        chunk = generator.chunk(first, min(CHUNK_BORROWERS, borrowers_count - first))
+        # One transaction per chunk, parents before children
+        async with engine.begin() as conn:
+            for table, rows in chunk.items():
+                await write(conn, table, rows)
+        counts.borrowers += len(chunk[borrowers])
+        counts.loans += len(chunk[loans])
+        counts.investments += len(chunk[investments])
+        counts.repayments += len(chunk[repayments])
+        if progress:
+            print(counts)
+
+    async with AsyncSession(engine) as session:
+        await SqlAlchemyLoanRepository(session).rebuild_loan_counts()
+        await SqlAlchemyAnalyticsRepository(session).rebuild()
+        await session.commit()
+    if engine.dialect.name == "postgresql":
+        async with engine.connect() as conn:
+            await conn.execute(text("ANALYZE"))
+    return counts
+
+
+async def prepare(engine: AsyncEngine, reset: bool) -> bool:
+    """
+    Create the schema, dropping it first with reset. Returns whether the
+    database is empty and can be seeded.
+    """
+    async with engine.begin() as conn:
+        if reset:
+            await conn.run_sync(metadata.drop_all)
+        await conn.run_sync(metadata.create_all)
+        existing = await conn.scalar(select(func.count()).select_from(borrowers))
+    return existing == 0
+
+
+async def main(args: argparse.Namespace) -> int:
+    engine = create_async_engine(
+        sanitize_db_url(args.url) if args.url else get_db_url()
+    )
+    try:
+        if not await prepare(engine, args.reset):
+            print("The database already has borrowers, use --reset to replace them")
+            return 1
+        counts = await seed(
+            engine, args.borrowers, args.loans_per_borrower, args.seed, progress=True
+        )
+    finally:
+        await engine.dispose()
+    print(f"Seeded {counts}")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--url", help="Database URL, defaults to DATABASE_URL")
+    parser.add_argument("--borrowers", type=int, default=1_000_000)
+    parser.add_argument("--loans-per-borrower", type=float, default=2.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--reset", action="store_true")
+    raise SystemExit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,105 @@
+# project/benchmarks/test_repositories.py
+"""
+Cost of the repository methods on the request paths, against seeded
+databases (see conftest.py). Not part of the test suite:
+
+    pytest benchmarks
+    BENCH_DATABASE_URL=postgres://... pytest benchmarks --benchmark-autosave
+    pytest benchmarks --benchmark-compare --benchmark-compare-fail=mean:10%
+
+Every round reads a different sampled row; writes are rolled back.
+"""
+
+from decimal import Decimal
+from itertools import cycle
+
+import pytest
+
+from app.models import Borrower, Loan, LoanStatus
+from app.repository import SqlAlchemyBorrowerRepository, SqlAlchemyLoanRepository
+
+
+PAGE_SIZE = 50
+# Middle of the seeded loan amounts, so a marketplace page starts mid-index
+MARKETPLACE_CURSOR = (Decimal(25_000), "")
+
+
+def test_borrower_get(benchmark, bench_db):
+    ids = cycle(bench_db.borrower_ids)
+    result = benchmark(
+        bench_db.run,
+        lambda session: SqlAlchemyBorrowerRepository(session).get(next(ids)),
+    )
+    assert result is not None
+
+
+def test_borrower_list(benchmark, bench_db):
+    ids = cycle(bench_db.borrower_ids)
+    result = benchmark(
+        bench_db.run,
+        lambda session: SqlAlchemyBorrowerRepository(session).list(
+            after_id=next(ids), limit=PAGE_SIZE
+        ),
+    )
+    assert result
+
+
+def test_borrower_add(benchmark, bench_db):
+    def add(session):
+        borrower = Borrower(name="Bench", email="bench@example.com", credit_score=700)
+        return SqlAlchemyBorrowerRepository(session).add(borrower)
+
+    benchmark(bench_db.run, add)
+
+
+def test_loan_get(benchmark, bench_db):
+    ids = cycle(bench_db.loan_ids)
+    result = benchmark(
+        bench_db.run, lambda session: SqlAlchemyLoanRepository(session).get(next(ids))
+    )
+    assert result is not None
+
+
+@pytest.mark.parametrize("after", [None, MARKETPLACE_CURSOR], ids=["first", "middle"])
+def test_loan_list_marketplace(benchmark, bench_db, after):
+    result = benchmark(
+        bench_db.run,
+        lambda session: SqlAlchemyLoanRepository(session).list(
+            status=LoanStatus.ACTIVE, after=after, limit=PAGE_SIZE
+        ),
+    )
+    assert len(result) == PAGE_SIZE
+
+
+def test_loan_list_by_borrower(benchmark, bench_db):
+    ids = cycle(bench_db.borrower_ids)
+    benchmark(
+        bench_db.run,
+        lambda session: SqlAlchemyLoanRepository(session).list(borrower_id=next(ids)),
+    )
+
+
+def test_loan_counts_by_status(benchmark, bench_db):
+    ids = cycle(bench_db.borrower_ids)
+    benchmark(
+        bench_db.run,
+        lambda session: SqlAlchemyLoanRepository(session).get_loan_counts_by_status(
+            next(ids)
+        ),
+    )
+
+
+def test_loan_add(benchmark, bench_db):
+    ids = cycle(bench_db.borrower_ids)
+
+    def add(session):
+        borrower = Borrower(
+            id=next(ids), name="Bench", email="bench@example.com", credit_score=700
+        )
+        loan = Loan(
+            borrower=borrower, amount=Decimal(1000), purpose="bench", term_months=12
+        )
+        # Also maintains the borrower's loan counts and the status totals
+        return SqlAlchemyLoanRepository(session).add(loan)
+
+    benchmark(bench_db.run, add)
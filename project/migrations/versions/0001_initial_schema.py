@@ -0,0 +1,99 @@
+"""Initial schema, as created by metadata.create_all before migrations
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision: str = "0001"
+down_revision: str | None = None
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+loan_status = sa.Enum(
+    "ACTIVE", "FUNDED", "REPAYING", "PAID", "DEFAULTED", name="loanstatus"
+)
+investment_status = sa.Enum(
+    "PENDING_APPROVAL", "ACTIVE", "REJECTED", "COMPLETED", name="investmentstatus"
+)
+
+
+def upgrade() -> None:
+    op.create_table(
+        "borrowers",
+        sa.Column("id", sa.String(36), primary_key=True),
+        sa.Column("name", sa.String(255), nullable=False),
+        sa.Column("email", sa.String(255), nullable=False),
+        sa.Column("credit_score", sa.Integer(), nullable=False),
+    )
+    op.create_table(
+        "investors",
+        sa.Column("id", sa.String(36), primary_key=True),
+        sa.Column("name", sa.String(255), nullable=False),
+        sa.Column("email", sa.String(255), nullable=False),
+        sa.Column("available_funds", sa.Numeric(10, 2), nullable=False),
+    )
+    op.create_table(
+        "loans",
+        sa.Column("id", sa.String(36), primary_key=True),
+        sa.Column(
+            "borrower_id",
+            sa.String(36),
+            sa.ForeignKey("borrowers.id"),
+            nullable=False,
+        ),
+        sa.Column("amount", sa.Numeric(10, 2), nullable=False),
+        sa.Column("purpose", sa.String(255), nullable=False),
+        sa.Column("term_months", sa.Integer(), nullable=False),
+        sa.Column("status", loan_status, nullable=False),
+        sa.Column(
+            "created_at", sa.DateTime(), nullable=False, server_default=sa.func.now()
+        ),
+    )
+    op.create_table(
+        "investments",
+        sa.Column("id", sa.String(36), primary_key=True),
+        sa.Column(
+            "investor_id",
+            sa.String(36),
+            sa.ForeignKey("investors.id"),
+            nullable=False,
+        ),
+        sa.Column("loan_id", sa.String(36), sa.ForeignKey("loans.id"), nullable=False),
+        sa.Column("amount", sa.Numeric(10, 2), nullable=False),
+        sa.Column("status", investment_status, nullable=False),
+        sa.Column(
+            "created_at", sa.DateTime(), nullable=False, server_default=sa.func.now()
+        ),
+    )
+    op.create_table(
+        "repayments",
+        sa.Column("id", sa.String(36), primary_key=True),
+        sa.Column(
+            "investment_id",
+            sa.String(36),
+            sa.ForeignKey("investments.id"),
+            nullable=False,
+        ),
+        sa.Column("amount", sa.Numeric(10, 2), nullable=False),
+        sa.Column(
+            "created_at", sa.Date(), nullable=False, server_default=sa.func.now()
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("repayments")
+    op.drop_table("investments")
+    op.drop_table("loans")
+    op.drop_table("investors")
+    op.drop_table("borrowers")
+    investment_status.drop(op.get_bind(), checkfirst=True)
+    loan_status.drop(op.get_bind(), checkfirst=True)
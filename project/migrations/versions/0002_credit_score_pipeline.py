@@ -0,0 +1,53 @@
+"""Store scoring inputs and a credit score status on borrowers
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision: str = "0002"
+down_revision: str | None = "0001"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+credit_score_status = sa.Enum("PENDING", "SCORED", "FAILED", name="creditscorestatus")
+
+
+def upgrade() -> None:
+    credit_score_status.create(op.get_bind(), checkfirst=True)
+    with op.batch_alter_table("borrowers") as batch_op:
+        batch_op.alter_column("credit_score", existing_type=sa.Integer(), nullable=True)
+        batch_op.add_column(sa.Column("income", sa.BigInteger(), nullable=True))
+        batch_op.add_column(
+            sa.Column("employment_years", sa.BigInteger(), nullable=True)
+        )
+        batch_op.add_column(
+            sa.Column("has_previous_loans", sa.Boolean(), nullable=True)
+        )
+        batch_op.add_column(
+            sa.Column(
+                "credit_score_status",
+                credit_score_status,
+                nullable=False,
+                server_default="SCORED",
+            )
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("borrowers") as batch_op:
+        batch_op.drop_column("credit_score_status")
+        batch_op.drop_column("has_previous_loans")
+        batch_op.drop_column("employment_years")
+        batch_op.drop_column("income")
+        batch_op.alter_column(
+            "credit_score", existing_type=sa.Integer(), nullable=False
+        )
+    credit_score_status.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,38 @@
+"""Index the hot lookup columns
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+
+revision: str = "0003"
+down_revision: str | None = "0002"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+INDEXES = [
+    ("ix_loans_borrower_id_status", "loans", ["borrower_id", "status"]),
+    ("ix_investments_loan_id", "investments", ["loan_id"]),
+    ("ix_investments_investor_id", "investments", ["investor_id"]),
+    ("ix_repayments_investment_id", "repayments", ["investment_id"]),
+    ("ix_borrowers_email", "borrowers", ["email"]),
+]
+
+
+def upgrade() -> None:
+    # On Postgres build the indexes without blocking writes to large tables
+    concurrently = op.get_bind().dialect.name == "postgresql"
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=concurrently)
+
+
+def downgrade() -> None:
+    for name, table, _ in INDEXES:
+        op.drop_index(name, table_name=table)
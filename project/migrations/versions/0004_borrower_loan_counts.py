@@ -0,0 +1,53 @@
+"""Maintained per-borrower loan counts
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision: str = "0004"
+down_revision: str | None = "0003"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+STATUSES = ["ACTIVE", "FUNDED", "REPAYING", "PAID", "DEFAULTED"]
+
+
+def upgrade() -> None:
+    op.create_table(
+        "borrower_loan_counts",
+        sa.Column(
+            "borrower_id",
+            sa.String(36),
+            sa.ForeignKey("borrowers.id"),
+            primary_key=True,
+        ),
+        *(
+            sa.Column(
+                f"{status.lower()}_count",
+                sa.Integer(),
+                nullable=False,
+                server_default="0",
+            )
+            for status in STATUSES
+        ),
+    )
+    columns = ", ".join(f"{status.lower()}_count" for status in STATUSES)
+    sums = ", ".join(
+        f"SUM(CASE WHEN status = '{status}' THEN 1 ELSE 0 END)" for status in STATUSES
+    )
+    op.execute(
+        f"INSERT INTO borrower_loan_counts (borrower_id, {columns}) "
+        f"SELECT borrower_id, {sums} FROM loans GROUP BY borrower_id"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("borrower_loan_counts")
@@ -0,0 +1,33 @@
+"""Index active loans by amount for the marketplace
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+
+revision: str = "0005"
+down_revision: str | None = "0004"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    # On Postgres build the index without blocking writes to loans
+    concurrently = op.get_bind().dialect.name == "postgresql"
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_loans_status_amount_id",
+            "loans",
+            ["status", "amount", "id"],
+            postgresql_concurrently=concurrently,
+        )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_loans_status_amount_id", table_name="loans")
@@ -0,0 +1,37 @@
+"""Maintained repaid total on investments
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision: str = "0006"
+down_revision: str | None = "0005"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "investments",
+        sa.Column(
+            "repaid_total", sa.Numeric(10, 2), nullable=False, server_default="0"
+        ),
+    )
+    op.execute(
+        "UPDATE investments SET repaid_total = totals.repaid "
+        "FROM (SELECT investment_id, SUM(amount) AS repaid "
+        "FROM repayments GROUP BY investment_id) AS totals "
+        "WHERE investments.id = totals.investment_id"
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("investments", "repaid_total")
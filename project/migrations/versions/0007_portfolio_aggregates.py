@@ -0,0 +1,91 @@
+"""Portfolio aggregates for the analytics endpoints
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+
+revision: str = "0007"
+down_revision: str | None = "0006"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+# The type already exists, created with the loans table
+loan_status = postgresql.ENUM(
+    "ACTIVE",
+    "FUNDED",
+    "REPAYING",
+    "PAID",
+    "DEFAULTED",
+    name="loanstatus",
+    create_type=False,
+)
+
+
+def _amount(name: str) -> sa.Column:
+    return sa.Column(name, sa.Numeric(14, 2), nullable=False, server_default="0")
+
+
+def upgrade() -> None:
+    op.create_table(
+        "loan_status_totals",
+        sa.Column("status", loan_status, primary_key=True),
+        sa.Column("shard", sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column("loan_count", sa.Integer(), nullable=False, server_default="0"),
+        _amount("total_amount"),
+    )
+    op.create_table(
+        "daily_funded_volume",
+        sa.Column("day", sa.Date(), primary_key=True),
+        sa.Column("shard", sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column("loan_count", sa.Integer(), nullable=False, server_default="0"),
+        _amount("total_amount"),
+    )
+    op.create_table(
+        "investor_exposure",
+        sa.Column(
+            "investor_id",
+            sa.String(36),
+            sa.ForeignKey("investors.id"),
+            primary_key=True,
+        ),
+        _amount("pending_amount"),
+        _amount("invested_amount"),
+        _amount("repaid_amount"),
+    )
+
+    op.execute(
+        "INSERT INTO loan_status_totals (status, shard, loan_count, total_amount) "
+        "SELECT status, 0, COUNT(*), SUM(amount) FROM loans GROUP BY status"
+    )
+    # Loans do not record when they were funded; approved investments are
+    # dated by when they were made, the closest thing to it
+    op.execute(
+        "INSERT INTO daily_funded_volume (day, shard, loan_count, total_amount) "
+        "SELECT DATE(created_at), 0, COUNT(*), SUM(amount) FROM investments "
+        "WHERE status IN ('ACTIVE', 'COMPLETED') GROUP BY DATE(created_at)"
+    )
+    op.execute(
+        "INSERT INTO investor_exposure "
+        "(investor_id, pending_amount, invested_amount, repaid_amount) "
+        "SELECT investor_id, "
+        "SUM(CASE WHEN status = 'PENDING_APPROVAL' THEN amount ELSE 0 END), "
+        "SUM(CASE WHEN status IN ('ACTIVE', 'COMPLETED') THEN amount ELSE 0 END), "
+        "SUM(CASE WHEN status IN ('ACTIVE', 'COMPLETED') "
+        "THEN repaid_total ELSE 0 END) "
+        "FROM investments GROUP BY investor_id"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("investor_exposure")
+    op.drop_table("daily_funded_volume")
+    op.drop_table("loan_status_totals")
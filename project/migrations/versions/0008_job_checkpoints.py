@@ -0,0 +1,34 @@
+"""Checkpoints for resumable batch jobs
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision: str = "0008"
+down_revision: str | None = "0007"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "job_checkpoints",
+        sa.Column("job", sa.String(64), primary_key=True),
+        sa.Column("last_id", sa.String(36), nullable=False),
+        sa.Column("rows_done", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column(
+            "updated_at", sa.DateTime(), nullable=False, server_default=sa.func.now()
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("job_checkpoints")
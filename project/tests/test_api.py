@@ -1,13 +1,32 @@
+import json
 import logging
+import time
 import uuid
 
 import pytest
+from fastapi.responses import JSONResponse
+from pydantic import ValidationError
+
+from app import models, repository
+from app.api import responses
+from app.config import Settings, get_settings
 
 
 def random_email():
     return f"user-{uuid.uuid4()}@example.com"
 
 
+def wait_for_credit_score(client, borrower_id, timeout=5):
+    """Poll the borrower until the background workers have scored it."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        borrower = client.get(f"/v1/borrowers/{borrower_id}").json()
+        if borrower["credit_score_status"] != "pending":
+            return borrower
+        time.sleep(0.05)
+    pytest.fail(f"Borrower {borrower_id} was never scored")
+
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -24,6 +43,7 @@ def test_apply_for_loan_end_to_end(client):
     borrow_resp = client.post("/v1/borrowers", json=borrower_payload)
     assert borrow_resp.status_code == 201
     borrower = borrow_resp.json()
+    wait_for_credit_score(client, borrower["borrower_id"])
 
     logger.info(f"Borrower: {borrower}")
 
@@ -68,10 +88,14 @@ def test_create_borrower_end_to_end(client):
     result = response.json()
     logger.info(f"Result: {result}")
     assert "borrower_id" in result
-    assert "credit_score" in result
-    assert result["credit_score"] == 700
+    assert result["credit_score"] is None
+    assert result["credit_score_status"] == "pending"
     assert result["message"] == "Borrower created successfully"
 
+    borrower = wait_for_credit_score(client, result["borrower_id"])
+    assert borrower["credit_score_status"] == "scored"
+    assert borrower["credit_score"] == 700
+
 
 def test_create_borrower_with_high_risk_profile(client):
     data = {
@@ -92,10 +116,33 @@ def test_create_borrower_with_high_risk_profile(client):
     assert response.status_code == 201
     result = response.json()
     assert "borrower_id" in result
-    assert "credit_score" in result
-    assert result["credit_score"] == 475
+    assert result["credit_score_status"] == "pending"
     assert result["message"] == "Borrower created successfully"
 
+    borrower = wait_for_credit_score(client, result["borrower_id"])
+    assert borrower["credit_score"] == 475
+
+
+def test_create_borrower_with_an_income_beyond_int32(client):
+    data = {
+        "name": "John Doe",
+        "email": random_email(),
+        "income": 3_000_000_000,
+        "employment_years": 6,
+        "has_previous_loans": False,
+    }
+
+    response = client.post("/v1/borrowers", json=data)
+    assert response.status_code == 201
+    borrower = wait_for_credit_score(client, response.json()["borrower_id"])
+    assert borrower["credit_score"] == 750
+
+    response = client.post("/v1/borrowers/bulk", json=[data])
+    assert response.json()["created"] == 1
+
+    response = client.post("/v1/borrowers", json={**data, "income": 2**63})
+    assert response.status_code == 422
+
 
 def test_apply_for_loan_end_to_end_with_bad_credit(client):
     borrower_payload = {
@@ -109,6 +156,7 @@ def test_apply_for_loan_end_to_end_with_bad_credit(client):
     borrow_resp = client.post("/v1/borrowers", json=borrower_payload)
     assert borrow_resp.status_code == 201
     borrower = borrow_resp.json()
+    wait_for_credit_score(client, borrower["borrower_id"])
 
     data = {
         "borrower_id": borrower.get("borrower_id", ""),
@@ -137,3 +185,494 @@ async def test_create_investor_async(client):
     assert response.status_code == 201
     data = response.json()
     assert data["message"] == "Investor created successfully"
+
+
+def test_apply_for_loan_while_credit_score_is_pending(client):
+    borrower = models.Borrower(
+        name="John Doe",
+        email=random_email(),
+        credit_score=None,
+        credit_score_status=models.CreditScoreStatus.PENDING,
+    )
+    borrower_repo = repository.SqlAlchemyBorrowerRepository
+
+    async def add_pending_borrower():
+        async with client.app.state.async_db_session() as session:
+            await borrower_repo(session).add(borrower)
+            await session.commit()
+
+    client.portal.call(add_pending_borrower)
+
+    response = client.post(
+        "/v1/loans/apply",
+        json={
+            "borrower_id": borrower.id,
+            "amount": 1000,
+            "term_months": 12,
+            "purpose": "Home renovation",
+        },
+    )
+    assert response.status_code == 409
+    assert "still being calculated" in response.json()["detail"]
+
+
+def test_create_borrowers_bulk_end_to_end(client):
+    payload = [
+        {
+            "name": "John Doe",
+            "email": random_email(),
+            "income": 150000,
+            "employment_years": 6,
+            "has_previous_loans": False,
+        },
+        {"name": "Missing fields", "email": random_email()},
+        {
+            "name": "Jane Doe",
+            "email": random_email(),
+            "income": 15000,
+            "employment_years": 1,
+            "has_previous_loans": True,
+        },
+    ]
+
+    response = client.post("/v1/borrowers/bulk?chunk_size=1", json=payload)
+
+    assert response.status_code == 200
+    result = response.json()
+    assert result["created"] == 2
+    assert result["failed"] == 1
+    assert [row["index"] for row in result["results"]] == [0, 1, 2]
+    assert result["results"][0]["credit_score"] == 700
+    assert result["results"][1]["error"] is not None
+    assert result["results"][2]["credit_score"] == 475
+
+
+def test_create_borrowers_bulk_from_ndjson(client):
+    lines = [
+        json.dumps(
+            {
+                "name": f"Borrower {i}",
+                "email": random_email(),
+                "income": 150000,
+                "employment_years": 6,
+                "has_previous_loans": False,
+            }
+        )
+        for i in range(5)
+    ]
+
+    response = client.post(
+        "/v1/borrowers/bulk",
+        content="\n".join(lines) + "\n",
+        headers={"content-type": "application/x-ndjson"},
+    )
+
+    assert response.status_code == 200
+    result = response.json()
+    assert result["created"] == 5
+    assert result["failed"] == 0
+    assert all(row["borrower_id"] for row in result["results"])
+
+
+@pytest.fixture
+def bulk_limits(client):
+    override = client.app.dependency_overrides[get_settings]
+    client.app.dependency_overrides[get_settings] = lambda: override().model_copy(
+        update={"bulk_max_rows": 3, "bulk_max_bytes": 4096}
+    )
+    yield
+    client.app.dependency_overrides[get_settings] = override
+
+
+def test_create_borrowers_bulk_streams_ndjson_up_to_the_row_limit(client, bulk_limits):
+    rows = [
+        {
+            "name": "x" * 256 if i == 1 else f"Borrower {i}",
+            "email": random_email(),
+            "income": 150000,
+            "employment_years": 6,
+            "has_previous_loans": False,
+        }
+        for i in range(5)
+    ]
+
+    def body():
+        # Lines split across the chunks of a streamed upload
+        for row in rows:
+            line = json.dumps(row).encode() + b"\n"
+            yield line[:10]
+            yield line[10:]
+
+    response = client.post(
+        "/v1/borrowers/bulk",
+        content=body(),
+        headers={"content-type": "application/x-ndjson"},
+    )
+
+    assert response.status_code == 200
+    result = response.json()
+    assert [row["index"] for row in result["results"]] == [0, 1, 2, 3]
+    assert result["created"] == 2
+    assert "at most 255 characters" in result["results"][1]["error"]
+    assert "limited to 3 rows" in result["results"][3]["error"]
+
+
+def test_create_borrowers_bulk_rejects_oversized_json(client, bulk_limits):
+    payload = [{"name": "x" * 1000, "email": random_email()}] * 5
+
+    response = client.post("/v1/borrowers/bulk", json=payload)
+
+    assert response.status_code == 413
+
+
+def test_get_borrowers_pages_with_a_cursor(client):
+    email = random_email()
+    response = client.post(
+        "/v1/borrowers/bulk",
+        json=[
+            {
+                "name": "Paged Borrower",
+                "email": email,
+                "income": 150000,
+                "employment_years": 6,
+                "has_previous_loans": False,
+            }
+        ],
+    )
+    assert response.status_code == 200
+
+    page = client.get("/v1/borrowers", params={"email": email, "limit": 1})
+    assert page.status_code == 200
+    assert [row["email"] for row in page.json()] == [email]
+    assert page.json()[0]["credit_score_status"] == "scored"
+    cursor = page.headers["X-Next-Cursor"]
+    next_page = client.get(
+        "/v1/borrowers", params={"email": email, "limit": 1, "cursor": cursor}
+    )
+    assert next_page.json() == []
+    assert "X-Next-Cursor" not in next_page.headers
+
+
+def test_get_borrowers_rejects_credit_scores_out_of_range(client):
+    for params in (
+        {"min_credit_score": 10_000_000_000},
+        {"max_credit_score": -1},
+    ):
+        response = client.get("/v1/borrowers", params=params)
+        assert response.status_code == 422
+        assert "SELECT" not in response.text
+
+    response = client.get("/v1/borrowers", params={"min_credit_score": 1000})
+    assert response.status_code == 200
+
+
+def test_get_borrowers_streams_ndjson(client):
+    email = random_email()
+    client.post(
+        "/v1/borrowers/bulk",
+        json=[
+            {
+                "name": "Streamed Borrower",
+                "email": email,
+                "income": 150000,
+                "employment_years": 6,
+                "has_previous_loans": False,
+            }
+        ],
+    )
+
+    response = client.get(
+        "/v1/borrowers",
+        params={"email": email},
+        headers={"accept": "application/x-ndjson"},
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [(row["email"], row["credit_score"]) for row in rows] == [(email, 700)]
+
+
+def test_marketplace_lists_active_loans_in_amount_range(client):
+    response = client.post(
+        "/v1/borrowers/bulk",
+        json=[
+            {
+                "name": "Marketplace Borrower",
+                "email": random_email(),
+                "income": 150000,
+                "employment_years": 6,
+                "has_previous_loans": False,
+            }
+        ],
+    )
+    borrower_id = response.json()["results"][0]["borrower_id"]
+    # Amounts no other test uses, so the range only matches these loans
+    for amount in [91001, 91002, 91003]:
+        response = client.post(
+            "/v1/loans/apply",
+            json={
+                "borrower_id": borrower_id,
+                "amount": amount,
+                "term_months": 24,
+                "purpose": "Marketplace",
+            },
+        )
+        assert response.status_code == 201
+
+    params = {"min_amount": 91000, "max_amount": 91999, "limit": 2}
+    page = client.get("/v1/loans", params=params)
+    assert page.status_code == 200
+    assert [loan["amount"] for loan in page.json()] == [91001, 91002]
+    assert page.json()[0].keys() == {
+        "id",
+        "amount",
+        "purpose",
+        "term_months",
+        "status",
+        "created_at",
+    }
+    assert page.json()[0]["status"] == "active"
+    assert page.json()[0]["status"] == "active"
+
+    cursor = page.headers["X-Next-Cursor"]
+    next_page = client.get("/v1/loans", params={**params, "cursor": cursor})
+    assert [loan["amount"] for loan in next_page.json()] == [91003]
+    assert "X-Next-Cursor" not in next_page.headers
+
+    for cursor in ("oops:1", "Infinity:x", "NaN:x", "1e20:x", "1.001:x"):
+        assert client.get("/v1/loans", params={"cursor": cursor}).status_code == 422
+    for amount in ("1e20", "Infinity", "0.001"):
+        for bound in ("min_amount", "max_amount"):
+            response = client.get("/v1/loans", params={bound: amount})
+            assert response.status_code == 422
+
+
+def create_investor(client, available_funds):
+    response = client.post(
+        "/v1/investors",
+        json={
+            "name": "Warren Buffet",
+            "email": random_email(),
+            "available_funds": available_funds,
+        },
+    )
+    assert response.status_code == 201
+    return response.json()["investor_id"]
+
+
+def create_active_loan(client, amount=1000):
+    response = client.post(
+        "/v1/borrowers/bulk",
+        json=[
+            {
+                "name": "Investment Borrower",
+                "email": random_email(),
+                "income": 150000,
+                "employment_years": 6,
+                "has_previous_loans": False,
+            }
+        ],
+    )
+    borrower_id = response.json()["results"][0]["borrower_id"]
+    response = client.post(
+        "/v1/loans/apply",
+        json={
+            "borrower_id": borrower_id,
+            "amount": amount,
+            "term_months": 12,
+            "purpose": "Investment",
+        },
+    )
+    assert response.status_code == 201
+    return response.json()["loan_id"]
+
+
+def test_investment_is_approved_and_funds_the_loan(client):
+    investor_id = create_investor(client, 1500)
+    loan_id = create_active_loan(client)
+
+    assert (
+        client.post(
+            "/v1/investments",
+            json={"investor_id": investor_id, "loan_id": loan_id, "amount": 999},
+        ).status_code
+        == 400
+    )
+    response = client.post(
+        "/v1/investments",
+        json={"investor_id": investor_id, "loan_id": loan_id, "amount": 1000},
+    )
+    assert response.status_code == 201
+    investment_id = response.json()["investment_id"]
+    assert response.json()["status"] == "pending_approval"
+
+    # Only 500 left to invest
+    other_loan_id = create_active_loan(client)
+    response = client.post(
+        "/v1/investments",
+        json={"investor_id": investor_id, "loan_id": other_loan_id, "amount": 1000},
+    )
+    assert response.status_code == 409
+    assert "Insufficient funds" in response.json()["detail"]
+
+    response = client.post(f"/v1/investments/{investment_id}/approve")
+    assert response.status_code == 200
+    assert response.json()["status"] == "active"
+    assert client.post(f"/v1/investments/{investment_id}/approve").status_code == 409
+    assert client.post(f"/v1/investments/{investment_id}/reject").status_code == 409
+
+    # The funded loan is no longer open to investors
+    response = client.post(
+        "/v1/investments",
+        json={
+            "investor_id": create_investor(client, 1000),
+            "loan_id": loan_id,
+            "amount": 1000,
+        },
+    )
+    assert response.status_code == 409
+
+
+def test_rejected_investment_releases_the_funds(client):
+    investor_id = create_investor(client, 1000)
+    loan_id = create_active_loan(client)
+    investment = {"investor_id": investor_id, "loan_id": loan_id, "amount": 1000}
+
+    response = client.post("/v1/investments", json=investment)
+    investment_id = response.json()["investment_id"]
+    assert client.post("/v1/investments", json=investment).status_code == 409
+
+    response = client.post(f"/v1/investments/{investment_id}/reject")
+    assert response.status_code == 200
+    assert response.json()["status"] == "rejected"
+
+    # The released funds can be invested again
+    assert client.post("/v1/investments", json=investment).status_code == 201
+    assert client.post("/v1/investments/unknown/approve").status_code == 404
+
+
+def test_investment_amount_must_fit_the_column(client):
+    investor_id = create_investor(client, 1000)
+    loan_id = create_active_loan(client)
+
+    for amount in (0, -100, 10.001, 1e20, "1e20", "Infinity"):
+        response = client.post(
+            "/v1/investments",
+            json={"investor_id": investor_id, "loan_id": loan_id, "amount": amount},
+        )
+        assert response.status_code == 422
+
+    # None of them touched the investor's funds: exactly 1000 are left
+    investment = {"investor_id": investor_id, "loan_id": loan_id, "amount": 1000}
+    assert client.post("/v1/investments", json=investment).status_code == 201
+    response = client.post(
+        "/v1/investments",
+        json={
+            "investor_id": investor_id,
+            "loan_id": create_active_loan(client, amount=100),
+            "amount": 100,
+        },
+    )
+    assert response.status_code == 409
+    assert "Insufficient funds" in response.json()["detail"]
+
+
+def test_oversized_repayments_are_rejected_at_validation(client):
+    response = client.post(
+        "/v1/repayments/batch",
+        json=[{"investment_id": str(uuid.uuid4()), "amount": "1e20"}],
+    )
+
+    assert response.status_code == 200
+    [row] = response.json()["results"]
+    assert "more than 10 digits" in row["error"]
+
+
+def test_repayment_batch_keeps_running_balances(client):
+    investor_id = create_investor(client, 1000)
+    loan_id = create_active_loan(client)
+    response = client.post(
+        "/v1/investments",
+        json={"investor_id": investor_id, "loan_id": loan_id, "amount": 1000},
+    )
+    investment_id = response.json()["investment_id"]
+    pending_id = client.post(
+        "/v1/investments",
+        json={
+            "investor_id": create_investor(client, 1000),
+            "loan_id": create_active_loan(client),
+            "amount": 1000,
+        },
+    ).json()["investment_id"]
+    client.post(f"/v1/investments/{investment_id}/approve")
+
+    response = client.post(
+        "/v1/repayments/batch?chunk_size=2",
+        json=[
+            {"investment_id": investment_id, "amount": "400.00"},
+            {"investment_id": investment_id, "amount": "700.00"},
+            {"investment_id": investment_id, "amount": -1},
+            {"investment_id": pending_id, "amount": "100.00"},
+            {"investment_id": "unknown", "amount": "100.00"},
+            {"investment_id": investment_id, "amount": "600.00"},
+            {"investment_id": investment_id, "amount": "1.00"},
+        ],
+    )
+
+    assert response.status_code == 200
+    result = response.json()
+    assert (result["applied"], result["failed"]) == (2, 5)
+    rows = result["results"]
+    assert [row["index"] for row in rows] == list(range(7))
+    assert rows[0]["remaining_amount"] == "600.00"
+    assert rows[1]["error"] == "Repayment amount exceeds remaining investment amount"
+    assert rows[2]["error"]
+    assert rows[3]["error"] == "Only active investments can be repaid"
+    assert rows[4]["error"] == "Investment not found"
+    assert rows[5]["remaining_amount"] == "0.00"
+    assert rows[6]["error"] == "Only active investments can be repaid"
+
+    response = client.get("/v1/investments", params={"investor_id": investor_id})
+    assert response.status_code == 200
+    [investment] = response.json()
+    assert investment["id"] == investment_id
+    assert investment["status"] == "completed"
+    assert (investment["repaid_total"], investment["remaining_amount"]) == (1000, 0)
+
+    response = client.get(f"/v1/analytics/investors/{investor_id}/exposure")
+    assert response.status_code == 200
+    exposure = response.json()
+    assert (exposure["invested_amount"], exposure["outstanding_amount"]) == (1000, 0)
+    assert client.get("/v1/analytics/investors/unknown/exposure").status_code == 404
+
+
+def test_response_class_falls_back_when_renderer_is_missing(monkeypatch):
+    assert responses.get_response_class("json") is JSONResponse
+    monkeypatch.setattr(responses.importlib.util, "find_spec", lambda name: None)
+    assert responses.get_response_class("orjson") is JSONResponse
+    assert responses.get_response_class("auto") is JSONResponse
+
+
+def test_unknown_response_class_is_rejected_at_startup():
+    with pytest.raises(ValidationError, match="json_response_class"):
+        Settings(json_response_class="simdjson")
+
+
+def test_analytics_summary_and_funded_volume(client):
+    summary = client.get("/v1/analytics/loans").json()
+    create_active_loan(client, amount=2500)
+
+    after = client.get("/v1/analytics/loans").json()
+    assert after["total_loans"] == summary["total_loans"] + 1
+    assert after["by_status"]["active"]["total_amount"] == (
+        summary["by_status"]["active"]["total_amount"] + 2500
+    )
+    assert 0 <= after["default_rate"] <= 1
+
+    assert client.get("/v1/analytics/funded-volume").status_code == 200
+    response = client.get(
+        "/v1/analytics/funded-volume",
+        params={"start": "2024-01-01", "end": "2026-01-01"},
+    )
+    assert response.status_code == 422
@@ -0,0 +1,143 @@
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import clear_mappers
+
+from app.cache import InMemoryCache
+from app.models import Borrower, CreditScoreStatus, Investor
+from app.orm import start_mappers
+from app.repository import (
+    SqlAlchemyBorrowerRepository,
+    borrower_cache_key,
+    investor_cache_key,
+)
+from app.unit_of_work import SqlAlchemyUnitOfWork
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def session_maker(in_memory_db):
+    start_mappers()
+    yield async_sessionmaker(in_memory_db, class_=AsyncSession, expire_on_commit=False)
+    clear_mappers()
+
+
+@pytest.mark.asyncio
+async def test_least_recently_used_entries_are_evicted():
+    cache = InMemoryCache(max_entries=2)
+    await cache.set("a", {"id": "a"})
+    await cache.set("b", {"id": "b"})
+    assert await cache.get("a") == {"id": "a"}
+
+    await cache.set("c", {"id": "c"})
+
+    assert await cache.get("b") is None
+    assert await cache.get("a") == {"id": "a"}
+    assert await cache.get("c") == {"id": "c"}
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (3, 1, 1)
+    assert stats["entries"] == 2
+
+
+@pytest.mark.asyncio
+async def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = InMemoryCache(ttl=10, clock=clock)
+    await cache.set("a", {"id": "a"})
+
+    clock.now = 9.9
+    assert await cache.get("a") == {"id": "a"}
+    clock.now = 10
+    assert await cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+
+
+@pytest.mark.asyncio
+async def test_borrower_lookups_read_through_the_cache(session_maker):
+    cache = InMemoryCache()
+    borrower = Borrower(name="John", email="john@example.com", credit_score=700)
+    async with SqlAlchemyUnitOfWork(session_maker, cache) as uow:
+        await uow.borrowers.add(borrower)
+        await uow.commit()
+
+    for _ in range(3):
+        async with SqlAlchemyUnitOfWork(session_maker, cache) as uow:
+            cached = await uow.borrowers.get(borrower.id)
+        assert (cached.id, cached.credit_score) == (borrower.id, 700)
+
+    assert (cache.counters.misses, cache.counters.hits) == (1, 2)
+
+
+@pytest.mark.asyncio
+async def test_credit_score_updates_invalidate_cached_borrowers(session_maker):
+    cache = InMemoryCache()
+    borrower = Borrower(
+        name="John",
+        email="john@example.com",
+        credit_score=None,
+        credit_score_status=CreditScoreStatus.PENDING,
+    )
+    async with session_maker() as session:
+        await SqlAlchemyBorrowerRepository(session).add(borrower)
+        await session.commit()
+    async with SqlAlchemyUnitOfWork(session_maker, cache) as uow:
+        assert (await uow.borrowers.get(borrower.id)).is_credit_score_pending
+
+    async with session_maker() as session:
+        repo = SqlAlchemyBorrowerRepository(session, cache=cache)
+        await repo.mark_credit_score_failed([borrower.id])
+        await session.commit()
+
+    assert await cache.get(borrower_cache_key(borrower.id)) is None
+    async with SqlAlchemyUnitOfWork(session_maker, cache) as uow:
+        stored = await uow.borrowers.get(borrower.id)
+    assert stored.credit_score_status == CreditScoreStatus.FAILED
+
+
+@pytest.mark.asyncio
+async def test_rows_read_in_a_rolled_back_unit_of_work_are_evicted(session_maker):
+    cache = InMemoryCache()
+    investor = Investor(name="Warren", email="w@example.com", available_funds=1500)
+    async with SqlAlchemyUnitOfWork(session_maker, cache) as uow:
+        await uow.investors.add(investor)
+        assert (await uow.investors.get(investor.id)).available_funds == 1500
+        # Leaves without committing
+
+    assert cache.stats()["entries"] == 0
+    async with SqlAlchemyUnitOfWork(session_maker, cache) as uow:
+        assert await uow.investors.get(investor.id) is None
+
+
+@pytest.mark.asyncio
+async def test_rows_read_after_uncommitted_writes_are_not_cached(session_maker):
+    cache = InMemoryCache()
+    investor = Investor(name="Warren", email="w@example.com", available_funds=1500)
+    async with SqlAlchemyUnitOfWork(session_maker) as uow:
+        await uow.investors.add(investor)
+        await uow.commit()
+
+    async with SqlAlchemyUnitOfWork(session_maker, cache) as uow:
+        await uow.borrowers.add(
+            Borrower(name="John", email="j@example.com", credit_score=700)
+        )
+        await uow.investors.get(investor.id)
+        assert await cache.get(investor_cache_key(investor.id)) is None
+
+        await uow.commit()
+        await uow.investors.get(investor.id)
+        assert await cache.get(investor_cache_key(investor.id)) is not None
+
+
+def test_cache_endpoint(client):
+    response = client.get("/v1/cache")
+    assert response.status_code == 200
+    stats = response.json()
+    assert stats["enabled"] is True
+    assert stats["backend"] == "memory"
+    assert {"hits", "misses", "hit_ratio", "entries"} <= stats.keys()
@@ -0,0 +1,104 @@
+import asyncio
+import uuid
+
+import pytest
+from sqlalchemy import func, select
+
+from app.orm import investments, investors, loans
+
+
+CONCURRENT_APPLICATIONS = 200
+
+
+async def create_scored_borrower(async_client):
+    # The bulk endpoint scores inline, so the borrower can apply right away
+    response = await async_client.post(
+        "/v1/borrowers/bulk",
+        json=[
+            {
+                "name": "Concurrent Borrower",
+                "email": f"user-{uuid.uuid4()}@example.com",
+                "income": 150000,
+                "employment_years": 6,
+                "has_previous_loans": False,
+            }
+        ],
+    )
+    assert response.status_code == 200
+    return response.json()["results"][0]["borrower_id"]
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_concurrent_applications_respect_the_active_loan_cap(app, async_client):
+    borrower_id = await create_scored_borrower(async_client)
+    application = {
+        "borrower_id": borrower_id,
+        "amount": 1000,
+        "term_months": 12,
+        "purpose": "Home renovation",
+    }
+
+    responses = await asyncio.gather(
+        *(
+            async_client.post("/v1/loans/apply", json=application)
+            for _ in range(CONCURRENT_APPLICATIONS)
+        )
+    )
+
+    statuses = [response.status_code for response in responses]
+    assert statuses.count(201) == 4
+    assert statuses.count(400) == CONCURRENT_APPLICATIONS - 4
+    async with app.state.async_db_session() as session:
+        stored = await session.scalar(
+            select(func.count()).where(loans.c.borrower_id == borrower_id)
+        )
+    assert stored == 4
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_concurrent_investments_never_overdraw_the_investor(app, async_client):
+    loan_ids = []
+    for _ in range(5):
+        borrower_id = await create_scored_borrower(async_client)
+        for _ in range(4):
+            response = await async_client.post(
+                "/v1/loans/apply",
+                json={
+                    "borrower_id": borrower_id,
+                    "amount": 1000,
+                    "term_months": 12,
+                    "purpose": "Home renovation",
+                },
+            )
+            loan_ids.append(response.json()["loan_id"])
+    response = await async_client.post(
+        "/v1/investors",
+        json={
+            "name": "Concurrent Investor",
+            "email": f"investor-{uuid.uuid4()}@example.com",
+            "available_funds": 5000,
+        },
+    )
+    investor_id = response.json()["investor_id"]
+
+    responses = await asyncio.gather(
+        *(
+            async_client.post(
+                "/v1/investments",
+                json={"investor_id": investor_id, "loan_id": loan_id, "amount": 1000},
+            )
+            for loan_id in loan_ids
+        )
+    )
+
+    statuses = [response.status_code for response in responses]
+    assert statuses.count(201) == 5
+    assert statuses.count(409) == len(loan_ids) - 5
+    async with app.state.async_db_session() as session:
+        funds = await session.scalar(
+            select(investors.c.available_funds).where(investors.c.id == investor_id)
+        )
+        reserved = await session.scalar(
+            select(func.count()).where(investments.c.investor_id == investor_id)
+        )
+    assert (funds, reserved) == (0, 5)
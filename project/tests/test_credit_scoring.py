@@ -0,0 +1,167 @@
+import asyncio
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app import credit_scoring
+from app.credit_scoring import (
+    CreditScoreRequest,
+    CreditScoreWorkerPool,
+    InMemoryCreditScoreQueue,
+)
+from app.models import Borrower, CreditScoreStatus
+from app.orm import borrowers
+from app.repository import SqlAlchemyBorrowerRepository
+
+
+@pytest.fixture
+def session_maker(in_memory_db):
+    return async_sessionmaker(in_memory_db, class_=AsyncSession, expire_on_commit=False)
+
+
+async def add_pending_borrowers(session_maker, count):
+    pending = [
+        Borrower(
+            name=f"Borrower {i}",
+            email=f"b{i}@example.com",
+            credit_score=None,
+            income=150000,
+            employment_years=i,
+            has_previous_loans=False,
+            credit_score_status=CreditScoreStatus.PENDING,
+        )
+        for i in range(count)
+    ]
+    async with session_maker() as session:
+        await SqlAlchemyBorrowerRepository(session).add_many(pending)
+        await session.commit()
+    return pending
+
+
+async def stored_scores(session_maker):
+    async with session_maker() as session:
+        result = await session.execute(
+            select(
+                borrowers.c.id,
+                borrowers.c.credit_score,
+                borrowers.c.credit_score_status,
+            )
+        )
+        return {row.id: (row.credit_score, row.credit_score_status) for row in result}
+
+
+@pytest.mark.asyncio
+async def test_workers_score_pending_borrowers_in_batches(session_maker):
+    pending = await add_pending_borrowers(session_maker, 5)
+    queue = InMemoryCreditScoreQueue()
+    pool = CreditScoreWorkerPool(queue, session_maker, workers=2, batch_size=3)
+
+    for borrower in pending:
+        await queue.publish(CreditScoreRequest(borrower.id))
+    # Replayed requests must not change anything
+    await queue.publish(CreditScoreRequest(pending[0].id))
+    pool.start()
+    await asyncio.wait_for(queue.join(), timeout=5)
+    await pool.stop()
+
+    scores = await stored_scores(session_maker)
+    assert scores == {
+        borrower.id: (650 + min(i * 10, 50), CreditScoreStatus.SCORED)
+        for i, borrower in enumerate(pending)
+    }
+
+
+@pytest.mark.asyncio
+async def test_enqueue_pending_requeues_unscored_borrowers(session_maker):
+    pending = await add_pending_borrowers(session_maker, 3)
+    queue = InMemoryCreditScoreQueue()
+    pool = CreditScoreWorkerPool(queue, session_maker)
+
+    assert await pool.enqueue_pending() == 3
+    batch = await queue.consume(max_items=10)
+    assert {request.borrower_id for request in batch} == {b.id for b in pending}
+
+
+@pytest.mark.asyncio
+async def test_failed_batches_are_retried_with_backoff(session_maker, monkeypatch):
+    [borrower] = await add_pending_borrowers(session_maker, 1)
+    calls = []
+    real_calculate = credit_scoring.calculate_credit_scores
+
+    def flaky_calculate(*columns):
+        calls.append(columns)
+        if len(calls) == 1:
+            raise RuntimeError("scoring service unavailable")
+        return real_calculate(*columns)
+
+    monkeypatch.setattr(credit_scoring, "calculate_credit_scores", flaky_calculate)
+    queue = InMemoryCreditScoreQueue()
+    pool = CreditScoreWorkerPool(queue, session_maker, retry_backoff=0.01)
+
+    await queue.publish(CreditScoreRequest(borrower.id))
+    pool.start()
+    await asyncio.sleep(0.2)
+    await queue.join()
+    await pool.stop()
+
+    assert len(calls) == 2
+    scores = await stored_scores(session_maker)
+    assert scores[borrower.id] == (650, CreditScoreStatus.SCORED)
+
+
+@pytest.mark.asyncio
+async def test_borrower_is_marked_failed_after_max_retries(session_maker, monkeypatch):
+    [borrower] = await add_pending_borrowers(session_maker, 1)
+
+    def broken_calculate(*columns):
+        raise RuntimeError("scoring service unavailable")
+
+    monkeypatch.setattr(credit_scoring, "calculate_credit_scores", broken_calculate)
+    queue = InMemoryCreditScoreQueue()
+    pool = CreditScoreWorkerPool(
+        queue, session_maker, max_retries=2, retry_backoff=0.01
+    )
+
+    await queue.publish(CreditScoreRequest(borrower.id))
+    pool.start()
+    await asyncio.sleep(0.2)
+    await queue.join()
+    await pool.stop()
+
+    scores = await stored_scores(session_maker)
+    assert scores[borrower.id] == (None, CreditScoreStatus.FAILED)
+
+
+@pytest.mark.asyncio
+async def test_only_the_failing_borrower_of_a_batch_is_marked_failed(
+    session_maker, monkeypatch
+):
+    pending = await add_pending_borrowers(session_maker, 3)
+    real_calculate = credit_scoring.calculate_credit_scores
+
+    def calculate_except_one_year(incomes, employment_years, has_previous_loans):
+        if 1 in employment_years:
+            raise RuntimeError("cannot score one year of employment")
+        return real_calculate(incomes, employment_years, has_previous_loans)
+
+    monkeypatch.setattr(
+        credit_scoring, "calculate_credit_scores", calculate_except_one_year
+    )
+    queue = InMemoryCreditScoreQueue()
+    pool = CreditScoreWorkerPool(
+        queue, session_maker, workers=1, max_retries=0, retry_backoff=0.01
+    )
+
+    for borrower in pending:
+        await queue.publish(CreditScoreRequest(borrower.id))
+    pool.start()
+    await asyncio.wait_for(queue.join(), timeout=5)
+    await pool.stop()
+
+    scores = await stored_scores(session_maker)
+    assert scores == {
+        pending[0].id: (650, CreditScoreStatus.SCORED),
+        pending[1].id: (None, CreditScoreStatus.FAILED),
+        pending[2].id: (670, CreditScoreStatus.SCORED),
+    }
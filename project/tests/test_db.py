@@ -0,0 +1,144 @@
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app import config
+from app.config import Settings
+from app.db import (
+    DatabaseProbe,
+    InstrumentedAsyncQueuePool,
+    create_engine,
+    get_pool_saturation,
+    get_pool_stats,
+)
+from app.queries import Reader
+from app.unit_of_work import SqlAlchemyUnitOfWork
+
+
+@pytest.mark.asyncio
+async def test_engine_pool_is_sized_from_settings_and_reports_stats():
+    settings = Settings(db_pool_size=2, db_max_overflow=0, db_pool_timeout=0.1)
+    engine = create_engine(config.get_db_url(), settings)
+    assert isinstance(engine.pool, InstrumentedAsyncQueuePool)
+
+    try:
+        async with engine.connect() as first, engine.connect() as second:
+            await first.execute(text("SELECT 1"))
+            await second.execute(text("SELECT 1"))
+            stats = get_pool_stats(engine)
+            assert stats["size"] == 2
+            assert stats["checked_out"] == 2
+            assert stats["max_overflow"] == 0
+
+            with pytest.raises(PoolTimeoutError):
+                await engine.connect()
+
+        stats = get_pool_stats(engine)
+        assert stats["checked_out"] == 0
+        assert stats["checkouts"] == 3
+        assert stats["timeouts"] == 1
+        assert stats["wait_seconds_max"] >= 0.1
+    finally:
+        await engine.dispose()
+
+
+def test_db_pool_endpoint(client):
+    response = client.get("/v1/db/pool")
+    assert response.status_code == 200
+    stats = response.json()
+    assert stats["pool_class"] == "InstrumentedAsyncQueuePool"
+    assert stats["checked_out"] >= 0
+    assert "wait_seconds_avg" in stats
+
+
+@pytest.mark.asyncio
+async def test_connections_are_held_only_while_a_use_case_runs():
+    engine = create_engine(config.get_db_url(), Settings())
+    session_maker = async_sessionmaker(
+        engine, class_=AsyncSession, expire_on_commit=False
+    )
+
+    async def checked_out(session):
+        await session.execute(text("SELECT 1"))
+        return engine.pool.checkedout()
+
+    try:
+        assert await Reader(session_maker)(checked_out) == 1
+        assert engine.pool.checkedout() == 0
+
+        async with SqlAlchemyUnitOfWork(session_maker) as uow:
+            assert engine.pool.checkedout() == 0
+            assert await checked_out(uow.session) == 1
+            await uow.commit()
+            assert engine.pool.checkedout() == 0
+    finally:
+        await engine.dispose()
+
+
+def test_invalid_requests_do_not_check_out_a_connection(client):
+    checkouts = client.get("/v1/db/pool").json()["checkouts"]
+
+    assert client.get("/v1/loans", params={"limit": 0}).status_code == 422
+    assert client.get("/v1/investments", params={"limit": 0}).status_code == 422
+
+    assert client.get("/v1/db/pool").json()["checkouts"] == checkouts
+
+
+@pytest.mark.asyncio
+async def test_pool_saturation_counts_overflow_connections():
+    settings = Settings(db_pool_size=1, db_max_overflow=1, db_pool_timeout=0.1)
+    engine = create_engine(config.get_db_url(), settings)
+    try:
+        assert get_pool_saturation(engine) == 0
+        async with engine.connect():
+            assert get_pool_saturation(engine) == 0.5
+            async with engine.connect():
+                assert get_pool_saturation(engine) == 1
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_pools_with_unlimited_overflow_report_no_saturation():
+    settings = Settings(db_pool_size=1, db_max_overflow=-1, db_pool_timeout=0.1)
+    engine = create_engine(config.get_db_url(), settings)
+    try:
+        async with engine.connect(), engine.connect():
+            assert get_pool_saturation(engine) is None
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_database_probe_result_is_reused_within_its_ttl(in_memory_db):
+    probes = []
+    event.listen(
+        in_memory_db.sync_engine,
+        "before_cursor_execute",
+        lambda *args: probes.append(args[2]),
+    )
+    probe = DatabaseProbe(in_memory_db, ttl=60)
+
+    first = await probe.check()
+    assert first.ok
+    assert await probe.check() is first
+    assert probes == ["SELECT 1"]
+
+    probe.ttl = 0
+    assert (await probe.check()) is not first
+    assert len(probes) == 2
+
+
+@pytest.mark.asyncio
+async def test_database_probe_reports_failures_without_details(tmp_path):
+    settings = Settings()
+    engine = create_engine(
+        f"sqlite+aiosqlite:///{tmp_path}/missing/db.sqlite", settings
+    )
+    try:
+        result = await DatabaseProbe(engine).check()
+    finally:
+        await engine.dispose()
+    assert not result.ok
+    assert result.error == "OperationalError"
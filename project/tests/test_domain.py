@@ -1,3 +1,4 @@
+import dataclasses
 from decimal import Decimal
 
 import pytest
@@ -11,6 +12,7 @@ from app.models import (
     Loan,
     LoanAlreadyFundedError,
     LoanStatus,
+    LoanView,
     Repayment,
 )
 
@@ -193,3 +195,18 @@ def test_repayment_validation():
         match="Repayment amount exceeds remaining investment amount",
     ):
         Repayment(investment=investment, amount=Decimal("6000.00")).validate_amount()
+
+
+def test_loan_view_is_a_slotted_read_only_projection():
+    view = LoanView(
+        id="loan-1",
+        borrower_id="borrower-1",
+        amount=Decimal("1000.00"),
+        purpose="Business expansion",
+        term_months=12,
+    )
+
+    assert not hasattr(view, "__dict__")
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        view.status = LoanStatus.FUNDED
+    assert view.to_dict()["status"] == "active"
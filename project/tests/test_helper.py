@@ -0,0 +1,44 @@
+from array import array
+from itertools import product
+
+import pytest
+
+from app.helper import calculate_credit_score, calculate_credit_scores
+
+
+INCOMES = [-1500, 0, 999, 1000, 15000, 150000, 199999, 200000, 500000]
+EMPLOYMENT_YEARS = [-1, 0, 1, 4, 5, 6, 40]
+HAS_PREVIOUS_LOANS = [False, True]
+
+PROFILES = list(product(INCOMES, EMPLOYMENT_YEARS, HAS_PREVIOUS_LOANS))
+COLUMNS = [list(column) for column in zip(*PROFILES)]
+EXPECTED = [calculate_credit_score(*profile) for profile in PROFILES]
+
+
+def test_batch_scores_match_scalar_for_lists():
+    assert calculate_credit_scores(*COLUMNS) == EXPECTED
+
+
+def test_batch_scores_match_scalar_for_array_columns():
+    incomes, employment_years, has_previous_loans = COLUMNS
+    scores = calculate_credit_scores(
+        array("q", incomes),
+        array("q", employment_years),
+        array("b", has_previous_loans),
+    )
+    assert scores == EXPECTED
+
+
+def test_batch_scores_match_scalar_for_numpy_arrays():
+    np = pytest.importorskip("numpy")
+    incomes, employment_years, has_previous_loans = COLUMNS
+    scores = calculate_credit_scores(
+        np.array(incomes), np.array(employment_years), np.array(has_previous_loans)
+    )
+    assert scores.tolist() == EXPECTED
+
+
+def test_batch_scores_do_not_log_per_row(caplog):
+    with caplog.at_level("INFO", logger="app.helper"):
+        calculate_credit_scores(*COLUMNS)
+    assert caplog.records == []
@@ -0,0 +1,123 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.idempotency import REPLAYED_HEADER, IdempotencyStore
+
+
+class Clock:
+    def __init__(self):
+        self.now = datetime(2026, 1, 1)
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def session_maker(in_memory_db):
+    return async_sessionmaker(in_memory_db, class_=AsyncSession)
+
+
+def investor_payload(name="Idempotent Investor"):
+    return {"name": name, "email": "idem@example.com", "available_funds": 5000}
+
+
+def borrower_payload():
+    return {
+        "name": "Idempotent Borrower",
+        "email": "idem-borrower@example.com",
+        "income": 150000,
+        "employment_years": 6,
+        "has_previous_loans": False,
+    }
+
+
+@pytest.mark.asyncio
+async def test_a_reserved_key_is_held_until_it_expires(session_maker):
+    clock = Clock()
+    store = IdempotencyStore(lock_timeout=60, clock=clock)
+
+    assert await store.reserve(session_maker, "key", "a")
+    assert not await store.reserve(session_maker, "key", "a")
+    in_progress = await store.lookup(session_maker, "key")
+    assert in_progress.status_code is None
+
+    # The request holding the key never finished
+    clock.now += timedelta(seconds=61)
+    assert await store.lookup(session_maker, "key") is None
+    assert await store.reserve(session_maker, "key", "b")
+
+
+@pytest.mark.asyncio
+async def test_a_stored_response_is_replayed_with_one_lookup(
+    session_maker, in_memory_db
+):
+    clock = Clock()
+    store = IdempotencyStore(ttl=3600, clock=clock)
+    await store.reserve(session_maker, "key", "a")
+    await store.complete(session_maker, "key", "a", 201, "application/json", "{}")
+    statements = []
+    event.listen(
+        in_memory_db.sync_engine,
+        "before_cursor_execute",
+        lambda *args: statements.append(args[2]),
+    )
+
+    assert (await store.lookup(session_maker, "key")).status_code == 201
+    assert statements == []
+
+    # Another process, without the response in its LRU
+    other = IdempotencyStore(ttl=3600, clock=clock)
+    assert (await other.lookup(session_maker, "key")).body == "{}"
+    assert len(statements) == 1
+
+    clock.now += timedelta(seconds=3601)
+    other = IdempotencyStore(ttl=3600, clock=clock)
+    assert await other.lookup(session_maker, "key") is None
+
+
+def test_retried_requests_replay_the_first_response(client):
+    headers = {"Idempotency-Key": str(uuid.uuid4())}
+
+    first = client.post("/v1/investors", json=investor_payload(), headers=headers)
+    retry = client.post("/v1/investors", json=investor_payload(), headers=headers)
+
+    assert first.status_code == retry.status_code == 201
+    assert retry.json()["investor_id"] == first.json()["investor_id"]
+    assert REPLAYED_HEADER not in first.headers
+    assert retry.headers[REPLAYED_HEADER] == "true"
+
+    # Without a key every request runs
+    again = client.post("/v1/investors", json=investor_payload())
+    assert again.json()["investor_id"] != first.json()["investor_id"]
+
+
+def test_a_key_cannot_be_reused_for_another_request(client):
+    headers = {"Idempotency-Key": str(uuid.uuid4())}
+
+    client.post("/v1/borrowers", json=borrower_payload(), headers=headers)
+    response = client.post(
+        "/v1/investors", json=investor_payload("Someone else"), headers=headers
+    )
+
+    assert response.status_code == 422
+    assert "different request" in response.json()["detail"]
+
+
+def test_failed_requests_release_their_key(client):
+    headers = {"Idempotency-Key": str(uuid.uuid4())}
+    application = {
+        "borrower_id": str(uuid.uuid4()),
+        "amount": 1000,
+        "term_months": 12,
+        "purpose": "retry",
+    }
+
+    first = client.post("/v1/loans/apply", json=application, headers=headers)
+    retry = client.post("/v1/loans/apply", json=application, headers=headers)
+
+    assert first.status_code == retry.status_code == 404
+    assert REPLAYED_HEADER not in retry.headers
@@ -0,0 +1,75 @@
+import json
+import logging
+import sys
+
+import pytest
+
+from app.config import Settings
+from app.logs import JsonFormatter, SamplingFilter, configure_logging, stop_logging
+
+
+def make_record(name="app.test", level=logging.INFO, msg="hello %s", args=("world",)):
+    return logging.LogRecord(name, level, __file__, 1, msg, args, None)
+
+
+@pytest.fixture
+def restore_logging():
+    root = logging.getLogger()
+    level = root.level
+    yield
+    stop_logging()
+    root.setLevel(level)
+    logging.getLogger("app.helper").setLevel(logging.NOTSET)
+
+
+def test_json_formatter_adds_extra_fields_and_exceptions():
+    record = make_record()
+    record.borrower_id = "b-1"
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        record.exc_info = sys.exc_info()
+
+    entry = json.loads(JsonFormatter().format(record))
+
+    assert entry["message"] == "hello world"
+    assert entry["level"] == "INFO"
+    assert entry["logger"] == "app.test"
+    assert entry["borrower_id"] == "b-1"
+    assert "ValueError: boom" in entry["exception"]
+
+
+def test_sampling_keeps_an_even_share_of_low_level_records():
+    sampler = SamplingFilter({"app.api": 0.25})
+
+    kept = [sampler.filter(make_record("app.api.loans")) for _ in range(8)]
+
+    assert kept.count(True) == 2
+    assert sampler.filter(make_record("app.api.loans", level=logging.WARNING))
+    assert sampler.filter(make_record("app.services"))
+
+
+def test_configured_logging_writes_json_through_the_queue(restore_logging, capsys):
+    configure_logging(
+        Settings(
+            log_format="json",
+            log_levels={"app.helper": "WARNING"},
+            log_sample_rates={"app.sampled": 0.5},
+        )
+    )
+
+    logging.getLogger("app.test").info("Created %s", "b-1", extra={"n": 1})
+    logging.getLogger("app.helper").info("Not at this level")
+    for i in range(4):
+        logging.getLogger("app.sampled").info("Sampled %d", i)
+    # Writes out the queue
+    stop_logging()
+
+    lines = [json.loads(line) for line in capsys.readouterr().err.splitlines()]
+    messages = [line["message"] for line in lines]
+    assert {"message": "Created b-1", "n": 1}.items() <= lines[0].items()
+    assert "Not at this level" not in messages
+    assert [m for m in messages if m.startswith("Sampled")] == [
+        "Sampled 1",
+        "Sampled 3",
+    ]
@@ -0,0 +1,90 @@
+import logging
+import re
+
+import pytest
+from sqlalchemy import text
+
+from app.metrics import Histogram, Metrics, RequestDbStats, instrument_engine
+
+
+def sample(body, name, **labels):
+    """
+    Value of one sample in a Prometheus text exposition.
+    """
+    rendered = ",".join(f'{key}="{value}"' for key, value in labels.items())
+    pattern = "^" + re.escape(f"{name}{{{rendered}}}" if labels else name) + r" (\S+)$"
+    match = re.search(pattern, body, re.MULTILINE)
+    assert match, f"{name} {labels} not in metrics"
+    return float(match.group(1))
+
+
+def test_histogram_buckets_are_cumulative_and_inclusive():
+    histogram = Histogram((1, 5))
+    for value in (0.5, 1, 3, 7):
+        histogram.observe(value)
+
+    assert histogram.cumulative() == [("1.0", 2), ("5.0", 3), ("+Inf", 4)]
+    assert histogram.sum == 11.5
+    assert histogram.count == 4
+
+
+def test_request_metrics_are_rendered_per_route():
+    metrics = Metrics()
+    metrics.observe_request(
+        "GET", '/v1/"quoted"', 200, 0.02, RequestDbStats(statements=3, seconds=0.01)
+    )
+
+    body = metrics.render()
+    assert "# TYPE http_request_duration_seconds histogram" in body
+    labels = {"method": "GET", "route": r"/v1/\"quoted\"", "status": "200"}
+    assert (
+        sample(body, "http_request_duration_seconds_bucket", **labels, le="0.01") == 0
+    )
+    assert (
+        sample(body, "http_request_duration_seconds_bucket", **labels, le="0.025") == 1
+    )
+    assert sample(body, "http_request_duration_seconds_count", **labels) == 1
+    labels.pop("status")
+    assert sample(body, "http_request_db_statements_sum", **labels) == 3
+    assert sample(body, "db_slow_statements_total") == 0
+
+
+@pytest.mark.asyncio
+async def test_slow_statements_are_logged(in_memory_db, caplog):
+    metrics = Metrics(slow_query_threshold=0)
+    instrument_engine(in_memory_db, metrics)
+
+    with caplog.at_level(logging.WARNING, logger="app.metrics"):
+        async with in_memory_db.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    assert metrics.statement_latency.count == 1
+    assert metrics.slow_statements == 1
+    assert "Slow query" in caplog.text
+    assert "SELECT 1" in caplog.text
+
+
+def test_metrics_endpoint_reports_database_work_per_route(client):
+    assert client.get("/v1/borrowers").status_code == 200
+    assert client.get("/v1/no-such-route").status_code == 404
+
+    response = client.get("/v1/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    route = {"method": "GET", "route": "/v1/borrowers"}
+    assert sample(body, "http_request_duration_seconds_count", **route, status=200) >= 1
+    assert sample(body, "http_request_db_statements_sum", **route) >= 1
+    assert sample(body, "http_request_db_duration_seconds_sum", **route) > 0
+    assert (
+        sample(
+            body,
+            "http_request_duration_seconds_count",
+            method="GET",
+            route="unmatched",
+            status=404,
+        )
+        >= 1
+    )
+    assert sample(body, "db_statement_duration_seconds_count") >= 1
@@ -1,6 +1,9 @@
 # project/tests/test_ping.py
 
+import pytest
 
+
+@pytest.mark.asyncio(loop_scope="session")
 async def test_ping(async_client):
     response = await async_client.get("/v1/ping")
     assert response.status_code == 200
@@ -8,9 +11,29 @@ async def test_ping(async_client):
     assert response_json["environment"] == "dev"
     assert response_json["status"] == "healthy"
     assert response_json["testing"] is True
-    assert "web_test" in response_json["database_url"]
+    # Settings that may hold credentials are never exposed
+    assert "database_url" not in response_json
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_liveness(async_client):
+    response = await async_client.get("/v1/health/live")
+    assert response.status_code == 200
+    assert response.json() == {"status": "alive"}
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_readiness_probes_the_database(async_client):
+    response = await async_client.get("/v1/health/ready")
+    assert response.status_code == 200
+    response_json = response.json()
+    assert response_json["status"] == "ready"
+    assert response_json["database"]["ok"] is True
+    assert response_json["database"]["error"] is None
+    assert 0 <= response_json["pool"]["saturation"] < 1
 
 
+@pytest.mark.asyncio(loop_scope="session")
 async def test_version(async_client):
     response = await async_client.get("/v1/version")
     assert response.status_code == 200
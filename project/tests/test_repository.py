@@ -4,6 +4,7 @@ import pytest
 from sqlalchemy import text
 
 from app import models, repository
+from app.models import LoanStatus
 
 
 @pytest.mark.asyncio
@@ -24,7 +25,9 @@ async def test_repository_can_save_a_loan(session):
             )
         )
     )
-    assert borrower_rows == [(borrower.id, "John Doe", "john@example.com", 700)]
+    assert borrower_rows == [
+        (borrower.id, "John Doe", "john@example.com", 700, None, None, None, "SCORED")
+    ]
 
     loan = models.Loan(
         borrower=borrower,
@@ -105,3 +108,198 @@ async def test_repository_can_save_an_investment(session):
     assert investment_from_db.loan.id == loan.id
     assert investment_from_db.amount == investment.amount
     assert investment_from_db.status == investment.status
+
+
+@pytest.mark.asyncio
+async def test_repository_can_save_many_borrowers(session):
+    new_borrowers = [
+        models.Borrower(name=f"Borrower {i}", email=f"b{i}@example.com", credit_score=i)
+        for i in range(3)
+    ]
+    borrower_repo = repository.SqlAlchemyBorrowerRepository(session)
+    await borrower_repo.add_many(new_borrowers)
+    await session.commit()
+
+    rows = list(await session.execute(text("SELECT id, credit_score FROM borrowers")))
+    assert sorted(rows, key=lambda row: row[1]) == [
+        (borrower.id, borrower.credit_score) for borrower in new_borrowers
+    ]
+
+
+async def add_borrower_with_loans(session, statuses):
+    borrower = models.Borrower(
+        name="John Doe", email="john@example.com", credit_score=700
+    )
+    await repository.SqlAlchemyBorrowerRepository(session).add(borrower)
+    loan_repo = repository.SqlAlchemyLoanRepository(session)
+    new_loans = []
+    for status in statuses:
+        loan = models.Loan(
+            borrower=borrower,
+            amount=Decimal("1000.00"),
+            purpose="Home improvement",
+            term_months=12,
+            status=status,
+        )
+        await loan_repo.add(loan)
+        new_loans.append(loan)
+    await session.commit()
+    return borrower, new_loans
+
+
+@pytest.mark.asyncio
+async def test_loan_counts_are_maintained_on_insert_and_status_change(session):
+    borrower, new_loans = await add_borrower_with_loans(
+        session, [LoanStatus.ACTIVE, LoanStatus.ACTIVE, LoanStatus.PAID]
+    )
+    loan_repo = repository.SqlAlchemyLoanRepository(session)
+
+    counts = await loan_repo.get_loan_counts_by_status(borrower.id)
+    assert counts[LoanStatus.ACTIVE] == 2
+    assert counts[LoanStatus.PAID] == 1
+    assert counts[LoanStatus.FUNDED] == 0
+
+    changed = await loan_repo.change_status(
+        new_loans[0], LoanStatus.ACTIVE, LoanStatus.FUNDED
+    )
+    # A second transition from the stale status is refused
+    changed_again = await loan_repo.change_status(
+        new_loans[0], LoanStatus.ACTIVE, LoanStatus.FUNDED
+    )
+    await session.commit()
+
+    assert changed is True
+    assert changed_again is False
+    counts = await loan_repo.get_loan_counts_by_status(borrower.id)
+    assert counts[LoanStatus.ACTIVE] == 1
+    assert counts[LoanStatus.FUNDED] == 1
+    assert counts == await loan_repo.count_loans_by_status(borrower.id) | {
+        LoanStatus.REPAYING: 0,
+        LoanStatus.DEFAULTED: 0,
+    }
+
+
+@pytest.mark.asyncio
+async def test_loan_count_drift_is_detected_and_rebuilt(session):
+    borrower, _ = await add_borrower_with_loans(
+        session, [LoanStatus.ACTIVE, LoanStatus.DEFAULTED]
+    )
+    loan_repo = repository.SqlAlchemyLoanRepository(session)
+    assert await loan_repo.find_loan_count_drift() == []
+
+    await session.execute(
+        text("UPDATE borrower_loan_counts SET active_count = 7, defaulted_count = 0")
+    )
+    await session.commit()
+    assert await loan_repo.find_loan_count_drift() == [borrower.id]
+
+    await loan_repo.rebuild_loan_counts()
+    await session.commit()
+
+    assert await loan_repo.find_loan_count_drift() == []
+    counts = await loan_repo.get_loan_counts_by_status(borrower.id)
+    assert counts[LoanStatus.ACTIVE] == 1
+    assert counts[LoanStatus.DEFAULTED] == 1
+
+
+@pytest.mark.asyncio
+async def test_borrowers_are_listed_page_by_page(session):
+    borrower_repo = repository.SqlAlchemyBorrowerRepository(session)
+    await borrower_repo.add_many(
+        [
+            models.Borrower(
+                name=f"Borrower {i}", email=f"b{i}@example.com", credit_score=500 + i
+            )
+            for i in range(0, 100, 10)
+        ]
+    )
+    await session.commit()
+
+    pages, after_id = [], None
+    while page := await borrower_repo.list(after_id=after_id, limit=4):
+        pages.append([borrower.credit_score for borrower in page])
+        after_id = page[-1].id
+
+    assert [len(page) for page in pages] == [4, 4, 2]
+    assert sorted(sum(pages, [])) == list(range(500, 600, 10))
+
+    in_range = await borrower_repo.list(min_credit_score=530, max_credit_score=560)
+    assert sorted(borrower.credit_score for borrower in in_range) == [
+        530,
+        540,
+        550,
+        560,
+    ]
+    [by_email] = await borrower_repo.list(email="b20@example.com")
+    assert by_email.credit_score == 520
+
+
+@pytest.mark.asyncio
+async def test_borrowers_can_be_streamed_in_batches(session):
+    borrower_repo = repository.SqlAlchemyBorrowerRepository(session)
+    await borrower_repo.add_many(
+        [
+            models.Borrower(
+                name=f"Borrower {i}", email=f"b{i}@example.com", credit_score=i
+            )
+            for i in range(7)
+        ]
+    )
+    await session.commit()
+
+    batches = [
+        rows async for rows in borrower_repo.stream(min_credit_score=2, batch_size=2)
+    ]
+
+    assert [len(rows) for rows in batches] == [2, 2, 1]
+    assert batches[0][0].keys() == {
+        "id",
+        "name",
+        "email",
+        "credit_score",
+        "credit_score_status",
+    }
+    assert {row["credit_score_status"] for rows in batches for row in rows} == {
+        "scored"
+    }
+
+
+@pytest.mark.asyncio
+async def test_active_loans_are_listed_by_amount_page_by_page(session):
+    borrower = models.Borrower(name="John", email="john@example.com", credit_score=700)
+    await repository.SqlAlchemyBorrowerRepository(session).add(borrower)
+    loan_repo = repository.SqlAlchemyLoanRepository(session)
+    for amount, term_months in [
+        (500, 6),
+        (1500, 12),
+        (1000, 24),
+        (1000, 12),
+        (3000, 36),
+    ]:
+        await loan_repo.add(
+            models.Loan(
+                borrower=borrower,
+                amount=Decimal(amount),
+                purpose="Test",
+                term_months=term_months,
+            )
+        )
+    funded = models.Loan(
+        borrower=borrower, amount=Decimal(700), purpose="Test", term_months=12
+    )
+    await loan_repo.add(funded)
+    await loan_repo.change_status(funded, LoanStatus.ACTIVE, LoanStatus.FUNDED)
+    await session.commit()
+
+    pages, after = [], None
+    while page := await loan_repo.list(
+        status=LoanStatus.ACTIVE, min_amount=Decimal(1000), after=after, limit=2
+    ):
+        pages.append([int(loan.amount) for loan in page])
+        after = (page[-1].amount, page[-1].id)
+
+    assert pages == [[1000, 1000], [1500, 3000]]
+
+    short_term = await loan_repo.list(status=LoanStatus.ACTIVE, max_term_months=12)
+    assert [int(loan.amount) for loan in short_term] == [500, 1000, 1500]
+    assert all(isinstance(loan, models.LoanView) for loan in short_term)
@@ -0,0 +1,91 @@
+import pytest
+from sqlalchemy import delete, insert, select
+
+from app.models import CreditScoreStatus
+from app.orm import borrowers, job_checkpoints
+from app.repository import SqlAlchemyCheckpointRepository
+from app.rescoring import RESCORE_JOB, BorrowerRescoringJob
+
+
+async def add_stale_borrowers(session_maker, prefix):
+    # Ids sort after the uuids of other tests' borrowers
+    rows = [
+        {
+            "id": f"{prefix}-{i}",
+            "name": f"Borrower {i}",
+            "email": f"{prefix}-{i}@example.com",
+            "credit_score": 1,
+            "income": 150000,
+            "employment_years": i,
+            "has_previous_loans": False,
+            "credit_score_status": status,
+        }
+        for i, status in enumerate(
+            [CreditScoreStatus.SCORED] * 4
+            + [CreditScoreStatus.FAILED, CreditScoreStatus.PENDING]
+        )
+    ]
+    async with session_maker() as session:
+        await session.execute(insert(borrowers), rows)
+        await session.commit()
+    return [row["id"] for row in rows]
+
+
+async def stored_scores(session_maker, borrower_ids):
+    async with session_maker() as session:
+        result = await session.execute(
+            select(
+                borrowers.c.id,
+                borrowers.c.credit_score,
+                borrowers.c.credit_score_status,
+            ).where(borrowers.c.id.in_(borrower_ids))
+        )
+        return {row.id: (row.credit_score, row.credit_score_status) for row in result}
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_rescoring_updates_every_scored_borrower(app, async_client):
+    session_maker = app.state.async_db_session
+    async with session_maker() as session:
+        await session.execute(delete(job_checkpoints))
+        await session.commit()
+    ids = await add_stale_borrowers(session_maker, "rescore-all")
+    reports = []
+
+    progress = await BorrowerRescoringJob(
+        session_maker, workers=2, chunk_size=2, on_progress=reports.append
+    ).run()
+
+    scores = await stored_scores(session_maker, ids)
+    for i, borrower_id in enumerate(ids[:5]):
+        assert scores[borrower_id] == (650 + i * 10, CreditScoreStatus.SCORED)
+    # Still waiting for its first score
+    assert scores[ids[5]] == (1, CreditScoreStatus.PENDING)
+    assert progress.resumed_after is None
+    assert progress.updated >= 5
+    assert reports[-1] is progress
+    async with session_maker() as session:
+        assert await SqlAlchemyCheckpointRepository(session).get(RESCORE_JOB) is None
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_rescoring_resumes_from_the_checkpoint(app, async_client):
+    session_maker = app.state.async_db_session
+    ids = await add_stale_borrowers(session_maker, "rescore-resume")
+    # An earlier run got as far as the second borrower
+    async with session_maker() as session:
+        await SqlAlchemyCheckpointRepository(session).save(RESCORE_JOB, ids[1], 2)
+        await session.commit()
+
+    progress = await BorrowerRescoringJob(session_maker, chunk_size=2).run()
+
+    scores = await stored_scores(session_maker, ids)
+    assert scores[ids[0]] == scores[ids[1]] == (1, CreditScoreStatus.SCORED)
+    assert scores[ids[2]] == (670, CreditScoreStatus.SCORED)
+    assert progress.resumed_after == ids[1]
+    assert progress.scanned == 3
+
+    # Finished runs clear the checkpoint, so the next one starts over
+    progress = await BorrowerRescoringJob(session_maker).run()
+    assert progress.resumed_after is None
+    assert (await stored_scores(session_maker, ids[:1]))[ids[0]][0] == 650
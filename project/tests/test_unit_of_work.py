@@ -0,0 +1,307 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import clear_mappers
+
+from app import queries, services
+from app.models import (
+    Borrower,
+    Investment,
+    InvestmentStatus,
+    Investor,
+    Loan,
+    LoanAlreadyFundedError,
+    LoanStatus,
+)
+from app.orm import (
+    borrower_loan_counts,
+    investments,
+    investor_exposure,
+    loans,
+    start_mappers,
+)
+from app.repository import SqlAlchemyAnalyticsRepository
+from app.unit_of_work import SqlAlchemyUnitOfWork
+
+
+@pytest.fixture
+def uow_factory(in_memory_db):
+    start_mappers()
+    session_maker = async_sessionmaker(
+        in_memory_db, class_=AsyncSession, expire_on_commit=False
+    )
+    yield lambda: SqlAlchemyUnitOfWork(session_maker)
+    clear_mappers()
+
+
+@pytest.fixture
+def statements(in_memory_db):
+    """
+    Records every statement sent to the database, executemany counted once.
+    """
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(in_memory_db.sync_engine, "before_cursor_execute", record)
+    yield executed
+    event.remove(in_memory_db.sync_engine, "before_cursor_execute", record)
+
+
+def make_borrower(i=0):
+    return Borrower(name=f"Borrower {i}", email=f"b{i}@example.com", credit_score=700)
+
+
+async def add_pending_investment(uow_factory):
+    borrower = make_borrower()
+    loan = Loan(borrower=borrower, amount=1000, purpose="Test", term_months=12)
+    investor = Investor(name="Investor", email="i@example.com", available_funds=5000)
+    investment = Investment(investor=investor, loan=loan, amount=1000)
+    async with uow_factory() as uow:
+        await uow.borrowers.add(borrower)
+        await uow.investors.add(investor)
+        await uow.loans.add(loan)
+        await uow.investments.add(investment)
+        await uow.commit()
+    return investment
+
+
+@pytest.mark.asyncio
+async def test_writes_are_sent_in_one_batch_at_commit(uow_factory, statements):
+    new_borrowers = [make_borrower(i) for i in range(3)]
+    async with uow_factory() as uow:
+        for borrower in new_borrowers:
+            await uow.borrowers.add(borrower)
+        await uow.loans.add(
+            Loan(borrower=new_borrowers[0], amount=100, purpose="Test", term_months=6)
+        )
+        assert statements == []
+        await uow.commit()
+
+    # One executemany for the borrowers, then the loan, loan counts and loan
+    # totals
+    assert len(statements) == 4
+
+
+@pytest.mark.asyncio
+async def test_batched_writes_keep_their_order(uow_factory, statements):
+    first, second = make_borrower(0), make_borrower(1)
+    async with uow_factory() as uow:
+        await uow.borrowers.add(first)
+        await uow.loans.add(
+            Loan(borrower=first, amount=100, purpose="Test", term_months=6)
+        )
+        await uow.borrowers.add(second)
+        await uow.commit()
+
+    # The second borrower is not merged into the insert sent before the loan
+    assert len(statements) == 5
+    assert statements[0].startswith("INSERT INTO borrowers")
+    assert statements[1].startswith("INSERT INTO loans")
+    assert statements[-1].startswith("INSERT INTO borrowers")
+
+
+@pytest.mark.asyncio
+async def test_reads_see_buffered_writes(uow_factory):
+    borrower = make_borrower()
+    async with uow_factory() as uow:
+        await uow.borrowers.add(borrower)
+        stored = await uow.borrowers.get(borrower.id)
+        await uow.commit()
+
+    assert stored.email == borrower.email
+
+
+@pytest.mark.asyncio
+async def test_uncommitted_work_is_rolled_back(uow_factory):
+    borrower = make_borrower()
+    async with uow_factory() as uow:
+        await uow.borrowers.add(borrower)
+        await uow.flush()
+
+    async with uow_factory() as uow:
+        assert await uow.borrowers.get(borrower.id) is None
+
+
+@pytest.mark.asyncio
+async def test_a_failing_bulk_row_fails_alone(uow_factory, caplog):
+    prospects = [
+        services.CreateBorrowerDTO(
+            name=f"Borrower {i}",
+            email=f"b{i}@example.com",
+            income=150000,
+            employment_years=6,
+            has_previous_loans=False,
+        )
+        for i in range(5)
+    ]
+    # Rejected by the database rather than by validation
+    prospects[3] = prospects[3].model_copy(update={"name": None})
+
+    results = await services.create_borrowers_bulk(
+        prospects, uow_factory(), chunk_size=5
+    )
+
+    assert [result.error for result in results] == [
+        None,
+        None,
+        None,
+        services.BULK_BORROWER_ERROR,
+        None,
+    ]
+    assert "NOT NULL" in caplog.text
+    async with uow_factory() as uow:
+        created = await uow.borrowers.list()
+    assert len(created) == 4
+
+
+@pytest.mark.asyncio
+async def test_approve_investment_funds_loan_in_one_transaction(
+    uow_factory, statements
+):
+    investment = await add_pending_investment(uow_factory)
+    statements.clear()
+
+    await services.approve_investment(investment.id, uow_factory())
+
+    # Conditional investment and loan updates, then one statement each for the
+    # investor exposure, loan counts, loan totals and funded volume
+    assert len(statements) == 6
+    async with uow_factory() as uow:
+        session = uow.session
+        assert await session.scalar(select(investments.c.status)) == (
+            InvestmentStatus.ACTIVE
+        )
+        assert await session.scalar(select(loans.c.status)) == LoanStatus.FUNDED
+        counts = (await session.execute(select(borrower_loan_counts))).one()
+        assert (counts.active_count, counts.funded_count) == (0, 1)
+
+
+@pytest.mark.asyncio
+async def test_approve_investment_rejects_funded_loan(uow_factory):
+    investment = await add_pending_investment(uow_factory)
+    async with uow_factory() as uow:
+        loan = await uow.loans.get(investment.loan.id)
+        await uow.loans.change_status(loan, LoanStatus.ACTIVE, LoanStatus.FUNDED)
+        await uow.commit()
+
+    with pytest.raises(LoanAlreadyFundedError):
+        await services.approve_investment(investment.id, uow_factory())
+
+    async with uow_factory() as uow:
+        stored = await uow.session.scalar(select(investments.c.status))
+    assert stored == InvestmentStatus.PENDING_APPROVAL
+
+
+@pytest.mark.asyncio
+async def test_repayments_are_applied_in_bulk(uow_factory, statements):
+    investment = await add_pending_investment(uow_factory)
+    await services.approve_investment(investment.id, uow_factory())
+    statements.clear()
+
+    results = await services.ingest_repayments(
+        [
+            services.RepaymentDTO(investment_id=investment.id, amount=300),
+            services.RepaymentDTO(investment_id=investment.id, amount=200),
+        ],
+        uow_factory(),
+    )
+
+    assert [result.remaining_amount for result in results] == [700, 500]
+    # Locking read, repayments insert, repaid total and investor exposure
+    # updates, loan update, loan counts and loan totals
+    assert len(statements) == 7
+    async with uow_factory() as uow:
+        stored = await uow.investments.get(investment.id)
+        assert stored.repaid_total == 500
+        assert stored.remaining_amount == 500
+        assert stored.loan.status == LoanStatus.REPAYING
+
+
+@pytest.mark.asyncio
+async def test_a_failing_repayment_fails_alone(uow_factory, caplog):
+    investment = await add_pending_investment(uow_factory)
+    await services.approve_investment(investment.id, uow_factory())
+    rejected = services.RepaymentDTO(investment_id=investment.id, amount=100)
+
+    results = await services.ingest_repayments(
+        [
+            services.RepaymentDTO(investment_id=investment.id, amount=300),
+            # Rejected by the database rather than by validation
+            rejected.model_copy(update={"paid_at": "not a date"}),
+            services.RepaymentDTO(investment_id=investment.id, amount=200),
+        ],
+        uow_factory(),
+    )
+
+    assert [result.error for result in results] == [
+        None,
+        services.REPAYMENT_ERROR,
+        None,
+    ]
+    assert [result.remaining_amount for result in results] == [700, None, 500]
+    assert "Date type only accepts" in caplog.text
+    async with uow_factory() as uow:
+        stored = await uow.investments.get(investment.id)
+    assert stored.repaid_total == 500
+
+
+@pytest.mark.asyncio
+async def test_fully_repaid_investment_completes_and_pays_the_loan(uow_factory):
+    investment = await add_pending_investment(uow_factory)
+    await services.approve_investment(investment.id, uow_factory())
+
+    results = await services.ingest_repayments(
+        [
+            services.RepaymentDTO(investment_id=investment.id, amount=400),
+            services.RepaymentDTO(investment_id=investment.id, amount=600),
+            services.RepaymentDTO(investment_id=investment.id, amount=1),
+        ],
+        uow_factory(),
+        chunk_size=1,
+    )
+
+    assert [result.error is None for result in results] == [True, True, False]
+    async with uow_factory() as uow:
+        stored = await uow.investments.get(investment.id)
+        assert stored.status == InvestmentStatus.COMPLETED
+        assert stored.loan.status == LoanStatus.PAID
+        counts = (await uow.session.execute(select(borrower_loan_counts))).one()
+        assert (counts.funded_count, counts.repaying_count, counts.paid_count) == (
+            0,
+            0,
+            1,
+        )
+
+
+@pytest.mark.asyncio
+async def test_portfolio_aggregates_follow_the_writes(uow_factory):
+    investment = await add_pending_investment(uow_factory)
+    await services.approve_investment(investment.id, uow_factory())
+    await services.ingest_repayments(
+        [services.RepaymentDTO(investment_id=investment.id, amount=300)],
+        uow_factory(),
+    )
+
+    async with uow_factory() as uow:
+        session = uow.session
+        summary = await queries.portfolio_summary(session)
+        assert summary["total_loans"] == 1
+        assert summary["by_status"]["repaying"] == {
+            "loan_count": 1,
+            "total_amount": 1000.0,
+        }
+        assert summary["by_status"]["active"]["loan_count"] == 0
+        [volume] = await queries.funded_volume(session, date.today(), date.today())
+        assert (volume["loan_count"], volume["total_amount"]) == (1, 1000.0)
+        exposure = await queries.investor_exposure_for(session, investment.investor.id)
+        assert exposure["pending_amount"] == 0
+        assert exposure["outstanding_amount"] == 700
+
+        maintained = (await session.execute(select(investor_exposure))).all()
+        await SqlAlchemyAnalyticsRepository(session).rebuild()
+        assert (await session.execute(select(investor_exposure))).all() == maintained
+        assert await queries.portfolio_summary(session) == summary